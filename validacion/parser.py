@@ -15,6 +15,20 @@ def normalizar(texto):
     texto = re.sub(r'\s+', ' ', texto)
     return texto
 
+def normalizar_via(nombre):
+    """
+    Forma canónica del nombre de una calle/avenida para comparar por igualdad:
+    "CALLE JUJUY(49)" -> "jujuy", "Av. Roque Pérez" -> "roque perez".
+    """
+    t = normalizar(nombre or "")
+    t = re.sub(r'\(\s*\d+\s*\)\s*$', '', t).strip()
+    tokens = t.split()
+    if tokens and tokens[0] in ABREVIATURAS:
+        tokens[0] = ABREVIATURAS[tokens[0]]
+    if len(tokens) > 1 and tokens[0] in ("calle", "avenida"):
+        tokens = tokens[1:]
+    return " ".join(tokens)
+
 def parsear(texto):
     """
     Devuelve un diccionario con los elementos detectados:
@@ -41,3 +55,63 @@ def parsear(texto):
         tipo, nombre = "calle", base.replace("calle ", "", 1).strip()
 
     return {"tipo": tipo, "via": nombre, "numero": numero}
+
+
+# --- Nomenclatura catastral (IDE Posadas) ---
+
+# etiqueta -> campo de Parcel
+ETIQUETAS_CATASTRO = {
+    "distrito": "district", "dist": "district", "dto": "district",
+    "seccion": "section", "sec": "section",
+    "chacra": "chacra", "ch": "chacra", "cha": "chacra",
+    "manzana": "block", "mz": "block", "mza": "block", "man": "block",
+    "lote": "lot", "lt": "lot", "lot": "lot",
+    "parcela": "parcel", "par": "parcel", "pc": "parcel",
+    "unidad": "unit", "uf": "unit", "unfu": "unit",
+}
+# código sin etiquetas "12-34-5": campos según la cantidad de partes
+POSICIONES_CATASTRO = {
+    3: ("chacra", "block", "parcel"),
+    4: ("chacra", "block", "parcel", "unit"),
+    5: ("district", "chacra", "block", "parcel", "unit"),
+    6: ("district", "section", "chacra", "block", "parcel", "unit"),
+}
+# orden del índice compuesto core_parcel_code_idx (búsqueda por prefijo)
+CAMPOS_CATASTRO = ("chacra", "block", "parcel", "lot")
+
+def codigo_catastral(valor):
+    """Forma canónica de una parte del código: sin espacios, minúsculas y sin ceros a la izquierda."""
+    v = re.sub(r'\s+', '', str(valor or "")).lower()
+    return v.lstrip("0") or ("0" if v else "")
+
+def parsear_catastro(texto):
+    """
+    Código catastral -> {"gid": ...} o {campo: valor} con campos de Parcel,
+    o None si el texto no es un código. Acepta "IDGIS 12345",
+    "ch 12 mz 34 lote 5", "catastro 12-34-5" y "12-34-5" (ver POSICIONES_CATASTRO).
+    Para no confundirse con "chacra 12 manzana 3" (zona interna) ni con un
+    "lote 5" suelto exige un prefijo "catastro"/"nomenclatura"/"nc", o dos
+    etiquetas o más con lote, parcela o unidad entre ellas.
+    """
+    t = normalizar(texto or "")
+
+    m = re.match(r'^(?:idgis|gid)\s*[:#]?\s*(\S+)$', t)
+    if m:
+        return {"gid": m.group(1)}
+
+    prefijo = re.match(r'^(?:catastro|nomenclatura(?: catastral)?|nc)\b[\s:#.]*', t)
+    resto = t[prefijo.end():] if prefijo else t
+
+    m = re.match(r'^(\w+)(?:\s*[-/.]\s*(\w+)){2,5}$', resto)
+    if m and resto[0].isdigit():
+        partes = re.split(r'\s*[-/.]\s*', resto)
+        return {c: codigo_catastral(v) for c, v in zip(POSICIONES_CATASTRO[len(partes)], partes)}
+
+    etiquetas = "|".join(sorted(ETIQUETAS_CATASTRO, key=len, reverse=True))
+    pares = re.findall(rf'\b({etiquetas})\.?\s*[:#]?\s*(\d+[a-z]?)\b', resto)
+    codigo = {ETIQUETAS_CATASTRO[k]: codigo_catastral(v) for k, v in pares}
+    # sin prefijo hacen falta al menos dos etiquetas y una de lote/parcela/unidad:
+    # "lote 5" solo no es una nomenclatura ("chacra 12 manzana 3" es una zona interna)
+    if codigo and (prefijo or (len(codigo) >= 2 and {"lot", "parcel", "unit"} & codigo.keys())):
+        return codigo
+    return None
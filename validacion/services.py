@@ -1,13 +1,29 @@
 # validacion/services.py
+from django.conf import settings
 from django.db.models import Func, F
 from django.contrib.postgres.search import TrigramSimilarity
 from django.db.models.expressions import RawSQL
-from validador.core.models import Street
+from validador.core.models import Street, Building, BlockGrid
+from validador.core.services import street_index, linear_ref, result_cache, cadastre
+from validador.core.services.intersections import buscar_esquina
+from validador.core.services.address_hierarchy import (
+    buscar_zona_interna, buscar_zonas_internas, clave_zona, contexto_punto, contextos_puntos,
+)
+from .parser import normalizar, parsear, parsear_catastro
 
 class Unaccent(Func):
     function = "unaccent"
 
 def buscar_via(nombre: str, tipo: str | None = None, top: int = 5):
+    """
+    Top-k de calles/avenidas parecidas a `nombre`. Usa el índice en memoria
+    del worker; con STREET_INDEX_ENABLED = False vuelve a consultar PostGIS.
+    """
+    if getattr(settings, "STREET_INDEX_ENABLED", True):
+        return street_index.indice().buscar(nombre, tipo, top)
+    return buscar_via_sql(nombre, tipo, top)
+
+def buscar_via_sql(nombre: str, tipo: str | None = None, top: int = 5):
     nombre = nombre.lower()
     base = Street.objects.all()
     if tipo in ("calle","avenida"):
@@ -25,3 +41,278 @@ def buscar_via(nombre: str, tipo: str | None = None, top: int = 5):
         qs = base.filter(name__icontains=nombre)[:top]
     return list(qs)
 
+
+# === Resolución de una dirección ya parseada ===
+# Devuelve solo datos planos (ids y coordenadas), no instancias, así el
+# resultado se puede cachear. Se usa a través de validar()/validar_lote().
+
+PALABRAS_ZONA = ("chacra", "manzana", "monoblock", "edificio", "torre")
+
+def resolver_via(texto, parsed, contexto=True):
+    """
+    Paso 1: calle/avenida (o esquina). Con contexto=False no agrega el
+    contexto del punto interpolado (resolver_lote lo calcula para todo el lote).
+    """
+    cand1 = buscar_via(parsed.get("via", ""), parsed.get("tipo"))
+    res = {
+        "status": "NO_MATCH",
+        "payload": {"status": "NO_MATCH", "input": texto, "parsed": parsed, "candidatos": []},
+        "street_id": None,
+        "building_id": None,
+        "punto": None,
+        "hay_via": bool(cand1),
+    }
+
+    if parsed.get("via2"):
+        # esquina -> punto precalculado en core_streetintersection
+        cand2 = buscar_via(parsed["via2"])
+        if cand1 and cand2:
+            esquina = buscar_esquina(cand1, cand2)
+            if esquina:
+                lon, lat = esquina.geom.x, esquina.geom.y
+                res["status"] = "OK"
+                res["street_id"] = esquina.street_a_id
+                res["punto"] = (lon, lat)
+                res["payload"] = {
+                    "status": "OK",
+                    "via": cand1[0].name,
+                    "via2": cand2[0].name,
+                    "precision": "esquina",
+                    "centro": {"lon": lon, "lat": lat},
+                }
+            else:
+                # las calles existen pero no se cruzan (o no hay esquinas calculadas)
+                res["status"] = "INCOMPLETA"
+                res["payload"] = {"status": "INCOMPLETA",
+                                  "pregunta": f"¿Es la esquina entre {cand1[0].name} y {cand2[0].name}? ¿Tenés altura?"}
+    elif cand1:
+        # tenemos calle/avenida, si hay altura damos OK; el punto es aproximado
+        # (numeración métrica desde ALTURA_ORIGEN, no hay rangos oficiales)
+        res["street_id"] = cand1[0].pk
+        if parsed.get("numero"):
+            res["status"] = "OK"
+            res["payload"] = {
+                "status": "OK",
+                "via": cand1[0].name,
+                "tipo": cand1[0].kind,
+                "altura": parsed["numero"],
+                "precision": "sin_rango",
+            }
+            punto = linear_ref.interpolar(cand1[0], parsed["numero"])
+            if punto:
+                res["punto"] = punto
+                res["payload"]["precision"] = "aproximada"
+                res["payload"]["centro"] = {"lon": punto[0], "lat": punto[1]}
+                if contexto:
+                    agregar_contexto(res, contexto_punto(*punto))
+        else:
+            res["status"] = "INCOMPLETA"
+            res["payload"] = {"status": "INCOMPLETA", "pregunta": "¿Tenés la altura o una esquina cercana?"}
+    return res
+
+def agregar_contexto(res, contexto):
+    res["payload"]["contexto"] = contexto
+    if contexto["zona_monoblock"]:
+        res["payload"]["pregunta"] = "Zona de monoblocks: indicá edificio/torre, escalera y depto."
+    return res
+
+def necesita_zona(texto, parsed, res):
+    """El fallback jerárquico corre si no hubo calle, o si el texto sugiere zona interna."""
+    sugiere_zona_interna = any(k in texto.lower() for k in PALABRAS_ZONA)
+    return (res["status"] == "NO_MATCH") or (sugiere_zona_interna and parsed.get("via") and not res["hay_via"])
+
+def resolver_zona(res, objs):
+    """Paso 2: chacra/manzana/monoblock a partir de los objetos encontrados."""
+    if len(objs) == 1:
+        obj = objs[0]
+        # Elegimos un punto representativo (las zonas traen el centroide ya calculado)
+        point = getattr(obj, "centro", None) or getattr(obj, "geom", None)
+        lon = lat = None
+        if point:
+            lon, lat = point.x, point.y
+            res["punto"] = (lon, lat)
+
+        if isinstance(obj, Building):
+            res["status"] = "OK"
+            res["building_id"] = obj.pk
+            res["payload"] = {
+                "status": "OK",
+                "precision": "edificio",
+                "detalle": {
+                    "barrio": obj.barrio,
+                    "chacra": obj.chacra,
+                    "manzana": obj.manzana,
+                    "numero": obj.numero,
+                    "letra": obj.letra,
+                    "escalera": obj.escalera,
+                    "centro": {"lon": lon, "lat": lat},
+                }
+            }
+        elif isinstance(obj, BlockGrid):
+            res["status"] = "INCOMPLETA"
+            res["payload"] = {
+                "status": "INCOMPLETA",
+                "precision": "zona_interna",
+                "detalle": {
+                    "chacra": obj.chacra,
+                    "manzana": obj.manzana,
+                    "centro": {"lon": lon, "lat": lat},
+                },
+                "pregunta": "¿Podés indicar la casa/torre/escalera?"
+            }
+    elif len(objs) > 1:
+        opciones = []
+        for o in objs[:8]:
+            if isinstance(o, Building):
+                opciones.append(f"Edificio (chacra {o.chacra}, manzana {o.manzana}, nro {o.numero})")
+            elif isinstance(o, BlockGrid):
+                opciones.append(f"Chacra {o.chacra}, manzana {o.manzana}")
+        res["status"] = "AMBIGUA"
+        res["payload"] = {"status": "AMBIGUA", "opciones": opciones, "pregunta": "¿Cuál de estas opciones es la correcta?"}
+    return res
+
+def resolver_catastro(texto, codigo, parcelas):
+    """Nomenclatura catastral -> parcela (exacta), opciones o pedido de más datos."""
+    res = {
+        "status": "NO_MATCH",
+        "payload": {"status": "NO_MATCH", "input": texto, "catastro": codigo,
+                    "pregunta": "No encontramos esa nomenclatura catastral. ¿Podés revisarla?"},
+        "street_id": None,
+        "building_id": None,
+        "punto": None,
+        "hay_via": False,
+    }
+    if len(parcelas) == 1:
+        detalle = cadastre.describir(parcelas[0])
+        res["status"] = "OK"
+        res["punto"] = (detalle["centro"]["lon"], detalle["centro"]["lat"])
+        res["payload"] = {"status": "OK", "precision": "parcela",
+                          "centro": detalle["centro"], "detalle": detalle}
+    elif len(parcelas) > cadastre.MAX_OPCIONES:
+        res["status"] = "INCOMPLETA"
+        res["payload"] = {"status": "INCOMPLETA", "precision": "catastro_parcial", "catastro": codigo,
+                          "pregunta": "Hay muchas parcelas con ese código. ¿Tenés el lote o la parcela?"}
+    elif parcelas:
+        res["status"] = "AMBIGUA"
+        res["payload"] = {
+            "status": "AMBIGUA",
+            "opciones": [f"Chacra {p.chacra}, manzana {p.block}, parcela {p.parcel}, lote {p.lot} (IDGIS {p.gid})"
+                         for p in parcelas],
+            "pregunta": "¿Cuál de estas parcelas es la correcta?",
+        }
+    return res
+
+def resolver(texto, parsed):
+    """Resolución completa de una sola dirección."""
+    codigo = parsear_catastro(texto)
+    if codigo:
+        return resolver_catastro(texto, codigo, cadastre.buscar_parcelas(codigo))
+    res = resolver_via(texto, parsed)
+    if necesita_zona(texto, parsed, res):
+        res = resolver_zona(res, list(buscar_zona_interna(parsed)))
+    return res
+
+def resolver_lote(items):
+    """
+    Resolución de muchas direcciones: `items` es una lista de (texto, parsed).
+    Las calles y el contexto de los puntos interpolados salen de los índices
+    en memoria; las zonas internas y los códigos catastrales, de una sola
+    consulta cada uno para todo el lote. Devuelve los resultados en orden.
+    """
+    codigos = [parsear_catastro(texto) for texto, _parsed in items]
+    parcelas = cadastre.buscar_parcelas_lote([c for c in codigos if c])
+    resultados = [
+        resolver_catastro(texto, codigo, parcelas[cadastre.clave(codigo)][:cadastre.MAX_OPCIONES + 1])
+        if codigo else resolver_via(texto, parsed, contexto=False)
+        for (texto, parsed), codigo in zip(items, codigos)
+    ]
+    interpolados = [r for r in resultados if r["payload"].get("precision") == "aproximada"]
+    for r, contexto in zip(interpolados, contextos_puntos(r["punto"] for r in interpolados)):
+        agregar_contexto(r, contexto)
+    pendientes = [k for k, (texto, parsed) in enumerate(items)
+                  if not codigos[k] and necesita_zona(texto, parsed, resultados[k])]
+    if pendientes:
+        zonas = buscar_zonas_internas([items[k][1] for k in pendientes])
+        for k in pendientes:
+            objs = zonas.get(clave_zona(items[k][1]), [])
+            resultados[k] = resolver_zona(resultados[k], objs)
+    return resultados
+
+
+# === Motor de validación ===
+# Punto de entrada único: la API DRF, el chat, el formulario web, la carga por
+# lotes y los comandos llaman a validar()/validar_lote(). No arma requests ni
+# escribe QueryLog; quien llama decide si registra (y cómo).
+
+def _sin_input(res: dict) -> dict:
+    """
+    La caché se indexa por el texto normalizado: el texto crudo que algunos
+    payloads repiten ("input") no se guarda, lo repone _con_input().
+    """
+    if "input" in res["payload"]:
+        res["payload"]["input"] = None
+    return res
+
+def _con_input(res: dict, texto: str) -> dict:
+    if "input" in res["payload"]:
+        res["payload"]["input"] = texto
+    return res
+
+def validar(texto: str) -> dict:
+    """
+    Texto -> resultado estructurado:
+    {"input", "normalized", "parsed", "status", "payload", "street_id", "building_id", "punto"}
+    """
+    texto = (texto or "").strip()
+    parsed = parsear(texto)
+    res = result_cache.obtener("resolver", texto, lambda: _sin_input(resolver(texto, parsed)))
+    return {"input": texto, "normalized": normalizar(texto), "parsed": parsed, **_con_input(res, texto)}
+
+def validar_lote(textos) -> list:
+    """Como validar() pero para muchos textos; devuelve los resultados en orden."""
+    textos = [(t or "").strip() for t in textos]
+    items = [(t, parsear(t)) for t in textos]
+    resultados = result_cache.obtener_muchos(
+        "resolver", textos,
+        lambda faltan: [_sin_input(r) for r in resolver_lote([items[k] for k in faltan])],
+    )
+    return [
+        {"input": t, "normalized": normalizar(t), "parsed": p, **_con_input(r, t)}
+        for (t, p), r in zip(items, resultados)
+    ]
+
+# Confianza aproximada según cómo se resolvió la dirección (0..1)
+PUNTAJES = {
+    "parcela": 1.0,
+    "esquina": 1.0,
+    "edificio": 0.9,
+    "sin_rango": 0.6,
+    "aproximada": 0.6,      # altura interpolada sin rangos oficiales: no vale más que sin_rango
+    "zona_interna": 0.5,
+}
+
+def puntaje(res: dict) -> float:
+    payload = res["payload"]
+    if res["status"] == "AMBIGUA":
+        return 0.3
+    if res["status"] in ("OK", "INCOMPLETA"):
+        return PUNTAJES.get(payload.get("precision"), 0.4)
+    return 0.0
+
+def aplanar(res: dict) -> dict:
+    """Resultado de validar() en columnas planas (CSV, exportaciones)."""
+    payload = res["payload"]
+    detalle = payload.get("detalle") or payload.get("contexto") or {}
+    punto = res.get("punto") or (None, None)
+    return {
+        "status": res["status"],
+        "precision": payload.get("precision", ""),
+        "street": payload.get("via", ""),
+        "street2": payload.get("via2", ""),
+        "altura": payload.get("altura", ""),
+        "chacra": detalle.get("chacra") or "",
+        "manzana": detalle.get("manzana") or "",
+        "lon": punto[0],
+        "lat": punto[1],
+        "score": puntaje(res),
+    }
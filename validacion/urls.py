@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ValidateAddress
+from .views import ValidateAddress, ValidateBatch, ReverseGeocode
 from . import views
 
 
@@ -9,4 +9,6 @@ urlpatterns = [
     path("", views.validador_usuario, name="usuario"),
     path("historial/", views.historial, name="historial"),
     path("validate_address", ValidateAddress.as_view(), name="validate_address"),
+    path("validate_batch", ValidateBatch.as_view(), name="validate_batch"),
+    path("reverse_geocode", ReverseGeocode.as_view(), name="reverse_geocode"),
 ]
\ No newline at end of file
@@ -1,16 +1,20 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from validador.core.services.address_hierarchy import buscar_zona_interna
-from validador.core.models import QueryLog, Street, Building, BlockGrid  # para type hints y log
-from .parser import parsear
-from .services import buscar_via
+from validador.core.models import QueryLog
+from .services import validar, validar_lote
+from validador.core.services import querylog_buffer
+from validador.core.services.reverse_geocode import geocodificar
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from validador.core.services.address_validator import validate_address
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
 from django.contrib.auth.views import LoginView, LogoutView
+from django.contrib.gis.geos import Point
+from django.http import StreamingHttpResponse
+from django.conf import settings
+import json
 
 class VadiLoginView(LoginView):
     template_name = "accounts/login.html"
@@ -70,119 +74,126 @@ def historial(request):
     return render(request, "validador/historial.html", {"rows": q})
 
 # === API REST ===
+def _querylog(user, res):
+    """QueryLog (sin guardar) para un resultado de services.validar."""
+    punto = res.get("punto")
+    return QueryLog(
+        user=user if user is not None and user.is_authenticated else None,
+        raw_text=res["input"],
+        parsed_tokens=res["parsed"],
+        status=res["status"],
+        result_json=res["payload"],    # ← el JSON completo
+        llm_reason="",                 #  TODO: explicación textual generada por el LLM (por ahora vacía)
+        score=0,                       #  TODO: puntaje de confianza (por ahora neutro)
+        quality="",                    #  TODO: clasificación 'A'/'M'/'B' (por ahora vacío)
+        street_id=res.get("street_id"),
+        building_id=res.get("building_id"),
+        geom=Point(*punto, srid=4326) if punto else None,
+    )
+
 class ValidateAddress(APIView):
     permission_classes = [IsAuthenticated]
+    registrar_log = True   # bench_validation lo apaga: mide la vista sin llenar QueryLog
 
     def post(self, request):
-        texto = (request.data.get("input") or "").strip()
-        parsed = parsear(texto)
-
-        # --- 1) PRUEBA NORMAL: buscar vía (calle/avenida) ---
-        cand1 = buscar_via(parsed.get("via", ""), parsed.get("tipo"))
-        status = "NO_MATCH"
-        payload = {"status": status, "input": texto, "parsed": parsed, "candidatos": []}
-        geom_pt = None
-        street_fk = None
-        building_fk = None
-        razon_llm = ""   #  TODO: explicación textual generada por el LLM (por ahora vacía)
-        score = 0.0      #  TODO: puntaje de confianza (por ahora neutro)
-        quality = ""     #  TODO: clasificación 'A'/'M'/'B' (por ahora vacío)
-
-        if parsed.get("via2"):
-            # esquina -> dejamos INCOMPLETA salvo que más adelante quieras intersección exacta
-            cand2 = buscar_via(parsed["via2"])
-            if cand1 and cand2:
-                status = "INCOMPLETA"
-                payload = {"status": status,
-                           "pregunta": f"¿Es la esquina entre {cand1[0].name} y {cand2[0].name}? ¿Tenés altura?"}
-        elif cand1:
-            # tenemos calle/avenida, si hay altura damos OK (interpolado)
-            street_fk = cand1[0]
-            if parsed.get("numero"):
-                status = "OK"
-                payload = {
-                    "status": status,
-                    "via": cand1[0].name,
-                    "tipo": cand1[0].kind,
-                    "altura": parsed["numero"],
-                    "precision": "interpolada",
-                }
-            else:
-                status = "INCOMPLETA"
-                payload = {"status": status, "pregunta": "¿Tenés la altura o una esquina cercana?"}
-
-        # --- 2) FALLBACK JERÁRQUICO: chacra/manzana/monoblock ---
-        # Se dispara si NO hubo match de calle/avenida (o si el texto sugiere zona interna)
-        texto_l = texto.lower()
-        sugiere_zona_interna = any(k in texto_l for k in ("chacra", "manzana", "monoblock", "edificio", "torre"))
-        if (status == "NO_MATCH") or (sugiere_zona_interna and parsed.get("via") and not cand1):
-            qs = list(buscar_zona_interna(parsed))
-
-            if len(qs) == 1:
-                obj = qs[0]
-                # Elegimos un punto representativo
-                geom = getattr(obj, "geom", None)
-                if geom:
-                    point = geom if geom.geom_type == "Point" else geom.centroid
-                    geom_pt = point
-                    lon, lat = point.x, point.y
-                else:
-                    lon = lat = None
-
-                if isinstance(obj, Building):
-                    status = "OK"
-                    building_fk = obj
-                    payload = {
-                        "status": status,
-                        "precision": "edificio",
-                        "detalle": {
-                            "barrio": getattr(obj, "barrio", None),
-                            "chacra": getattr(obj, "chacra", None),
-                            "manzana": getattr(obj, "manzana", None),
-                            "numero": getattr(obj, "numero", None),
-                            "letra": getattr(obj, "letra", None),
-                            "escalera": getattr(obj, "escalera", None),
-                            "centro": {"lon": lon, "lat": lat},
-                        }
-                    }
-                elif isinstance(obj, BlockGrid):
-                    status = "INCOMPLETA"
-                    payload = {
-                        "status": status,
-                        "precision": "zona_interna",
-                        "detalle": {
-                            "chacra": getattr(obj, "chacra", None),
-                            "manzana": getattr(obj, "manzana", None),
-                            "centro": {"lon": lon, "lat": lat},
-                        },
-                        "pregunta": "¿Podés indicar la casa/torre/escalera?"
-                    }
-            elif len(qs) > 1:
-                status = "AMBIGUA"
-                opciones = []
-                for o in qs[:8]:
-                    if isinstance(o, Building):
-                        opciones.append(f"Edificio (chacra {getattr(o,'chacra',None)}, manzana {getattr(o,'manzana',None)}, nro {getattr(o,'numero',None)})")
-                    elif isinstance(o, BlockGrid):
-                        opciones.append(f"Chacra {getattr(o,'chacra',None)}, manzana {getattr(o,'manzana',None)}")
-                payload = {"status": status, "opciones": opciones, "pregunta": "¿Cuál de estas opciones es la correcta?"}
-
-        # --- 3) Registrar QueryLog ---
-        QueryLog.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-            raw_text=texto,
-            parsed_tokens=parsed,
-            status=status,
-            result_json=payload,           # ← el JSON completo
-            llm_reason=razon_llm or "",
-            score=score or 0,
-            quality=quality or "",
-            street=street_fk,
-            building=building_fk,
-            geom=geom_pt  # Point en SRID 4326 (tus modelos ya están así)
-        )
-
-        return Response(payload, status=200)
+        # 1) calle/avenida y 2) fallback jerárquico chacra/manzana/monoblock
+        res = validar(request.data.get("input") or "")
+
+        # 3) Registrar QueryLog (write-behind, fuera del camino del request)
+        if self.registrar_log:
+            querylog_buffer.registrar(_querylog(request.user, res))
+
+        return Response(res["payload"], status=200)
+
+class ValidateBatch(APIView):
+    """
+    Valida muchas direcciones en un solo request.
+    Entrada:
+      - JSON: ["Mitre 1234", ...] o [{"input": "Mitre 1234"}, ...]
+      - NDJSON (Content-Type: application/x-ndjson, o archivo en el campo 'file'):
+        una dirección por línea, como string JSON u objeto {"input": ...}
+    Salida: NDJSON en el mismo orden de entrada, {"index", "input", "result"} por línea.
+    Se procesa por bloques de VALIDATION_BATCH_CHUNK: zonas internas con una
+    consulta por bloque y QueryLog con bulk_create.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            textos = self._leer_entrada(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        limite = getattr(settings, "VALIDATION_BATCH_MAX", 10000)
+        if len(textos) > limite:
+            return Response({"error": f"Máximo {limite} direcciones por lote"}, status=400)
+
+        user = request.user
+        bloque = getattr(settings, "VALIDATION_BATCH_CHUNK", 500)
+
+        def generar():
+            for ini in range(0, len(textos), bloque):
+                resultados = validar_lote(textos[ini:ini + bloque])
+                QueryLog.objects.bulk_create(
+                    [_querylog(user, r) for r in resultados],
+                    batch_size=bloque,
+                )
+                for k, r in enumerate(resultados):
+                    linea = {"index": ini + k, "input": r["input"], "result": r["payload"]}
+                    yield json.dumps(linea, ensure_ascii=False) + "\n"
+
+        return StreamingHttpResponse(generar(), content_type="application/x-ndjson")
+
+    @staticmethod
+    def _leer_entrada(request):
+        archivo = request.FILES.get("file") if (request.content_type or "").startswith("multipart/") else None
+        if archivo is not None:
+            lineas = (l.decode("utf-8") for l in archivo)
+        elif "ndjson" in (request.content_type or "") or "jsonlines" in (request.content_type or ""):
+            lineas = request.body.decode("utf-8").splitlines()
+        else:
+            data = request.data
+            if isinstance(data, dict):
+                data = data.get("inputs")
+            if not isinstance(data, list):
+                raise ValueError("Se espera una lista JSON de direcciones")
+            return [ValidateBatch._texto(x) for x in data]
+
+        textos = []
+        for n, linea in enumerate(lineas, start=1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                textos.append(ValidateBatch._texto(json.loads(linea)))
+            except json.JSONDecodeError:
+                raise ValueError(f"Línea {n}: JSON inválido")
+        return textos
+
+    @staticmethod
+    def _texto(x):
+        if isinstance(x, dict):
+            x = x.get("input")
+        return (str(x) if x is not None else "").strip()
+
+class ReverseGeocode(APIView):
+    """
+    GET ?lon=..&lat=..[&radius=m] -> calle y altura, chacra/manzana, parcela
+    y edificio más cercano (radio en metros, default REVERSE_GEOCODE).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            lon = float(request.query_params["lon"])
+            lat = float(request.query_params["lat"])
+            radio = request.query_params.get("radius")
+            radio = float(radio) if radio else None
+        except (KeyError, ValueError):
+            return Response({"error": "Parámetros requeridos: lon, lat (y opcional radius)"}, status=400)
+        if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+            return Response({"error": "Coordenadas fuera de rango"}, status=400)
+        return Response(geocodificar(lon, lat, radio))
 
 class LogoutGetView(LogoutView):
     
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import QueryLog, Street
+from .models import QueryLog, Street, BlockGrid, Building, Parcel
 
 @admin.register(QueryLog)
 class QueryLogAdmin(admin.ModelAdmin):
@@ -19,4 +19,20 @@ class QueryLogAdmin(admin.ModelAdmin):
 class StreetAdmin(admin.ModelAdmin):
     list_display = ("id","kind","name")
     search_fields = ("name",)
-    list_filter = ("kind",)
\ No newline at end of file
+    list_filter = ("kind",)
+
+@admin.register(BlockGrid)
+class BlockGridAdmin(admin.ModelAdmin):
+    list_display = ("id","barrio","chacra","manzana")
+    search_fields = ("=chacra","=manzana","barrio")
+
+@admin.register(Building)
+class BuildingAdmin(admin.ModelAdmin):
+    list_display = ("id","barrio","chacra","manzana","numero","letra","escalera")
+    search_fields = ("=chacra","=manzana","=numero","barrio")
+
+@admin.register(Parcel)
+class ParcelAdmin(admin.ModelAdmin):
+    list_display = ("id","gid","chacra","block","parcel","lot","unit")
+    # "=" -> igualdad exacta, usa core_parcel_code_idx y el índice único de gid
+    search_fields = ("=gid","=chacra","=block","=parcel","=lot")
@@ -3,18 +3,54 @@ from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from rest_framework import status
 from .models import QueryLog
-from .serializers import QueryLogSerializer, ValidateAddressInputSerializer
+from .pagination import QueryLogCursorPagination
+from .serializers import (
+    CAMPOS_LISTADO, QueryLogListSerializer, QueryLogSerializer, ValidateAddressInputSerializer,
+)
 from validador.core.services.address_validator import validate_address
 from rest_framework.permissions import IsAuthenticated
 # chat endpoint con LLM
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
-from .services.llm_service import craft_reply
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from .services.llm_service import craft_reply_stream
 from .services.validator_bridge import run_validator
+from .services import querylog_buffer
+from validacion.views import MAP_RESULT, _querylog
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _sse(evento: str, data) -> str:
+    """Un evento server-sent events."""
+    return f"event: {evento}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+def _guardar_log(user, res, answer):
+    # Sincrónica: querylog_buffer.registrar puede escribir en la base (buffer
+    # apagado o POLICY "sync") o esperar (POLICY "block"), así que desde la
+    # vista async se llama con sync_to_async y no en el event loop.
+    # Misma fila que ValidateAddress (tokens, punto, calle/edificio para el
+    # heatmap y los links), con lo que "dijo" VADI en llm_reason.
+    # NO bloquear la respuesta si falla el insert
+    try:
+        log = _querylog(user, res)
+        log.llm_reason = answer
+        querylog_buffer.registrar(log)
+    except Exception:
+        # no romper la UX si falló el log
+        logger.exception("No se pudo guardar QueryLog del chat")
 
 @csrf_exempt
-def chat(request):
+async def chat(request):
+    """
+    Chat con VADI (vista async, pensada para correr bajo ASGI).
+    - Accept: text/event-stream (o ?stream=1): responde SSE; primero el evento
+      'validator' con el resultado del validador, después 'token' por cada
+      fragmento del LLM y al final 'done' con el texto completo.
+    - Si no, responde un JSON {"response", "validator"} como antes.
+    El QueryLog se registra con querylog_buffer desde un hilo (sync_to_async).
+    """
     if request.method != "POST":
         return JsonResponse({"error": "Método no permitido"}, status=405)
 
@@ -24,11 +60,12 @@ def chat(request):
         if not user_text:
             return JsonResponse({"error": "Mensaje vacío"}, status=400)
 
-        # 1) Validar dirección con tu lógica existente
-        val_json = run_validator(user_text, user=request.user if request.user.is_authenticated else None)
+        user = await request.auser()
+        user = user if user.is_authenticated else None
 
-        # 2) Redactar respuesta con el LLM
-        answer = craft_reply(user_text, val_json)
+        # 1) Validar dirección con tu lógica existente (sincrónica, en un hilo)
+        res = await sync_to_async(run_validator)(user_text, user=user)
+        val_json = res["payload"]
 
     except json.JSONDecodeError:
         return JsonResponse({"error": "JSON inválido"}, status=400)
@@ -37,40 +74,59 @@ def chat(request):
         print(f"⚠️ Error en chat(): {e}")
         return JsonResponse({"error": str(e)}, status=500)
 
-    # 3) Registrar QueryLog (NO bloquear la respuesta si falla el insert)
-    try:
-        QueryLog.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-            raw_text=user_text,
-            parsed_tokens={},                                  # si aún no generás tokens
-            status=val_json.get("status", ""),
-            result_json=val_json,                              # JSON completo del validador
-            normalized=val_json.get("normalized", "") or "",   # fallback vacío
-            llm_reason=answer,                                 # lo que “dijo” VADI
-            score=0.0,
-            quality="",                                        # A/M/B si luego lo calculás
-        )
-    except Exception as log_err:
-        # no romper la UX si falló el log
-        print(f"⚠️ No se pudo guardar QueryLog: {log_err}")
+    stream = ("text/event-stream" in request.headers.get("Accept", "")
+              or request.GET.get("stream") == "1")
 
-    # 4) Responder al frontend
-    return JsonResponse({"response": answer, "validator": val_json})
+    if not stream:
+        # 2) Redactar respuesta con el LLM
+        answer = "".join([t async for t in craft_reply_stream(user_text, val_json)]).strip()
+        # 3) Registrar QueryLog
+        await sync_to_async(_guardar_log)(user, res, answer)
+        # 4) Responder al frontend
+        return JsonResponse({"response": answer, "validator": val_json})
+
+    async def eventos():
+        yield _sse("validator", val_json)
+        partes = []
+        async for trozo in craft_reply_stream(user_text, val_json):
+            partes.append(trozo)
+            yield _sse("token", {"text": trozo})
+        answer = "".join(partes).strip()
+        await sync_to_async(_guardar_log)(user, res, answer)
+        yield _sse("done", {"response": answer})
+
+    resp = StreamingHttpResponse(eventos(), content_type="text/event-stream")
+    resp["Cache-Control"] = "no-cache"
+    resp["X-Accel-Buffering"] = "no"   # que nginx no acumule el stream
+    return resp
 
-class QueryLogViewSet(ModelViewSet):
-    permission_classes = [IsAuthenticated]
 class QueryLogViewSet(ModelViewSet):
     """
     CRUDL de validaciones.
     POST puede aceptar:
       - payload completo (ya creado)  -> crea directo
       - {"raw_text": "..."}           -> ejecuta validate_address() y persiste
+    El listado pagina por cursor sobre created_at (QueryLogCursorPagination) y
+    trae solo columnas escalares; result_json y geom se leen en el detalle.
     """
-    queryset = QueryLog.objects.all().order_by("-created_at")
+    permission_classes = [IsAuthenticated]
+    queryset = QueryLog.objects.all().order_by("-created_at", "-id")
     serializer_class = QueryLogSerializer
+    pagination_class = QueryLogCursorPagination
     filterset_fields = ["quality"]
     search_fields = ["raw_text", "normalized"]
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == "list":
+            qs = qs.only(*CAMPOS_LISTADO)
+        return qs
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return QueryLogListSerializer
+        return super().get_serializer_class()
+
     def create(self, request, *args, **kwargs):
         # Si viene solo raw_text, procesamos con tu pipeline
         input_ser = ValidateAddressInputSerializer(data=request.data)
@@ -78,17 +134,19 @@ class QueryLogViewSet(ModelViewSet):
             text = input_ser.validated_data["raw_text"].strip()
             result = validate_address(text)
 
-            # Persistimos (si tu validate_address no lo hizo)
-            # Si ya lo hace adentro, podrías buscar el último registro por raw_text+created_at.
-            obj = QueryLog.objects.create(
+            # Persistimos con el buffer de escritura: el registro se inserta en
+            # segundo plano, por eso respondemos 202 con el resultado.
+            querylog_buffer.registrar(QueryLog(
+                user=request.user if request.user.is_authenticated else None,
                 raw_text=text,
-                normalized=result.get("normalized", text),
-                llm_reason=result.get("reason", ""),
-                result=result,
-                score=result.get("score"),
-                quality=result.get("quality"),
-            )
-            return Response(QueryLogSerializer(obj).data, status=status.HTTP_201_CREATED)
+                normalized=result.get("normalized", text) or "",
+                llm_reason=result.get("reason", "") or "",
+                status=MAP_RESULT.get(result.get("status"), result.get("status") or "NO_MATCH"),
+                result_json=result,
+                score=result.get("score") or 0,
+                quality=result.get("quality") or "",
+            ))
+            return Response({"raw_text": text, "result": result}, status=status.HTTP_202_ACCEPTED)
 
         # Si no era el formato simple, probamos crear con el serializer del modelo
         return super().create(request, *args, **kwargs)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'validador.core'
+
+    def ready(self):
+        from validador.core import signals  # noqa: F401
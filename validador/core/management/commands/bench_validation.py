@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from validador.core.services import benchmark
+from pathlib import Path
+import json
+
+class Command(BaseCommand):
+    help = ("Benchmark del camino de validación sobre un corpus generado de las capas cargadas: "
+            "p50/p95/p99, throughput y consultas por request, en JSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--n", type=int, default=50, help="Casos por categoría del corpus")
+        parser.add_argument("--seed", type=int, default=0, help="Semilla del corpus (reproducible)")
+        parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por caso")
+        parser.add_argument("--with-cache", action="store_true",
+                            help="Medir con la caché de resultados encendida")
+        parser.add_argument("--out", help="Guardar el JSON en este archivo (default: stdout)")
+        parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+        parser.add_argument("--tolerance", type=float, default=0.20,
+                            help="Margen de p95 aceptado contra el baseline (0.20 = 20%%)")
+
+    def handle(self, *args, **opts):
+        corpus = benchmark.generar_corpus(opts["n"], opts["seed"])
+        if not corpus:
+            raise CommandError("Corpus vacío: ¿están cargadas las capas? (load_all)")
+
+        data = benchmark.correr(corpus, opts["repeat"], opts["with_cache"])
+        data["entorno"]["seed"] = opts["seed"]
+
+        salida = json.dumps(data, indent=2, ensure_ascii=False)
+        if opts["out"]:
+            Path(opts["out"]).write_text(salida + "\n", encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Resultado en {opts['out']}"))
+        else:
+            self.stdout.write(salida)
+
+        if opts["baseline"]:
+            base = json.loads(Path(opts["baseline"]).read_text(encoding="utf-8"))
+            problemas = benchmark.comparar(data, base, opts["tolerance"])
+            if problemas:
+                raise CommandError("Regresiones:\n  " + "\n  ".join(problemas))
+            self.stdout.write(self.style.SUCCESS("Sin regresiones contra el baseline"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from validador.core.services.intersections import construir
+import time
+
+class Command(BaseCommand):
+    help = "Precalcula las esquinas (cruces Street × Street) en core_streetintersection"
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        n = construir()
+        self.stdout.write(self.style.SUCCESS(f"Esquinas: {n} en {time.perf_counter() - t0:.1f}s"))
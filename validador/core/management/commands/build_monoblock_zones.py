@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from validador.core.services.monoblock import recalcular
+import time
+
+class Command(BaseCommand):
+    help = "Marca zona_monoblock en calles y manzanas con edificios a menos de RADIO_MONOBLOCK_M"
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        res = recalcular()
+        detalle = ", ".join(f"{k}: {v}" for k, v in res.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Zonas de monoblocks (cambios {detalle}) en {time.perf_counter() - t0:.1f}s"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from validador.core.services import snapshot
+from pathlib import Path
+import time
+
+class Command(BaseCommand):
+    help = ("Compila calles, chacras, manzanas, parcelas y edificios en un snapshot binario "
+            "que los workers abren con mmap (SNAPSHOT_PATH)")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--out", help="Ruta de salida (default: SNAPSHOT_PATH)")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        destino = Path(opts["out"]) if opts["out"] else snapshot.ruta()
+        header = snapshot.construir(destino)
+        capas = ", ".join(f"{c}: {d['n']}" for c, d in header["capas"].items())
+        mb = destino.stat().st_size / 2 ** 20
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {destino} ({mb:.1f} MB; {capas}) en {time.perf_counter() - t0:.1f}s"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from validador.core.services.linear_ref import construir
+import time
+
+class Command(BaseCommand):
+    help = "Precalcula los ejes de calle (tramos unidos, largo y rango de alturas) en core_streetaxis"
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        n = construir()
+        self.stdout.write(self.style.SUCCESS(f"Ejes: {n} en {time.perf_counter() - t0:.1f}s"))
@@ -1,12 +1,20 @@
 # validador/core/management/commands/load_all.py
+from io import StringIO
+from multiprocessing import get_context
 from pathlib import Path
+import time
 
 from django.conf import settings
 from django.core.management import BaseCommand, call_command, CommandError
+from django.db import connections
 
-# patrones -> (etiqueta, tipo)
+from validador.core.services import dataset_version
+
+# patrones -> (etiqueta, tipo). De cada patrón se carga solo el archivo más
+# nuevo (la fecha va en el nombre): cargar dos versiones de la misma capa
+# haría que la segunda borre lo que insertó la primera.
 MAP = {
-    "cuadricula_posadas_*_pretty.json": ("cuadricula", "json"),  # 👈 forzamos json
+    "calles_posadas_*_pretty.json": ("calle", "calle"),
     "avenidas_posadas_*_pretty.json": ("avenida", "avenida"),
     "chacras_posadas_*_pretty.json": ("chacra", "chacra"),
     "manzanero_posadas_*_pretty.json": ("manzanero", "manzanero"),
@@ -14,12 +22,64 @@ MAP = {
     "edificios_posadas_*_pretty.json": ("edificio", "edificio"),
 }
 
+# Etapas derivadas: etiqueta -> (comando, capas que lee, etapas que deben correr antes).
+# Corren después de todas las cargas, en orden de dependencias, y solo si
+# cambió alguna de las capas que leen (o con --overwrite). Las reparaciones
+# escriben blockgrid/building, así que una etapa que lea esas capas debe
+# declararlas como previa.
+DERIVADAS = {
+    "reparaciones": ("repair_layers", ("blockgrid", "building"), ()),
+    "esquinas": ("build_intersections", ("street",), ()),
+    "ejes": ("build_street_axes", ("street",), ()),
+    "monoblocks": ("build_monoblock_zones", ("street", "blockgrid", "building"), ("reparaciones",)),
+    "snapshot": ("build_snapshot", ("street", "blockgrid", "building", "parcel"), ("reparaciones", "monoblocks")),
+}
+
+# --- lado worker ---
+
+def _iniciar_worker():
+    # cada proceso abre su propia conexión
+    connections.close_all()
+
+def _cargar(trabajo):
+    """Corre load_geojson para un archivo. Devuelve (nombre, segundos, error o None)."""
+    path, tipo, extra = trabajo
+    t0 = time.perf_counter()
+    try:
+        call_command("load_geojson", path, "--type", tipo, *extra, verbosity=0, stdout=StringIO())
+        return Path(path).name, time.perf_counter() - t0, None
+    except Exception as e:
+        return Path(path).name, time.perf_counter() - t0, str(e)
+
+
+def orden_derivadas():
+    """Etiquetas de DERIVADAS en orden topológico."""
+    orden, vistas = [], set()
+
+    def visitar(etiqueta, camino=()):
+        if etiqueta in vistas:
+            return
+        if etiqueta in camino:
+            raise CommandError(f"Ciclo en etapas derivadas: {' -> '.join(camino + (etiqueta,))}")
+        for previa in DERIVADAS[etiqueta][2]:
+            visitar(previa, camino + (etiqueta,))
+        vistas.add(etiqueta)
+        orden.append(etiqueta)
+
+    for etiqueta in DERIVADAS:
+        visitar(etiqueta)
+    return orden
+
+
 class Command(BaseCommand):
     help = "Carga todas las capas data/pretty/*.json en PostGIS usando load_geojson"
 
     def add_arguments(self, parser):
-        parser.add_argument("--overwrite", action="store_true", help="Recrear registros si existen")
+        parser.add_argument("--overwrite", action="store_true",
+                            help="Reescribir todos los features aunque no hayan cambiado (load_geojson --full)")
         parser.add_argument("--limit", type=int, default=0, help="Procesar hasta N archivos (0 = todos)")
+        parser.add_argument("--jobs", type=int, default=1,
+                            help="Capas cargadas en paralelo, cada una en su proceso (1 = en serie)")
 
     def handle(self, *args, **opts):
         root = Path(getattr(settings, "ROOT_DIR", settings.BASE_DIR))
@@ -27,25 +87,77 @@ class Command(BaseCommand):
         if not pretty.exists():
             raise CommandError(f"No existe {pretty}")
 
-        done = failed = skipped = 0
+        done = failed = 0
         files = []
 
-        # recopila archivos por patrón en orden alfabético
+        # el archivo más nuevo de cada patrón
         for pattern, (_tag, _tipo) in MAP.items():
             found = sorted(pretty.glob(pattern))
-            files.extend([(path, _tipo) for path in found])
+            if found:
+                files.append((found[-1], _tipo))
 
         if opts["limit"] > 0:
             files = files[: opts["limit"]]
 
-        for path, tipo in files:
+        antes = dataset_version.versiones()
+        extra = ["--full"] if opts["overwrite"] else []
+        trabajos = [(str(path), tipo, extra) for path, tipo in files]
+        tiempos = []   # (etapa, segundos, ok)
+
+        # --- cargas: capas independientes entre sí ---
+        t0 = time.perf_counter()
+        jobs = max(1, min(opts["jobs"], len(trabajos) or 1))
+        if jobs == 1:
+            resultados = map(_cargar, trabajos)
+        else:
+            connections.close_all()   # que los hijos no hereden la conexión del padre
+            ctx = get_context("fork")
+            pool = ctx.Pool(jobs, initializer=_iniciar_worker)
+            resultados = pool.imap_unordered(_cargar, trabajos)
+        try:
+            for nombre, dt, error in resultados:
+                tiempos.append((nombre, dt, error is None))
+                if error is None:
+                    done += 1
+                    self.stdout.write(self.style.SUCCESS(f"OK  {nombre} ({dt:.1f}s)"))
+                else:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f"FAIL {nombre}: {error}"))
+        finally:
+            if jobs > 1:
+                pool.close()
+                pool.join()
+        t_cargas = time.perf_counter() - t0
+
+        # --- etapas derivadas, en orden de dependencias ---
+        t1 = time.perf_counter()
+        corridas = set()
+        for etiqueta in orden_derivadas():
+            comando, capas, previas = DERIVADAS[etiqueta]
+            cambio = any(dataset_version.version(c) != antes.get(c) for c in capas)
+            if not (cambio or opts["overwrite"] or corridas.intersection(previas)):
+                self.stdout.write(f"--  {etiqueta} (sin cambios en {', '.join(capas)})")
+                continue
+            t = time.perf_counter()
             try:
-                call_command("load_geojson", str(path), "--type", tipo, verbosity=0)
-                self.stdout.write(self.style.SUCCESS(f"OK  {path.name}"))
-                done += 1
+                call_command(comando, verbosity=0, stdout=StringIO())
+                corridas.add(etiqueta)
+                dt = time.perf_counter() - t
+                tiempos.append((etiqueta, dt, True))
+                self.stdout.write(self.style.SUCCESS(f"OK  {etiqueta} ({dt:.1f}s)"))
             except Exception as e:
                 failed += 1
-                self.stderr.write(self.style.ERROR(f"FAIL {path.name}: {e!s}"))
+                tiempos.append((etiqueta, time.perf_counter() - t, False))
+                self.stderr.write(self.style.ERROR(f"FAIL {etiqueta}: {e!s}"))
+        t_derivadas = time.perf_counter() - t1
 
-        # resumen
+        # resumen: tiempo por etapa y total de pared
+        if tiempos:
+            ancho = max(len(n) for n, _dt, _ok in tiempos)
+            self.stdout.write("Tiempos:")
+            for nombre, dt, ok in tiempos:
+                self.stdout.write(f"  {nombre:<{ancho}}  {dt:8.1f}s{'' if ok else '  (falló)'}")
+            self.stdout.write(f"  cargas: {t_cargas:.1f}s con {jobs} proceso(s) "
+                              f"(suma {sum(dt for n, dt, _ok in tiempos[:len(trabajos)]):.1f}s) | "
+                              f"derivadas: {t_derivadas:.1f}s")
         self.stdout.write(self.style.SUCCESS(f"Listo: {done} ✓ | Fail: {failed}"))
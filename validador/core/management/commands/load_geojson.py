@@ -2,9 +2,18 @@ from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from django.contrib.gis.gdal import DataSource, GDALException
 from django.contrib.gis.geos import GEOSGeometry, MultiLineString, MultiPolygon, Point
-from validador.core.models import Street, BlockGrid, Building, Parcel
+from django.db import transaction
+from django.db.models import Q
+from validador.core.models import Street, BlockGrid, Building, Parcel, LayerManifest
+from validador.core.services.dataset_version import bump
+from validador.core.services.geojson_stream import iter_features
+from validador.core.signals import carga_masiva
+from validacion.parser import codigo_catastral, normalizar_via
+from collections import defaultdict
 from pathlib import Path
+import hashlib
 import json
+import time
 from django.apps import apps
 
 
@@ -61,240 +70,349 @@ def to_multi(geom: GEOSGeometry, expected: str) -> GEOSGeometry:
             return MultiPolygon(geom)
     return geom  # para Point u otros
 
+def _features_json(path: Path):
+    # iter_features falla recién al llegar al problema (sin 'features', lista
+    # sin cerrar, JSON cortado): mismo CommandError que antes de leer en streaming
+    try:
+        yield from iter_features(path)
+    except ValueError as e:
+        raise CommandError(f"{path.name}: {e}. Usá los archivos 'pretty' o convertilo a GeoJSON válido.")
+
 def read_features(path: Path):
-    """Devuelve (features_iterable, mode) donde mode ∈ {'gdal','json'}"""
+    """
+    Devuelve (features_iterable, mode) donde mode ∈ {'gdal','json'}.
+    Los .json/.geojson se leen en streaming (feature a feature); el resto
+    (shapefile, gpkg, ...) por GDAL, que también itera la capa sin copiarla.
+    """
+    if path.suffix.lower() in (".json", ".geojson"):
+        return _features_json(path), 'json'
     try:
         ds = DataSource(str(path))
         return ds[0], 'gdal'
-    except GDALException:
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "features" not in data:
-            raise CommandError("El JSON no contiene 'features'. Usá los archivos 'pretty' o conviértelo a GeoJSON válido.")
-        return data["features"], 'json'
+    except GDALException as e:
+        raise CommandError(f"No se pudo abrir {path.name}: {e}")
+
+# --- Constructores de filas: feature (props + geom) -> instancia sin guardar ---
+
+def fila_via(kind, preferred, fuzzy_terms):
+    def build(props, g, fid, warn):
+        name = pick_value(props, preferred=preferred, fuzzy_terms=fuzzy_terms) or "sin_nombre"
+        if name == "sin_nombre":
+            warn(f"[{kind}] Feature sin nombre. Claves disponibles: {list(props.keys())[:15]}...")
+        return Street(
+            name=name.strip() if isinstance(name, str) else name,
+            kind=kind,
+            geom=to_multi(g, "MultiLineString"),
+        )
+    return build
+
+def fila_edificio(props, g, fid, warn):
+    barrio   = pick_value(props, ["BARRIO","barrio"], ["barr"])
+    chacra   = pick_value(props, ["CHACRA","chacra","CH","Ch"], ["chac"])
+    manzana  = pick_value(props, ["MANZANA","manzana","MZ","Mzna","Manz"], ["manz","mz"])
+    numero   = pick_value(props, ["NUMERO","numero","NRO","nro","NUM","num"], ["num"])
+    letra    = pick_value(props, ["LETRA","letra","Letra"], ["letr"])
+    escalera = pick_value(props, ["ESCALERA","escalera","Esc","ESC"], ["escal"])
+
+    # Normalizamos a Point (puede venir Point, Polygon, MultiPolygon, MultiPoint…)
+    if g.geom_type == "Point":
+        pass
+    elif g.geom_type in ("Polygon", "MultiPolygon"):
+        g = g.centroid  # tomamos centroide de la planta
+    elif g.geom_type == "MultiPoint":
+        g = g[0]  # primer punto
+    else:
+        # último recurso: centroide de lo que sea
+        g = g.centroid
+    if not (chacra or manzana):
+        warn(f"[chacra] Claves disponibles: {list(props.keys())[:20]}")
+
+    return Building(
+        barrio=(barrio or "").strip() or None,
+        chacra=(chacra or "").strip() or None,
+        manzana=(manzana or "").strip() or None,
+        numero=(numero or "").strip() or None,
+        letra=(letra or "").strip() or None,
+        escalera=(escalera or "").strip() or None,
+        geom=g,
+    )
+
+def fila_chacra(props, g, fid, warn):
+    # Muchos datasets de chacras NO traen propiedades. Probamos y si no hay, usamos el FID.
+    chacra = pick_value(props, ["CHACRA","chacra","NUM_CHACRA","NUMCHACRA"], ["chac"])
+    barrio = pick_value(props, ["BARRIO","barrio"], ["barr"])
+    if not chacra:
+        # Fallback seguro: usar FID como identificador de chacra
+        chacra = fid or props.get("id") or props.get("ID")
+        chacra = str(chacra) if chacra is not None else None
+    return BlockGrid(
+        barrio=(barrio or "").strip() or None,
+        chacra=(chacra or "").strip() or None,
+        manzana=None,   # no corresponde en esta capa
+        geom=to_multi(g, "MultiPolygon"),
+    )
+
+def fila_manzanero(props, g, fid, warn):
+    barrio  = pick_value(props, ["BARRIO","barrio"], ["barr"])
+    chacra  = pick_value(props, ["CHACRA","chacra","CH","Ch"], ["chac"])
+    manzana = pick_value(props, ["MANZANA","manzana","MZ","Mzna","Manz"], ["manz","mz"])
+    return BlockGrid(
+        barrio=(barrio or "").strip() or None,
+        chacra=(chacra or "").strip() or None,
+        manzana=(manzana or "").strip() or None,
+        geom=to_multi(g, "MultiPolygon"),
+    )
+
+def fila_parcela(props, g, fid, warn):
+    gid = props.get("IDGIS")
+    if not gid:
+        warn(f"[cuadricula] Feature sin IDGIS, se omite. Claves: {list(props.keys())[:15]}")
+        return None
+    return Parcel(
+        gid=str(gid),
+        district=codigo_catastral(props.get("DISTRITO")) or None,
+        section=codigo_catastral(props.get("SEC") or props.get("SECCION")) or None,
+        block=codigo_catastral(props.get("MAN")) or None,
+        chacra=codigo_catastral(props.get("CHA")) or None,
+        lot=codigo_catastral(props.get("LOTE")) or None,
+        parcel=codigo_catastral(props.get("PAR")) or None,
+        unit=codigo_catastral(props.get("UNFU")) or None,
+        geom=to_multi(g, "MultiPolygon"),
+    )
+
+# tipo -> (constructor, modelo, capa versionada)
+TIPOS = {
+    "calle":      (fila_via("calle", ["CALLE", "NOM_CALLE", "Nombre", "name", "NOMBRE"],
+                            ["calle", "nom_calle", "nombre"]), Street, "street"),
+    "avenida":    (fila_via("avenida", ["AVENIDA", "AVENIDAS", "Nombre", "name", "NOMBRE"],
+                            ["avenid", "nombre"]), Street, "street"),
+    "edificio":   (fila_edificio, Building, "building"),
+    "chacra":     (fila_chacra, BlockGrid, "blockgrid"),
+    "manzanero":  (fila_manzanero, BlockGrid, "blockgrid"),
+    "cuadricula": (fila_parcela, Parcel, "parcel"),
+}
+
+# Filas cargadas antes de guardar la identidad del feature (source_layer vacío)
+# que corresponden a cada tipo: se reemplazan en la primera recarga, y los
+# aliases de las calles pasan a sus reemplazos (heredar_aliases).
+LEGADO = {
+    "calle":     Q(kind="calle"),
+    "avenida":   Q(kind="avenida"),
+    "edificio":  Q(),
+    "chacra":    Q(manzana__isnull=True),
+    "manzanero": Q(manzana__isnull=False),
+}
+
+# Columnas que no vienen del archivo sino de pasos posteriores (build_monoblock_zones):
+# un upsert no las pisa, las recalcula ese paso.
+DERIVADOS = {"zona_monoblock"}
+# Columnas que carga el admin y ningún archivo trae (fila_via no arma aliases):
+# un upsert tampoco las pisa
+EDITADOS = {"aliases"}
+
+def heredar_aliases(tipo: str) -> int:
+    """
+    Antes de borrar las calles sin identidad (LEGADO) de `tipo`, pasa sus
+    aliases del admin a las filas con identidad que las reemplazan: las de
+    igual geometría o, si no hay, las de igual nombre (normalizar_via).
+    Devuelve cuántas filas recibieron aliases.
+    """
+    if TIPOS[tipo][1] is not Street:
+        return 0
+    viejas = list(Street.objects.filter(LEGADO[tipo], source_layer="").exclude(aliases=[]))
+    if not viejas:
+        return 0
+    nuevas = {s.pk: s for s in Street.objects.filter(source_layer=tipo).only("pk", "name", "aliases")}
+    por_nombre = defaultdict(list)
+    for s in nuevas.values():
+        por_nombre[normalizar_via(s.name)].append(s)
+
+    cambiadas = {}
+    for v in viejas:
+        iguales = Street.objects.filter(source_layer=tipo, geom__equals=v.geom).values_list("pk", flat=True)
+        destino = [nuevas[pk] for pk in iguales if pk in nuevas] or por_nombre.get(normalizar_via(v.name), [])
+        for s in destino:
+            extra = [a for a in v.aliases if a not in s.aliases]
+            if extra:
+                s.aliases = [*s.aliases, *extra]
+                cambiadas[s.pk] = s
+    Street.objects.bulk_update(list(cambiadas.values()), ["aliases"], batch_size=500)
+    return len(cambiadas)
+
+def sha256_archivo(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def hash_feature(props: dict, geom_key) -> str:
+    """Hash del contenido (propiedades + geometría) para detectar cambios."""
+    data = json.dumps([props, geom_key], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+def source_id_de(props: dict, feature_id, fid):
+    """Identidad estable del feature: IDGIS, id del feature, o fid/id de las propiedades."""
+    for v in (props.get("IDGIS"), feature_id, fid, props.get("id"), props.get("ID")):
+        if v not in (None, ""):
+            return str(v)[:64]
+    return None
 
 class Command(BaseCommand):
-    help = "Carga archivos GeoJSON/JSON (calles, avenidas, chacras, edificios)"
-    def props_of(feat):
-        # Caso GeoJSON (feat es un dict con 'properties')
-        if isinstance(feat, dict):
-            return feat.get("properties", {}) or {}
-
-        # Caso GDAL (feat es un OGRFeature)
-        names = getattr(feat, "fields", None)
-        if names:
-            try:
-                # names suele ser lista de nombres; get(name) da el valor
-                return {name: feat.get(name) for name in names}
-            except Exception:
-                pass
-
-        # Fallback: si por algún motivo vino lista/tupla, la convertimos a dict índice->valor
-        if isinstance(feat, (list, tuple)):
-            return {str(i): v for i, v in enumerate(feat)}
-
-        return {}
-    
+    help = ("Carga archivos GeoJSON/JSON (calles, avenidas, chacras, edificios). Incremental: "
+            "solo inserta, actualiza o borra los features que cambiaron")
+
     def add_arguments(self, parser):
         parser.add_argument("path", type=str, help="Ruta al archivo (relativa o absoluta)")
-        parser.add_argument("--type", choices=["calle", "avenida", "chacra", "edificio", "manzanero", "cuadricula"], help="Tipo de datos a importar")
-
+        parser.add_argument("--type", choices=list(TIPOS), help="Tipo de datos a importar")
+        parser.add_argument("--batch-size", type=int, default=2000,
+                            help="Filas por bulk_create (default 2000)")
+        parser.add_argument("--progress", type=int, default=10000,
+                            help="Informar avance cada N features (0 = sólo al final)")
+        parser.add_argument("--full", action="store_true",
+                            help="Reescribir todos los features aunque el archivo o su contenido no hayan cambiado")
 
     def handle(self, *args, **opts):
         raw = opts["path"]
         tipo = opts["type"]
+        if tipo not in TIPOS:
+            raise CommandError("Indicá --type")
 
         p = Path(raw)
-        #p = Path(options['path'])
         if not p.is_absolute():
             p = (Path(settings.ROOT_DIR) / p).resolve()
 
-# (opcional) mostrar la ruta final para confirmar
+        # (opcional) mostrar la ruta final para confirmar
         self.stdout.write(self.style.NOTICE(f"Ruta resuelta: {p}"))
 
         if not p.exists():
             raise CommandError(f"No existe el archivo: {p}")
 
-        layer, mode = read_features(p)
-        self.stdout.write(self.style.NOTICE(f"Leyendo {p.name} vía {mode.upper()}"))
+        # 1) Archivo idéntico al último cargado para este tipo: nada que hacer
+        sha = sha256_archivo(p)
+        manifiesto = LayerManifest.objects.filter(source_layer=tipo).first()
+        if manifiesto and manifiesto.sha256 == sha and not opts["full"]:
+            self.stdout.write(self.style.SUCCESS(f"[{tipo}] {p.name} sin cambios, se saltea"))
+            return
 
-        inserted = 0
-        total = len(layer)
+        feats, mode = read_features(p)
+        self.stdout.write(self.style.NOTICE(f"Leyendo {p.name} vía {mode.upper()}"))
 
         if mode == 'gdal':
-            feats = layer
-            def props_of(f): return f.fields
+            props_of = props_dict_gdal
             def geom_of(f):
                 g = f.geom.geos
                 if g.srid is None:
                     g.srid = 4326
                 return g
+            def geom_key(f): return f.geom.wkt
+            def fid_of(f): return getattr(f, "fid", None)
+            def id_of(f): return None
         else:
-            feats = layer
-            def props_of(f): return f.get("properties", {})
+            def props_of(f):
+                props = f.get("properties") or {}
+                return props if isinstance(props, dict) else {}
             def geom_of(f):
-                g = GEOSGeometry(json.dumps(f.get("geometry")), srid=4326)
-                if g.srid is None: g.srid = 4326
-                return g
-
-        if tipo == "calle":
-            for f in feats:
-                if mode == "gdal":
-                    props = props_dict_gdal(f)
-                else:
-                    props = props_of(f)
-
-                name = pick_value(
-                    props,
-                    preferred=["CALLE", "NOM_CALLE", "Nombre", "name", "NOMBRE"],
-                    fuzzy_terms=["calle", "nom_calle", "nombre"]
-                ) or "sin_nombre"
-
-                if name == "sin_nombre":
-                    self.stdout.write(self.style.WARNING(f"[{tipo}] Feature sin nombre. Claves disponibles: {list(props.keys())[:15]}..."))
-
-                g = geom_of(f)
-                Street.objects.create(
-                    name=name.strip() if isinstance(name, str) else name,
-                    kind="calle",
-                    geom=to_multi(g, "MultiLineString"),
-                )
-
-        elif tipo == "avenida":
-            for f in feats:
-                if mode == "gdal":
-                    props = props_dict_gdal(f)
-                else:
-                    props = props_of(f)
-
-                name = pick_value(
-                    props,
-                    preferred=["AVENIDA", "AVENIDAS", "Nombre", "name", "NOMBRE"],
-                    fuzzy_terms=["avenid", "nombre"]
-                ) or "sin_nombre"
-
-                if name == "sin_nombre":
-                    self.stdout.write(self.style.WARNING(f"[{tipo}] Feature sin nombre. Claves disponibles: {list(props.keys())[:15]}..."))
-
-                g = geom_of(f)
-                Street.objects.create(
-                    name=name.strip() if isinstance(name, str) else name,
-                    kind="avenida",
-                    geom=to_multi(g, "MultiLineString"),
-                )
-
-        elif tipo == "edificio":
-            for f in feats:
-                props = props_dict_gdal(f) if mode == "gdal" else props_of(f)
-
-                barrio   = pick_value(props, ["BARRIO","barrio"], ["barr"])
-                chacra   = pick_value(props, ["CHACRA","chacra","CH","Ch"], ["chac"])
-                manzana  = pick_value(props, ["MANZANA","manzana","MZ","Mzna","Manz"], ["manz","mz"])
-                numero   = pick_value(props, ["NUMERO","numero","NRO","nro","NUM","num"], ["num"])
-                letra    = pick_value(props, ["LETRA","letra","Letra"], ["letr"])
-                escalera = pick_value(props, ["ESCALERA","escalera","Esc","ESC"], ["escal"])
-
-                g = geom_of(f)  # puede ser Point, Polygon, MultiPolygon, MultiPoint…
-
-                # Normalizamos a Point:
-                if g.geom_type == "Point":
-                    pass
-                elif g.geom_type in ("Polygon", "MultiPolygon"):
-                    g = g.centroid  # tomamos centroide de la planta
-                elif g.geom_type == "MultiPoint":
-                    g = list(g)[0]  # primer punto
-                else:
-                    # último recurso: centroide de lo que sea
-                    g = g.centroid
-                if not (chacra or manzana):
-                    self.stdout.write(self.style.WARNING(f"[chacra] Claves disponibles: {list(props.keys())[:20]}"))
-
-                Building.objects.create(
-                    barrio=(barrio or "").strip() or None,
-                    chacra=(chacra or "").strip() or None,
-                    manzana=(manzana or "").strip() or None,
-                    numero=(numero or "").strip() or None,
-                    letra=(letra or "").strip() or None,
-                    escalera=(escalera or "").strip() or None,
-                    geom=g,
-                )        
-
-        elif tipo == "chacra":
-            for f in feats:
-                props = props_dict_gdal(f) if mode == "gdal" else props_of(f)
-
-                # Muchos datasets de chacras NO traen propiedades. Probamos y si no hay, usamos el FID.
-                chacra = pick_value(props, ["CHACRA","chacra","NUM_CHACRA","NUMCHACRA"], ["chac"])
-                manzana = None   # no corresponde en esta capa
-                barrio  = pick_value(props, ["BARRIO","barrio"], ["barr"])
-
-                if not chacra:
-                    # Fallback seguro: usar FID como identificador de chacra
-                    try:
-                        chacra = str(getattr(f, "fid", None) or props.get("id") or props.get("ID"))
-                    except Exception:
-                        chacra = None  # si ni eso, queda null (igual guardamos el polígono)
-
-                g = geom_of(f)
-                g = to_multi(g, "MultiPolygon")
-
-                BlockGrid.objects.create(
-                    barrio=(barrio or "").strip() or None,
-                    chacra=(chacra or "").strip() or None,
-                    manzana=manzana,
-                    geom=g,
-                )
-
-        elif tipo == "manzanero":
-            for f in feats:
-                props = props_dict_gdal(f) if mode == "gdal" else props_of(f)
-
-                barrio  = pick_value(props, ["BARRIO","barrio"], ["barr"])
-                chacra  = pick_value(props, ["CHACRA","chacra","CH","Ch"], ["chac"])
-                manzana = pick_value(props, ["MANZANA","manzana","MZ","Mzna","Manz"], ["manz","mz"])
-
-                g = geom_of(f)
-                g = to_multi(g, "MultiPolygon")
-
-                BlockGrid.objects.create(
-                    barrio=(barrio or "").strip() or None,
-                    chacra=(chacra or "").strip() or None,
-                    manzana=(manzana or "").strip() or None,
-                    geom=g,
+                return GEOSGeometry(json.dumps(f.get("geometry")), srid=4326)
+            def geom_key(f): return f.get("geometry")
+            def fid_of(f): return (f.get("properties") or {}).get("fid")
+            def id_of(f): return f.get("id")
+
+        build, model, capa = TIPOS[tipo]
+        warn = lambda msg: self.stdout.write(self.style.WARNING(msg))
+        batch_size = max(1, opts["batch_size"])
+        progress = opts["progress"]
+
+        # 2) Estado actual de la capa: identidad -> (pk, hash)
+        if model is Parcel:
+            ident, unicos, existentes_qs = "gid", ["gid"], Parcel.objects.all()
+        else:
+            ident, unicos = "source_id", ["source_layer", "source_id"]
+            existentes_qs = model.objects.filter(source_layer=tipo)
+        existentes = {sid: (pk, h) for sid, pk, h in existentes_qs.values_list(ident, "pk", "content_hash")}
+        update_fields = [f.name for f in model._meta.concrete_fields
+                         if not f.primary_key and f.name not in unicos and f.name not in DERIVADOS | EDITADOS]
+
+        leidos = insertados = actualizados = iguales = 0
+        vistos = set()
+        aceptados = set()   # sids con algún feature válido (guardado o sin cambios)
+        buffer = {}
+        t0 = time.perf_counter()
+
+        def flush():
+            nonlocal buffer
+            if buffer:
+                # ON CONFLICT (identidad) DO UPDATE; dentro de un lote gana el último feature
+                model.objects.bulk_create(
+                    list(buffer.values()), batch_size=batch_size,
+                    update_conflicts=True, unique_fields=unicos, update_fields=update_fields,
                 )
+                buffer = {}
 
-        elif tipo == "cuadricula":
-            ok = 0
+        # carga_masiva: los delete() de abajo disparan post_delete por fila; la
+        # versión se incrementa una sola vez al final
+        with transaction.atomic(), carga_masiva():
             for f in feats:
-                # Propiedades: soporta GDAL (f.get) y JSON (dict)
-                if hasattr(f, "get") and hasattr(f, "fields"):
-                    # GDAL feature
-                    props = {k: f.get(k) for k in f.fields}
+                leidos += 1
+                props = props_of(f)
+                h = hash_feature(props, geom_key(f))
+                sid = source_id_de(props, id_of(f), fid_of(f)) or h   # sin id: el contenido es la identidad
+                if sid in vistos:
+                    warn(f"[{tipo}] id repetido {sid!r}: gana el último")
+                vistos.add(sid)
+
+                previo = existentes.get(sid)
+                if previo and previo[1] == h and not opts["full"]:
+                    iguales += 1          # sin cambios: ni se parsea la geometría
+                    aceptados.add(sid)
                 else:
-                    # JSON feature: dict con 'properties'
-                    props = props_of(f)  # tu helper que hace f.get("properties", {})
-                    if not isinstance(props, dict):
-                        props = {}
-
-                g = geom_of(f)  # ya te devuelve GEOSGeometry con SRID=4326
-
-                Parcel.objects.update_or_create(
-                    gid=props.get("IDGIS"),
-                    defaults={
-                        "district": props.get("DISTRITO"),
-                        "block":    props.get("MAN"),
-                        "chacra":   props.get("CHA"),
-                        "lot":      props.get("LOTE"),
-                        "parcel":   props.get("PAR"),
-                        "unit":     props.get("UNFU"),
-                        "geom":     g,
-                    },
-                )
-                ok += 1
-
-            self.stdout.write(self.style.SUCCESS(f"Cuadrícula importada: {ok} filas"))
-
-
-
-
-
+                    obj = build(props, geom_of(f), fid_of(f), warn)
+                    if obj is None:
+                        # sin fila: que se borre la existente, salvo que un
+                        # feature anterior con el mismo id ya la haya guardado
+                        if sid not in aceptados:
+                            vistos.discard(sid)
+                    else:
+                        aceptados.add(sid)
+                        if model is not Parcel:
+                            obj.source_layer, obj.source_id = tipo, sid
+                        obj.content_hash = h
+                        buffer[getattr(obj, ident)] = obj
+                        if previo:
+                            actualizados += 1
+                        else:
+                            insertados += 1
+                if len(buffer) >= batch_size:
+                    flush()
+                if progress and leidos % progress == 0:
+                    self._avance(leidos, t0)
+            flush()
+
+            # 3) Lo que ya no está en el archivo (y las filas sin identidad de cargas viejas)
+            borrar = [pk for sid, (pk, _h) in existentes.items() if sid not in vistos]
+            for i in range(0, len(borrar), batch_size):
+                model.objects.filter(pk__in=borrar[i:i + batch_size]).delete()
+            borrados = len(borrar)
+            if tipo in LEGADO:
+                heredados = heredar_aliases(tipo)
+                if heredados:
+                    self.stdout.write(self.style.NOTICE(f"[{tipo}] aliases heredados por {heredados} filas"))
+                borrados += model.objects.filter(LEGADO[tipo], source_layer="").delete()[0]
+
+            if insertados or actualizados or borrados:
+                bump(capa)
+            LayerManifest.objects.update_or_create(source_layer=tipo, defaults={
+                "path": str(p)[-255:], "sha256": sha, "size": p.stat().st_size, "features": leidos,
+                "inserted": insertados, "updated": actualizados, "deleted": borrados,
+            })
+
+        dt = time.perf_counter() - t0
+        self.stdout.write(self.style.SUCCESS(
+            f"[{tipo}] {leidos} features: {insertados} nuevos, {actualizados} actualizados, "
+            f"{borrados} borrados, {iguales} sin cambios en {dt:.1f}s "
+            f"({leidos / dt if dt else 0:.0f} features/s)"
+        ))
+
+    def _avance(self, n, t0):
+        dt = time.perf_counter() - t0
+        self.stdout.write(f"  … {n} features ({n / dt if dt else 0:.0f} features/s)")
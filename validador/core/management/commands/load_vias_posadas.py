@@ -2,12 +2,24 @@
 Comando especializado para cargar calles y avenidas de Posadas
 a partir de los GeoJSON oficiales (IDE Posadas 2025).
 Usa clean_name() para extraer el nombre limpio sin número ni prefijo.
+Cada fila lleva la misma identidad que le daría load_geojson (source_layer
+'avenida'/'calle', source_id, content_hash): recargar actualiza en lugar de
+duplicar, y las filas viejas sin identidad se reemplazan conservando los
+aliases cargados en el admin.
 """
 
 
 from django.core.management.base import BaseCommand
 from django.contrib.gis.geos import GEOSGeometry, MultiLineString
-from validador.core.models import Street
+from django.db import transaction
+from validador.core.management.commands.load_geojson import (
+    DERIVADOS, EDITADOS, LEGADO, hash_feature, heredar_aliases, source_id_de,
+)
+from validador.core.models import LayerManifest, Street
+from validador.core.services.dataset_version import bump
+from validador.core.signals import carga_masiva
+from validador.core.services.intersections import construir as construir_esquinas
+from validador.core.services.linear_ref import construir as construir_ejes
 import json, re
 
 def load_geojson(path):
@@ -27,6 +39,16 @@ def to_mls(geom):
         return MultiLineString(geom)
     return geom
 
+def fila(kind, feat, name, geom):
+    """Street sin guardar, con la identidad del feature como en load_geojson."""
+    props = feat.get("properties") or {}
+    h = hash_feature(props, feat.get("geometry"))
+    return Street(
+        kind=kind, name=name, aliases=[], geom=to_mls(geom),
+        source_layer=kind, source_id=source_id_de(props, feat.get("id"), props.get("fid")) or h,
+        content_hash=h,
+    )
+
 class Command(BaseCommand):
     help = "Carga avenidas y calles de Posadas en core_street"
 
@@ -38,6 +60,9 @@ class Command(BaseCommand):
         av = load_geojson(opts["avenidas"])
         ca = load_geojson(opts["calles"])
 
+        # bulk_create no dispara las señales de Street (y los delete() van en
+        # carga_masiva): la versión se incrementa una vez al final
+        filas = {}   # (source_layer, source_id) -> Street; si se repite gana el último
         n_av = n_ca = 0
 
         # Avenidas: campo 'avenidas' (string tipo "AVENIDA ROQUE PEREZ(26)")
@@ -48,7 +73,8 @@ class Command(BaseCommand):
             geom = GEOSGeometry(json.dumps(feat["geometry"]))
             if geom.geom_type not in ("LineString", "MultiLineString"):
                 continue
-            Street.objects.create(kind="avenida", name=name, aliases=[], geom=to_mls(geom))
+            s = fila("avenida", feat, name, geom)
+            filas[s.source_layer, s.source_id] = s
             n_av += 1
 
         # Calles: campo 'CALLE' (string tipo "CALLE JUJUY(49)")
@@ -59,7 +85,30 @@ class Command(BaseCommand):
             geom = GEOSGeometry(json.dumps(feat["geometry"]))
             if geom.geom_type not in ("LineString", "MultiLineString"):
                 continue
-            Street.objects.create(kind="calle", name=name, aliases=[], geom=to_mls(geom))
+            s = fila("calle", feat, name, geom)
+            filas[s.source_layer, s.source_id] = s
             n_ca += 1
 
+        unicos = ["source_layer", "source_id"]
+        update_fields = [f.name for f in Street._meta.concrete_fields
+                         if not f.primary_key and f.name not in unicos and f.name not in DERIVADOS | EDITADOS]
+        with transaction.atomic(), carga_masiva():
+            Street.objects.bulk_create(list(filas.values()), batch_size=2000, update_conflicts=True,
+                                       unique_fields=unicos, update_fields=update_fields)
+            for kind in ("avenida", "calle"):
+                vistos = [sid for capa, sid in filas if capa == kind]
+                Street.objects.filter(source_layer=kind).exclude(source_id__in=vistos).delete()
+                heredar_aliases(kind)
+                Street.objects.filter(LEGADO[kind], source_layer="").delete()
+            # las filas ya no son las del último archivo que cargó load_geojson:
+            # que no saltee estos tipos por su manifiesto
+            LayerManifest.objects.filter(source_layer__in=("avenida", "calle")).delete()
+            bump("street")
+
         self.stdout.write(self.style.SUCCESS(f"Cargadas {n_av} avenidas y {n_ca} calles"))
+
+        n_es = construir_esquinas()
+        self.stdout.write(self.style.SUCCESS(f"Esquinas calculadas: {n_es}"))
+
+        n_ej = construir_ejes()
+        self.stdout.write(self.style.SUCCESS(f"Ejes calculados: {n_ej}"))
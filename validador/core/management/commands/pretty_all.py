@@ -1,7 +1,22 @@
 from django.core.management.base import BaseCommand
 from django.core.management import call_command, CommandError
 from django.conf import settings
+from multiprocessing import get_context
+from io import StringIO
 from pathlib import Path
+import os
+
+
+def _convertir(trabajo):
+    """Corre pretty_geojson para un archivo en un proceso del pool. Devuelve (src, dst, error)."""
+    src, dst, extra = trabajo
+    try:
+        call_command("pretty_geojson", src, "-o", dst, "--drop-null-props", "--sort-keys",
+                     *extra, verbosity=0, stdout=StringIO())
+        return src, dst, None
+    except Exception as e:
+        return src, dst, str(e)
+
 
 class Command(BaseCommand):
     help = "Convierte todos los data/raw/*.json a data/pretty/*_pretty.json usando pretty_geojson."
@@ -12,6 +27,10 @@ class Command(BaseCommand):
             action="store_true",
             help="Sobrescribe archivos existentes en pretty/."
         )
+        parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                            help="Archivos convertidos en paralelo (1 = en serie)")
+        parser.add_argument("--round", type=int, default=None, metavar="N",
+                            help="Redondear coordenadas a N decimales (ver pretty_geojson)")
 
     def handle(self, *args, **opts):
         root = Path(getattr(settings, "ROOT_DIR", settings.BASE_DIR)).resolve()
@@ -27,7 +46,9 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("No hay JSON en data/raw"))
             return
 
+        extra = ["--round", str(opts["round"])] if opts["round"] is not None else []
         done, skipped, failed = 0, 0, 0
+        trabajos = []
         for src in files:
             # nombre destino
             stem = src.stem
@@ -39,20 +60,24 @@ class Command(BaseCommand):
                 skipped += 1
                 self.stdout.write(self.style.NOTICE(f"Skip (existe): {dst.name}"))
                 continue
+            trabajos.append((str(src), str(dst), extra))
 
-            try:
-                call_command(
-                    "pretty_geojson",
-                    str(src),
-                    "-o", str(dst),
-                    "--drop-null-props",
-                    "--sort-keys",
-                    verbosity=0,
-                )
-                done += 1
-                self.stdout.write(self.style.SUCCESS(f"OK  → {dst.name}"))
-            except Exception as e:
-                failed += 1
-                self.stderr.write(self.style.ERROR(f"FAIL {src.name}: {e}"))
+        # cada archivo se procesa en streaming: con N procesos la memoria es
+        # N features a la vez, no N archivos
+        jobs = max(1, min(opts["jobs"], len(trabajos) or 1))
+        pool = get_context("fork").Pool(jobs) if jobs > 1 else None
+        try:
+            resultados = pool.imap_unordered(_convertir, trabajos) if pool else map(_convertir, trabajos)
+            for src, dst, error in resultados:
+                if error is None:
+                    done += 1
+                    self.stdout.write(self.style.SUCCESS(f"OK  → {Path(dst).name}"))
+                else:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f"FAIL {Path(src).name}: {error}"))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
 
         self.stdout.write(self.style.SUCCESS(f"Listo: {done} 👍  | Skip: {skipped} | Fail: {failed}"))
@@ -1,10 +1,12 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from validador.core.services.geojson_stream import reescribir
 from pathlib import Path
-import json
+import os
 
 class Command(BaseCommand):
-    help = "Formatea (pretty) un GeoJSON y lo guarda en data/pretty/"
+    help = ("Formatea (pretty) un GeoJSON y lo guarda en data/pretty/. Procesa feature por feature: "
+            "la memoria no depende del tamaño del archivo")
 
     def add_arguments(self, parser):
         parser.add_argument("input", type=str, help="Ruta al GeoJSON RAW")
@@ -14,6 +16,8 @@ class Command(BaseCommand):
         parser.add_argument("--sort-keys", action="store_true", help="Ordenar claves al serializar")
         parser.add_argument("--drop-null-props", action="store_true",
                             help="Quita propiedades con valor null en cada feature")
+        parser.add_argument("--round", type=int, default=None, metavar="N",
+                            help="Redondear coordenadas a N decimales (6 ≈ 10 cm)")
 
     def handle(self, *args, **opts):
         in_path = Path(opts["input"])
@@ -22,21 +26,6 @@ class Command(BaseCommand):
         if not in_path.exists():
             raise CommandError(f"No existe el archivo: {in_path}")
 
-        # Cargar JSON
-        try:
-            with open(in_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception as e:
-            raise CommandError(f"No se pudo leer JSON: {e}")
-
-        # Opcional: limpiar props null
-        if opts.get("drop_null_props"):
-            feats = data.get("features", [])
-            for feat in feats:
-                props = feat.get("properties")
-                if isinstance(props, dict):
-                    feat["properties"] = {k: v for k, v in props.items() if v is not None}
-
         # Salida por defecto
         out_path = opts.get("output")
         if out_path:
@@ -49,14 +38,19 @@ class Command(BaseCommand):
             base = in_path.stem + "_pretty.json"
             out_path = out_dir / base
 
-        # Escribir pretty
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(
-                data,
-                f,
-                ensure_ascii=False,
-                indent=opts.get("indent", 2),
-                sort_keys=opts.get("sort_keys", False),
-            )
+        # Escribir pretty, feature por feature, a un temporal (no deja salidas a medias)
+        tmp = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
+        try:
+            n = reescribir(in_path, tmp, indent=opts.get("indent", 2),
+                           sort_keys=opts.get("sort_keys", False),
+                           drop_null_props=opts.get("drop_null_props", False),
+                           digitos=opts.get("round"))
+        except (ValueError, UnicodeDecodeError) as e:
+            tmp.unlink(missing_ok=True)
+            raise CommandError(f"No se pudo leer JSON: {e}")
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        os.replace(tmp, out_path)
 
-        self.stdout.write(self.style.SUCCESS(f"Escrito: {out_path}"))
+        self.stdout.write(self.style.SUCCESS(f"Escrito: {out_path} ({n} features)"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from validador.core.services import querylog_partitions as qp
+from pathlib import Path
+
+class Command(BaseCommand):
+    help = ("Crea las particiones mensuales próximas de core_querylog y archiva (NDJSON.gz) "
+            "y borra las que quedaron fuera de la retención")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=None,
+                            help="Meses a crear por delante del actual (default: QUERYLOG_PARTITIONS['AHEAD'])")
+        parser.add_argument("--retain", type=int, default=None,
+                            help="Meses a conservar; 0 = no archivar (default: QUERYLOG_PARTITIONS['RETENTION_MONTHS'])")
+        parser.add_argument("--archive-dir", help="Directorio de los .ndjson.gz (default: QUERYLOG_PARTITIONS['ARCHIVE_DIR'])")
+        parser.add_argument("--dry-run", action="store_true", help="Mostrar qué haría sin tocar nada")
+
+    def handle(self, *args, **opts):
+        if not qp.particionada():
+            raise CommandError("core_querylog no está particionada (falta la migración 0016)")
+
+        vencidas = qp.vencidas(meses=opts["retain"])
+        if opts["dry_run"]:
+            existentes = qp.particiones()
+            self.stdout.write(f"Particiones: {', '.join(f'{m:%Y-%m}' for m in existentes) or '-'}")
+            self.stdout.write(f"A archivar: {', '.join(f'{m:%Y-%m}' for m in vencidas) or '-'}")
+            return
+
+        for nombre in qp.asegurar(adelante=opts["ahead"]):
+            self.stdout.write(self.style.SUCCESS(f"Creada {nombre}"))
+
+        destino = Path(opts["archive_dir"]) if opts["archive_dir"] else None
+        for mes in vencidas:
+            ruta, n = qp.archivar(mes, destino)
+            self.stdout.write(self.style.SUCCESS(f"Archivado {mes:%Y-%m}: {n} filas en {ruta}"))
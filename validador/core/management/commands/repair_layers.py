@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from validador.core.services.repairs import reparar
+import time
+
+class Command(BaseCommand):
+    help = "Completa chacra/manzana de manzanas y edificios por overlay espacial (sql/reparación_datos.sql)"
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        res = reparar()
+        detalle = ", ".join(f"{k}: {v}" for k, v in res.items())
+        self.stdout.write(self.style.SUCCESS(f"Reparaciones ({detalle}) en {time.perf_counter() - t0:.1f}s"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from validador.core.services import querylog_partitions, rollups
+from datetime import date, timedelta
+import time
+
+class Command(BaseCommand):
+    help = ("Consolida QueryLog en el resumen diario core_querylogdaily (correr una vez por día). "
+            "Los meses ya archivados por querylog_partitions no se rehacen: --since/--days se "
+            "recortan al primer día que sigue en la base")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat,
+                            help="Rehacer desde este día (yyyy-mm-dd) hasta ayer")
+        parser.add_argument("--days", type=int, default=0,
+                            help="Rehacer los últimos N días cerrados")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        hoy = timezone.localdate()
+        desde = opts["since"] or (hoy - timedelta(days=opts["days"]) if opts["days"] else None)
+        if desde is not None:
+            primero = querylog_partitions.primer_dia()
+            if primero is not None and desde < primero:
+                self.stdout.write(self.style.WARNING(
+                    f"Antes de {primero} QueryLog está archivado: se conserva su resumen y se rehace desde ahí"))
+            n = rollups.recalcular(desde, hoy)
+        else:
+            n = rollups.consolidar(hoy)
+        self.stdout.write(self.style.SUCCESS(f"Resumen diario: {n} filas en {time.perf_counter() - t0:.1f}s"))
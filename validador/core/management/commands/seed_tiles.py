@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from validador.core.services import tiles
+import time
+
+class Command(BaseCommand):
+    help = "Pre-genera la caché en disco de vector tiles (/tiles/<capa>/<z>/<x>/<y>.mvt) para un bbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--layers", default=",".join(tiles.CAPAS),
+                            help=f"Capas separadas por coma ({', '.join(tiles.CAPAS)})")
+        parser.add_argument("--minzoom", type=int, default=11)
+        parser.add_argument("--maxzoom", type=int, default=16)
+        parser.add_argument("--bbox", help="minLon,minLat,maxLon,maxLat (default: HEATMAP_BBOX, Posadas)")
+        parser.add_argument("--prune", action="store_true",
+                            help="Borrar antes las tiles de versiones viejas de cada capa")
+
+    def handle(self, *args, **opts):
+        capas = [c.strip() for c in opts["layers"].split(",") if c.strip()]
+        desconocidas = [c for c in capas if c not in tiles.CAPAS]
+        if desconocidas:
+            raise CommandError(f"Capas desconocidas: {', '.join(desconocidas)}")
+        try:
+            bbox = (tuple(float(v) for v in opts["bbox"].split(",")) if opts["bbox"]
+                    else settings.HEATMAP_BBOX)
+        except ValueError:
+            raise CommandError("--bbox debe ser minLon,minLat,maxLon,maxLat")
+
+        for capa in capas:
+            if opts["prune"]:
+                n = tiles.podar(capa)
+                if n:
+                    self.stdout.write(f"{capa}: {n} versiones viejas borradas")
+            t0 = time.perf_counter()
+            total = bytes_ = 0
+            desde = max(opts["minzoom"], tiles.CAPAS[capa]["minzoom"])
+            hasta = min(opts["maxzoom"], tiles.max_zoom())
+            for z in range(desde, hasta + 1):
+                for x, y in tiles.tiles_bbox(bbox, z):
+                    bytes_ += len(tiles.obtener(capa, z, x, y))
+                    total += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"{capa}: {total} tiles z{desde}-{hasta} "
+                f"({bytes_ / 1024:.0f} KB) en {time.perf_counter() - t0:.1f}s"))
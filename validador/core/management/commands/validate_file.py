@@ -0,0 +1,197 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from validacion.services import validar_lote, aplanar
+from validador.core.services import spatial_index, street_index
+from multiprocessing import get_context
+from pathlib import Path
+from collections import deque
+from itertools import islice
+import csv
+import json
+import os
+import time
+
+COLUMNAS_TEXTO = ("direccion", "dirección", "domicilio", "address", "input")
+COLUMNAS_SALIDA = ("status", "precision", "street", "street2", "altura",
+                   "chacra", "manzana", "lon", "lat", "score")
+
+# --- lado worker ---
+
+def _iniciar_worker():
+    # cada proceso abre su propia conexión y arma sus índices en memoria
+    # (el espacial solo si hay snapshot vigente)
+    connections.close_all()
+    street_index.indice()
+    spatial_index.indice()
+
+def _validar_bloque(bloque):
+    n, textos = bloque
+    return n, [aplanar(r) for r in validar_lote(textos)]
+
+# --- lectura ---
+
+def leer_filas(path: Path, formato: str, columna: str | None):
+    """Itera (fila_original, texto). CSV -> dict por fila; NDJSON -> objeto o string por línea."""
+    with path.open(encoding="utf-8", newline="") as f:
+        if formato == "csv":
+            reader = csv.DictReader(f)
+            campos = reader.fieldnames or []
+            if columna is None:
+                columna = next((c for c in campos if c.strip().lower() in COLUMNAS_TEXTO),
+                               campos[0] if campos else None)
+            if columna not in campos:
+                raise CommandError(f"No existe la columna {columna!r} (hay: {', '.join(campos)})")
+            for fila in reader:
+                yield fila, (fila.get(columna) or "").strip()
+        else:
+            for linea in f:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                obj = json.loads(linea)
+                texto = obj.get(columna or "input") if isinstance(obj, dict) else obj
+                yield obj, (str(texto) if texto is not None else "").strip()
+
+def en_bloques(filas, tam):
+    it = iter(filas)
+    while True:
+        bloque = list(islice(it, tam))
+        if not bloque:
+            return
+        yield bloque
+
+# --- checkpoint ---
+
+def leer_checkpoint(path: Path):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+def guardar_checkpoint(path: Path, data: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)   # atómico: nunca queda un checkpoint a medias
+
+
+class Command(BaseCommand):
+    help = ("Valida un archivo CSV/NDJSON de direcciones con un pool de procesos y escribe "
+            "la salida enriquecida (status, calle, chacra/manzana, lon/lat, score). Reanudable.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=str, help="Archivo de entrada (.csv o .ndjson/.jsonl)")
+        parser.add_argument("--out", required=True, help="Archivo de salida (.csv o .ndjson)")
+        parser.add_argument("--column", help="Columna/clave con la dirección (default: autodetectar)")
+        parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                            help="Procesos de validación (1 = en este proceso)")
+        parser.add_argument("--chunk", type=int, default=1000, help="Filas por bloque")
+        parser.add_argument("--restart", action="store_true",
+                            help="Ignorar el checkpoint y empezar de cero")
+
+    def handle(self, *args, **opts):
+        src, dst = Path(opts["path"]), Path(opts["out"])
+        if not src.exists():
+            raise CommandError(f"No existe {src}")
+        fmt_in = "csv" if src.suffix.lower() == ".csv" else "ndjson"
+        fmt_out = "csv" if dst.suffix.lower() == ".csv" else "ndjson"
+        chunk = max(1, opts["chunk"])
+        ckpt_path = dst.with_name(dst.name + ".ckpt")
+
+        # checkpoint: bloques terminados y bytes válidos de la salida
+        firma = {"input": str(src.resolve()), "size": src.stat().st_size,
+                 "mtime": src.stat().st_mtime, "chunk": chunk}
+        ckpt = None if opts["restart"] or not dst.exists() else leer_checkpoint(ckpt_path)
+        if ckpt and any(ckpt.get(k) != v for k, v in firma.items()):
+            raise CommandError(f"{ckpt_path.name} es de otra entrada o de otro --chunk; usá --restart")
+        hechos = ckpt["bloques"] if ckpt else 0
+        filas_ok = ckpt["filas"] if ckpt else 0
+
+        out = dst.open("r+b" if ckpt else "wb")
+        if ckpt:
+            out.truncate(ckpt["bytes"])   # descarta lo escrito después del último checkpoint
+            out.seek(ckpt["bytes"])
+            self.stdout.write(f"Reanudando desde la fila {filas_ok} (bloque {hechos})")
+
+        filas = leer_filas(src, fmt_in, opts["column"])
+        bloques = islice(enumerate(en_bloques(filas, chunk)), hechos, None)
+        pendientes = {}   # n -> filas originales, hasta que vuelve su resultado
+        escritor = {"csv": None}
+
+        def trabajos():
+            for n, bloque in bloques:
+                pendientes[n] = [fila for fila, _t in bloque]
+                yield n, [t for _f, t in bloque]
+
+        def escribir(originales, resultados):
+            if fmt_out == "ndjson":
+                for fila, r in zip(originales, resultados):
+                    obj = dict(fila) if isinstance(fila, dict) else {"input": fila}
+                    obj.update(r)
+                    out.write((json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
+                return
+            for fila, r in zip(originales, resultados):
+                fila = dict(fila) if isinstance(fila, dict) else {"input": fila}
+                if escritor["csv"] is None:
+                    campos = list(fila) + [c for c in COLUMNAS_SALIDA if c not in fila]
+                    escritor["csv"] = csv.DictWriter(_Texto(out), fieldnames=campos,
+                                                     extrasaction="ignore")
+                    if out.tell() == 0:
+                        escritor["csv"].writeheader()
+                escritor["csv"].writerow({**fila, **r})
+
+        jobs = max(1, opts["jobs"])
+        t0 = time.perf_counter()
+        filas_run = 0
+        pool = None
+        try:
+            if jobs == 1:
+                resultados = map(_validar_bloque, trabajos())
+            else:
+                connections.close_all()   # que los hijos no hereden la conexión del padre
+                pool = get_context("fork").Pool(jobs, initializer=_iniciar_worker)
+                resultados = self._en_orden(pool, trabajos(), jobs * 2)
+
+            for n, filas_res in resultados:
+                escribir(pendientes.pop(n), filas_res)
+                out.flush()
+                os.fsync(out.fileno())
+                filas_ok += len(filas_res)
+                filas_run += len(filas_res)
+                guardar_checkpoint(ckpt_path, {**firma, "bloques": n + 1,
+                                               "filas": filas_ok, "bytes": out.tell()})
+                dt = time.perf_counter() - t0
+                self.stdout.write(f"  … {filas_ok} filas ({filas_run / dt:.0f} filas/s)")
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            out.close()
+
+        ckpt_path.unlink(missing_ok=True)
+        dt = time.perf_counter() - t0
+        self.stdout.write(self.style.SUCCESS(
+            f"Listo: {filas_ok} filas en {dst} ({dt:.1f}s, {filas_run / dt if dt else 0:.0f} filas/s)"))
+
+    @staticmethod
+    def _en_orden(pool, trabajos, ventana):
+        """
+        Resultados en orden de entrada con a lo sumo `ventana` bloques en vuelo
+        (pool.imap leería todo el archivo por adelantado).
+        """
+        en_vuelo = deque()
+        for trabajo in trabajos:
+            en_vuelo.append(pool.apply_async(_validar_bloque, (trabajo,)))
+            if len(en_vuelo) >= ventana:
+                yield en_vuelo.popleft().get()
+        while en_vuelo:
+            yield en_vuelo.popleft().get()
+
+
+class _Texto:
+    """Adaptador mínimo para que csv.writer escriba UTF-8 sobre un archivo binario."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, s):
+        return self.f.write(s.encode("utf-8"))
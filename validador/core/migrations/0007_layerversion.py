@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2025-11-10 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_apply_querylog_schema_fix'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayerVersion',
+            fields=[
+                ('layer', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
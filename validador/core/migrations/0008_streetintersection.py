@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2025-11-12 21:05
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_layerversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreetIntersection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name_a', models.CharField(max_length=100)),
+                ('name_b', models.CharField(max_length=100)),
+                ('geom', django.contrib.gis.db.models.fields.PointField(srid=4326)),
+                ('street_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.street')),
+                ('street_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.street')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name_a', 'name_b'], name='core_inter_names_idx'), django.contrib.postgres.indexes.GistIndex(fields=['geom'], name='core_inter_geom_gist')],
+            },
+        ),
+    ]
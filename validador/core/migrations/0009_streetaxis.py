@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2025-11-14 17:48
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_streetintersection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreetAxis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('calle', 'Calle'), ('avenida', 'Avenida')], max_length=10)),
+                ('geom', django.contrib.gis.db.models.fields.MultiLineStringField(srid=4326)),
+                ('length_m', models.FloatField()),
+                ('desde', models.PositiveIntegerField(default=0)),
+                ('hasta', models.PositiveIntegerField(default=0)),
+                ('parts', models.JSONField(blank=True, default=list)),
+                ('street', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.street')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'name'), name='core_streetaxis_kind_name_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2025-11-18 20:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_streetaxis'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='querylog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2025-11-20 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_alter_querylog_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryLogDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=12)),
+                ('quality', models.CharField(blank=True, default='', max_length=1)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_n', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'status', 'quality'), name='core_querylogdaily_uniq')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='querylog',
+            index=models.Index(fields=['created_at'], name='core_querylog_created_idx'),
+        ),
+    ]
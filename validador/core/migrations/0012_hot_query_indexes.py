@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2025-11-21 16:05
+
+from django.db import migrations, models
+
+# GiST de las geometrías: GeoDjango los crea solo en bases armadas con
+# migrate (spatial_index=True); en las bases cargadas a mano existían solo si
+# se corría sql/reparación_datos.sql. Se crean si la columna no tiene ya un
+# índice GiST (con cualquier nombre), así no se duplican.
+GIST = """
+DO $$
+DECLARE t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['core_street', 'core_blockgrid', 'core_building', 'core_parcel'] LOOP
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indrelid
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = ic.relam
+            JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = ANY (i.indkey)
+            WHERE c.relname = t AND am.amname = 'gist' AND a.attname = 'geom'
+        ) THEN
+            EXECUTE format('CREATE INDEX idx_%s_geom ON %I USING gist (geom)', substr(t, 6), t);
+        END IF;
+    END LOOP;
+END$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_querylogdaily'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blockgrid',
+            index=models.Index(fields=['chacra', 'manzana'], name='core_blockgrid_ch_mz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='building',
+            index=models.Index(fields=['chacra', 'manzana', 'numero'], name='core_building_ch_mz_nro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='building',
+            index=models.Index(fields=['numero'], name='core_building_numero_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='querylog',
+            index=models.Index(fields=['status', 'created_at'], name='core_qlog_status_created_idx'),
+        ),
+        migrations.RunSQL(sql=GIST, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2025-11-22 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='parcel',
+            index=models.Index(fields=['chacra', 'block', 'parcel', 'lot'], name='core_parcel_code_idx'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.7 on 2025-11-24 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_parcel_code_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayerManifest',
+            fields=[
+                ('source_layer', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('path', models.CharField(max_length=255)),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.BigIntegerField(default=0)),
+                ('features', models.PositiveIntegerField(default=0)),
+                ('inserted', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('deleted', models.PositiveIntegerField(default=0)),
+                ('loaded_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='parcel',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='street',
+            name='source_layer',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='street',
+            name='source_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='street',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddConstraint(
+            model_name='street',
+            constraint=models.UniqueConstraint(fields=('source_layer', 'source_id'), name='core_street_source_uniq'),
+        ),
+        migrations.AddField(
+            model_name='blockgrid',
+            name='source_layer',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='blockgrid',
+            name='source_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='blockgrid',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddConstraint(
+            model_name='blockgrid',
+            constraint=models.UniqueConstraint(fields=('source_layer', 'source_id'), name='core_blockgrid_source_uniq'),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='source_layer',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='source_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddConstraint(
+            model_name='building',
+            constraint=models.UniqueConstraint(fields=('source_layer', 'source_id'), name='core_building_source_uniq'),
+        ),
+    ]
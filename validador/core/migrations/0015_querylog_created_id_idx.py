@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2025-11-25 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_source_identity_layermanifest'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='querylog',
+            name='core_querylog_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='querylog',
+            index=models.Index(fields=['created_at', 'id'], name='core_querylog_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.2.7 on 2025-11-26 09:40
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations
+
+# core_querylog pasa a ser una tabla particionada por mes (RANGE sobre
+# created_at). El modelo no cambia: la clave primaria de la tabla pasa a ser
+# (id, created_at), como exige Postgres, y el id sale de una secuencia propia
+# (DEFAULT nextval, como un bigserial) y no de una identidad, que en tablas
+# particionadas no soportan las versiones viejas de Postgres. Copia todas las
+# filas: en bases grandes conviene correrla en una ventana sin tráfico. Las
+# particiones siguientes las crea `manage.py querylog_partitions` (ver
+# services/querylog_partitions.py).
+
+MESES_ADELANTE = 3
+
+
+def _limite(mes, tz):
+    return datetime(mes.year, mes.month, 1, tzinfo=tz)
+
+
+def _sumar_meses(mes, n):
+    k = mes.year * 12 + mes.month - 1 + n
+    return date(k // 12, k % 12 + 1, 1)
+
+
+def particionar(apps, schema_editor):
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    tz = ZoneInfo(settings.TIME_ZONE)
+    ex = schema_editor.execute
+
+    ex("ALTER TABLE core_querylog RENAME TO core_querylog_old")
+    ex("ALTER TABLE core_querylog_old RENAME CONSTRAINT core_querylog_pkey TO core_querylog_old_pkey")
+    ex("DROP INDEX IF EXISTS core_querylog_created_id_idx")
+    ex("DROP INDEX IF EXISTS core_qlog_status_created_idx")
+    ex("""
+        CREATE TABLE core_querylog (
+            LIKE core_querylog_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+        ) PARTITION BY RANGE (created_at)
+    """)
+    ex("ALTER TABLE core_querylog ADD CONSTRAINT core_querylog_pkey PRIMARY KEY (id, created_at)")
+    for col, ref in (("user_id", user_table), ("street_id", "core_street"), ("building_id", "core_building")):
+        ex(f"ALTER TABLE core_querylog ADD CONSTRAINT core_querylog_{col}_fk "
+           f"FOREIGN KEY ({col}) REFERENCES {ref} (id) DEFERRABLE INITIALLY DEFERRED")
+        ex(f"CREATE INDEX core_querylog_{col}_idx ON core_querylog ({col})")
+    ex("CREATE INDEX core_querylog_created_id_idx ON core_querylog (created_at, id)")
+    ex("CREATE INDEX core_qlog_status_created_idx ON core_querylog (status, created_at)")
+    ex("CREATE INDEX core_querylog_geom_idx ON core_querylog USING gist (geom)")
+
+    # una partición por mes local, desde el primer registro hasta MESES_ADELANTE
+    with schema_editor.connection.cursor() as cur:
+        cur.execute("SELECT MIN(created_at) FROM core_querylog_old")
+        primero = cur.fetchone()[0]
+    hoy = datetime.now(tz).date().replace(day=1)
+    mes = primero.astimezone(tz).date().replace(day=1) if primero else hoy
+    while mes <= _sumar_meses(hoy, MESES_ADELANTE):
+        ex(f"CREATE TABLE core_querylog_p{mes:%Y%m} PARTITION OF core_querylog "
+           f"FOR VALUES FROM (%s) TO (%s)", [_limite(mes, tz), _limite(_sumar_meses(mes, 1), tz)])
+        mes = _sumar_meses(mes, 1)
+    ex("CREATE TABLE core_querylog_default PARTITION OF core_querylog DEFAULT")
+
+    ex("INSERT INTO core_querylog SELECT * FROM core_querylog_old")
+    # la identidad de la tabla vieja se lleva su secuencia (core_querylog_id_seq)
+    ex("DROP TABLE core_querylog_old")
+    ex("CREATE SEQUENCE core_querylog_id_seq OWNED BY core_querylog.id")
+    ex("ALTER TABLE core_querylog ALTER COLUMN id SET DEFAULT nextval('core_querylog_id_seq')")
+    ex("""
+        SELECT setval('core_querylog_id_seq',
+                      (SELECT COALESCE(MAX(id), 0) + 1 FROM core_querylog), false)
+    """)
+
+
+def desparticionar(apps, schema_editor):
+    ex = schema_editor.execute
+    ex("ALTER TABLE core_querylog RENAME TO core_querylog_part")
+    ex("ALTER TABLE core_querylog_part RENAME CONSTRAINT core_querylog_pkey TO core_querylog_part_pkey")
+    ex("DROP INDEX core_querylog_created_id_idx")
+    ex("DROP INDEX core_qlog_status_created_idx")
+    ex("""
+        CREATE TABLE core_querylog (
+            LIKE core_querylog_part INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+        )
+    """)
+    ex("ALTER TABLE core_querylog ADD CONSTRAINT core_querylog_pkey PRIMARY KEY (id)")
+    ex("INSERT INTO core_querylog SELECT * FROM core_querylog_part")
+    # la secuencia (y su DEFAULT, copiado por LIKE) pasa a la tabla nueva
+    ex("ALTER SEQUENCE core_querylog_id_seq OWNED BY core_querylog.id")
+    ex("""
+        SELECT setval('core_querylog_id_seq',
+                      (SELECT COALESCE(MAX(id), 0) + 1 FROM core_querylog), false)
+    """)
+    ex("DROP TABLE core_querylog_part")
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    for col, ref in (("user_id", user_table), ("street_id", "core_street"), ("building_id", "core_building")):
+        ex(f"ALTER TABLE core_querylog ADD CONSTRAINT core_querylog_{col}_fk "
+           f"FOREIGN KEY ({col}) REFERENCES {ref} (id) DEFERRABLE INITIALLY DEFERRED")
+        ex(f"CREATE INDEX core_querylog_{col}_idx ON core_querylog ({col})")
+    ex("CREATE INDEX core_querylog_created_id_idx ON core_querylog (created_at, id)")
+    ex("CREATE INDEX core_qlog_status_created_idx ON core_querylog (status, created_at)")
+    ex("CREATE INDEX core_querylog_geom_idx ON core_querylog USING gist (geom)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_querylog_created_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2025-11-27 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_querylog_partitioned'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='street',
+            name='zona_monoblock',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='blockgrid',
+            name='zona_monoblock',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -7,6 +7,7 @@ from django.contrib.gis.db import models
 #except ModuleNotFoundError:
 from django.contrib.postgres.indexes import GistIndex
 from django.conf import settings
+from django.utils import timezone
 
 class Parcel(models.Model):
     # Códigos catastrales del JSON de IDE Posadas
@@ -19,9 +20,14 @@ class Parcel(models.Model):
     unit     = models.CharField(max_length=10, null=True, blank=True)   # UNFU
     gid      = models.CharField(max_length=64, unique=True)             # IDGIS
     geom     = models.MultiPolygonField(srid=4326)
+    content_hash = models.CharField(max_length=40, blank=True, default="")  # ver load_geojson
 
     class Meta:
-        indexes = [GistIndex(fields=["geom"])]
+        indexes = [
+            GistIndex(fields=["geom"]),
+            # nomenclatura catastral (services/cadastre): igualdad o prefijo de la tupla
+            models.Index(fields=["chacra", "block", "parcel", "lot"], name="core_parcel_code_idx"),
+        ]
         verbose_name = "Parcela"
         verbose_name_plural = "Parcelas"
 
@@ -38,6 +44,19 @@ class Street(models.Model):
     kind = models.CharField(max_length=10, choices=KIND_CHOICES)
     aliases = models.JSONField(default=list, blank=True)
     geom = models.MultiLineStringField(srid=4326)  # Coordenadas WGS84
+    # Identidad del feature en el archivo de origen (load_geojson): tipo de
+    # carga ('calle', 'manzanero', ...), id del feature y hash de su contenido
+    source_layer = models.CharField(max_length=20, blank=True, default="")
+    source_id = models.CharField(max_length=64, null=True, blank=True)
+    content_hash = models.CharField(max_length=40, blank=True, default="")
+    # Hay edificios (monoblocks) a menos de RADIO_MONOBLOCK_M del tramo.
+    # Derivado: lo recalcula build_monoblock_zones cuando cambian calles o edificios
+    zona_monoblock = models.BooleanField(default=False, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source_layer", "source_id"], name="core_street_source_uniq"),
+        ]
 
     def __str__(self):
         return f"{self.kind.title()} {self.name}"
@@ -49,6 +68,19 @@ class BlockGrid(models.Model):
     chacra = models.CharField(max_length=20, blank=True, null=True)
     manzana = models.CharField(max_length=20, blank=True, null=True)
     geom = models.MultiPolygonField(srid=4326)
+    # Identidad del feature en el archivo de origen (load_geojson): tipo de
+    # carga ('calle', 'manzanero', ...), id del feature y hash de su contenido
+    source_layer = models.CharField(max_length=20, blank=True, default="")
+    source_id = models.CharField(max_length=64, null=True, blank=True)
+    content_hash = models.CharField(max_length=40, blank=True, default="")
+    # Igual que Street.zona_monoblock, para la celda (build_monoblock_zones)
+    zona_monoblock = models.BooleanField(default=False, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["chacra", "manzana"], name="core_blockgrid_ch_mz_idx")]
+        constraints = [
+            models.UniqueConstraint(fields=["source_layer", "source_id"], name="core_blockgrid_source_uniq"),
+        ]
 
     def __str__(self):
         return f"Chacra {self.chacra or '-'} / Manzana {self.manzana or '-'}"
@@ -63,6 +95,20 @@ class Building(models.Model):
     letra = models.CharField(max_length=5, blank=True, null=True)
     escalera = models.CharField(max_length=5, blank=True, null=True)
     geom = models.PointField(srid=4326)
+    # Identidad del feature en el archivo de origen (load_geojson): tipo de
+    # carga ('calle', 'manzanero', ...), id del feature y hash de su contenido
+    source_layer = models.CharField(max_length=20, blank=True, default="")
+    source_id = models.CharField(max_length=64, null=True, blank=True)
+    content_hash = models.CharField(max_length=40, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["chacra", "manzana", "numero"], name="core_building_ch_mz_nro_idx"),
+            models.Index(fields=["numero"], name="core_building_numero_idx"),   # buscar_zona_interna
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["source_layer", "source_id"], name="core_building_source_uniq"),
+        ]
 
     def __str__(self):
         return f"Edificio {self.numero or '?'}{self.letra or ''} (Ch {self.chacra})"
@@ -106,8 +152,9 @@ class QueryLog(models.Model):
     building = models.ForeignKey(Building, on_delete=models.SET_NULL, null=True, blank=True)
     # Coordenadas del punto de validación
     geom = models.PointField(srid=4326, null=True, blank=True)
-    # Fecha y hora de creación
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Fecha y hora de creación (default y no auto_now_add: el buffer de escritura
+    # inserta más tarde y tiene que conservar la hora real de la consulta)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     # 👇 nuevos
     normalized = models.CharField(max_length=240, blank=True, default="")
     llm_reason = models.TextField(blank=True, default="")      # explicación del LLM
@@ -115,6 +162,113 @@ class QueryLog(models.Model):
     score = models.FloatField(null=True, blank=True, default=0)            # opcional
     quality = models.CharField(max_length=1, blank=True)        # 'A'/'M'/'B'
 
+    class Meta:
+        # rangos sobre created_at (dashboard, rollups): filtrar siempre con
+        # created_at >= inicio AND created_at < fin, nunca con __date.
+        # (created_at, id) es además el orden de la paginación por cursor.
+        # La tabla está particionada por mes sobre created_at (migración 0016,
+        # services/querylog_partitions): la PK real es (id, created_at).
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="core_querylog_created_id_idx"),
+            models.Index(fields=["status", "created_at"], name="core_qlog_status_created_idx"),
+        ]
 
     def __str__(self):
         return f"[{self.status}] {self.raw_text[:40]}"
+
+
+# --- 6. Versión de las capas cargadas ---
+# Cada recarga de una capa (load_geojson, load_vias_posadas, admin) incrementa
+# su versión. Los índices en memoria de cada worker la comparan con la que
+# tienen construida para saber cuándo reconstruirse.
+class LayerVersion(models.Model):
+    layer = models.CharField(max_length=20, primary_key=True)   # 'street', 'blockgrid', ...
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.layer} v{self.version}"
+
+
+# --- 7. Esquinas precalculadas ---
+# Un punto por cada cruce entre dos calles distintas, calculado una sola vez
+# al cargar la capa (manage.py build_intersections). Los nombres se guardan
+# normalizados (validacion.parser.normalizar_via) y ordenados, name_a <= name_b,
+# para que "X y Y" sea una sola búsqueda por índice.
+class StreetIntersection(models.Model):
+    name_a = models.CharField(max_length=100)
+    name_b = models.CharField(max_length=100)
+    street_a = models.ForeignKey(Street, on_delete=models.CASCADE, related_name="+")
+    street_b = models.ForeignKey(Street, on_delete=models.CASCADE, related_name="+")
+    geom = models.PointField(srid=4326)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["name_a", "name_b"], name="core_inter_names_idx"),
+            GistIndex(fields=["geom"], name="core_inter_geom_gist"),
+        ]
+
+    def __str__(self):
+        return f"{self.name_a} y {self.name_b}"
+
+
+# --- 8. Ejes de calle para interpolar alturas ---
+# Una fila por calle (kind + nombre normalizado) con todos sus tramos unidos
+# (ST_LineMerge), el largo en metros y el rango de numeración. `parts` guarda
+# los metros acumulados [inicio, fin] de cada parte de geom, en orden, así una
+# altura se resuelve con un bisect y una interpolación. Lo arma build_street_axes.
+class StreetAxis(models.Model):
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=Street.KIND_CHOICES)
+    street = models.ForeignKey(Street, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    geom = models.MultiLineStringField(srid=4326)
+    length_m = models.FloatField()
+    desde = models.PositiveIntegerField(default=0)
+    hasta = models.PositiveIntegerField(default=0)
+    parts = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["kind", "name"], name="core_streetaxis_kind_name_uniq")]
+
+    def __str__(self):
+        return f"{self.kind.title()} {self.name} ({self.desde}-{self.hasta})"
+
+
+# --- 9. Resumen diario de QueryLog ---
+# Una fila por día (hora local) × status × quality con la cantidad de consultas
+# y la suma de score. La mantiene rollup_querylog (cron diario); el dashboard
+# solo la lee y calcula en vivo los días que todavía no estén consolidados.
+class QueryLogDaily(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=12)
+    quality = models.CharField(max_length=1, blank=True, default="")
+    count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    score_n = models.PositiveIntegerField(default=0)     # filas con score no nulo (para el promedio)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "status", "quality"], name="core_querylogdaily_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}/{self.quality or '-'}: {self.count}"
+
+
+# --- 10. Manifiesto de archivos cargados ---
+# Último archivo cargado por tipo de carga (load_geojson --type). Si el
+# archivo nuevo tiene el mismo sha256 se saltea entero; si no, se aplica solo
+# la diferencia por feature (source_id + content_hash).
+class LayerManifest(models.Model):
+    source_layer = models.CharField(max_length=20, primary_key=True)   # 'calle', 'edificio', ...
+    path = models.CharField(max_length=255)
+    sha256 = models.CharField(max_length=64)
+    size = models.BigIntegerField(default=0)
+    features = models.PositiveIntegerField(default=0)
+    inserted = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+    loaded_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source_layer}: {self.path} ({self.sha256[:8]})"
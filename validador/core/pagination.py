@@ -0,0 +1,18 @@
+# core/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class QueryLogCursorPagination(CursorPagination):
+    """
+    Paginación por cursor de DRF, del más nuevo al más viejo. El cursor guarda
+    solo created_at (el primer campo de ordering) más un offset para los
+    empates en ese instante; id solo desempata el orden. Cada página es un
+    rango sobre core_querylog_created_id_idx, así que cuesta lo mismo la
+    primera que la número mil (con offset de página, Postgres lee y descarta
+    todas las filas anteriores). Con timestamps en microsegundos los empates,
+    y por lo tanto ese offset, son casi siempre cero.
+    """
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
@@ -1,32 +1,41 @@
 from rest_framework import serializers
 from .models import QueryLog
 
+# Columnas escalares de QueryLog: lo único que lee el listado (sin los JSON
+# parsed_tokens/result_json ni la geometría)
+CAMPOS_LISTADO = ["id", "created_at", "user", "raw_text", "normalized", "status", "score", "quality"]
+
+
+class QueryLogListSerializer(serializers.ModelSerializer):
+    """Fila del listado: solo columnas escalares."""
+
+    class Meta:
+        model = QueryLog
+        fields = CAMPOS_LISTADO
+        read_only_fields = fields
+
+
 class QueryLogSerializer(serializers.ModelSerializer):
     # Campos derivados (opcionales) para que el JSON sea cómodo
-    status = serializers.SerializerMethodField()
     match = serializers.SerializerMethodField()
+    punto = serializers.SerializerMethodField()
 
     class Meta:
         model = QueryLog
         fields = [
             "id", "created_at",
             "raw_text", "normalized", "llm_reason",
-            "result", "status", "match",
+            "result_json", "status", "match", "punto",
             "score", "quality",
         ]
-        read_only_fields = ["id", "created_at", "result", "status", "match", "score", "quality"]
-
-    def get_status(self, obj):
-        try:
-            return (obj.result or {}).get("status")
-        except Exception:
-            return None
+        read_only_fields = ["id", "created_at", "match", "punto", "score", "quality"]
 
     def get_match(self, obj):
-        try:
-            return (obj.result or {}).get("match") or (obj.result or {}).get("coincidencias")
-        except Exception:
-            return None
+        result = obj.result_json if isinstance(obj.result_json, dict) else {}
+        return result.get("match") or result.get("coincidencias")
+
+    def get_punto(self, obj):
+        return {"lon": obj.geom.x, "lat": obj.geom.y} if obj.geom else None
 
 
 # Si querés un endpoint que reciba SOLO el texto y procese:
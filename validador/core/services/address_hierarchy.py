@@ -1,20 +1,124 @@
 import re
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Centroid
+from django.contrib.gis.geos import Point
+from django.db import connection
 from validador.core.models import BlockGrid, Building
+from validador.core.services import spatial_index
 
-def buscar_zona_interna(parsed):
+RADIO_MONOBLOCK_M = 120
+# Distancia a la que una manzana (o tramo) marcado como zona de monoblocks
+# cuenta para un punto: las alturas interpoladas caen sobre la calzada, entre manzanas
+MARGEN_ZONA_M = 20
+
+# Como zona_monoblock_lote: las manzanas a menos de MARGEN_ZONA_M deciden y, si
+# no hay ninguna, los tramos de calle. El && con ST_Expand usa el índice GiST y
+# ST_DWithin sobre geography mide la distancia real en metros.
+SQL_ZONA_MONOBLOCK = """
+    WITH p AS (SELECT ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326) AS g)
+    SELECT COALESCE(
+        (SELECT bool_or(m.zona_monoblock) FROM core_blockgrid m, p
+         WHERE m.manzana IS NOT NULL AND m.geom && ST_Expand(p.g, %(grados)s)
+           AND ST_DWithin(m.geom::geography, p.g::geography, %(margen)s)),
+        EXISTS (SELECT 1 FROM core_street s, p
+                WHERE s.zona_monoblock AND s.geom && ST_Expand(p.g, %(grados)s)
+                  AND ST_DWithin(s.geom::geography, p.g::geography, %(margen)s))
+    )
+"""
+
+def _zonas():
+    # el centroide sale calculado de la base: no hace falta traer el polígono
+    return BlockGrid.objects.annotate(centro=Centroid("geom")).defer("geom").order_by("id")
+
+def clave_zona(parsed):
     """
-    Busca direcciones basadas en chacra/manzana/casa o edificio.
+    ('chacra', '123') / ('edificio', '45') según lo que pida el texto, o None.
     """
-    q = parsed.get("via", "").lower()
+    q = (parsed.get("via") or "").lower()
 
     if "chacra" in q:
         num = re.search(r'\d+', q)
         if num:
-            return BlockGrid.objects.filter(chacra=num.group(0))
+            return ("chacra", num.group(0))
 
     if "monoblock" in q or "edificio" in q:
         num = re.search(r'\d+', q)
         if num:
-            return Building.objects.filter(numero=num.group(0))
+            return ("edificio", num.group(0))
+
+    return None
+
+def buscar_zona_interna(parsed):
+    """
+    Busca direcciones basadas en chacra/manzana/casa o edificio.
+    """
+    clave = clave_zona(parsed)
+    if clave is None:
+        return []
+    tipo, num = clave
+    if tipo == "chacra":
+        return _zonas().filter(chacra=num)
+    return Building.objects.filter(numero=num).order_by("id")
+
+def buscar_zonas_internas(parsed_list):
+    """
+    Versión por lotes de buscar_zona_interna: una consulta por tipo para toda
+    la lista. Devuelve un dict clave_zona -> [objetos].
+    """
+    claves = {c for c in map(clave_zona, parsed_list) if c}
+    chacras = {num for tipo, num in claves if tipo == "chacra"}
+    edificios = {num for tipo, num in claves if tipo == "edificio"}
+
+    out = {c: [] for c in claves}
+    if chacras:
+        for bg in _zonas().filter(chacra__in=chacras):
+            out[("chacra", bg.chacra)].append(bg)
+    if edificios:
+        for b in Building.objects.filter(numero__in=edificios).order_by("id"):
+            out[("edificio", b.numero)].append(b)
+    return out
+
+def contexto_punto(lon, lat):
+    """
+    Chacra/manzana que contiene el punto y si está en zona de monoblocks
+    (marca precalculada por build_monoblock_zones en manzanas y calles).
+    """
+    return contextos_puntos([(lon, lat)])[0]
+
+def contextos_puntos(puntos):
+    """
+    contexto_punto() para muchos puntos. Con SPATIAL_INDEX_ENABLED y un
+    snapshot vigente se resuelve en memoria (spatial_index), sin consultas;
+    si no, con consultas a PostGIS por punto.
+    """
+    puntos = list(puntos)
+    if not puntos:
+        return []
+    idx = spatial_index.indice() if getattr(settings, "SPATIAL_INDEX_ENABLED", True) else None
+    if idx is not None:
+        lons, lats = [p[0] for p in puntos], [p[1] for p in puntos]
+        zonas = idx.zonas_lote(lons, lats)
+        mono = idx.zona_monoblock_lote(lons, lats, MARGEN_ZONA_M)
+        return [{**z, "zona_monoblock": bool(m)} for z, m in zip(zonas, mono.tolist())]
+    return [contexto_punto_sql(lon, lat) for lon, lat in puntos]
+
+def params_zona_monoblock(lon, lat):
+    from validador.core.services.monoblock import METROS_POR_GRADO_MIN   # monoblock importa este módulo
+    return {"lon": lon, "lat": lat, "margen": MARGEN_ZONA_M, "grados": MARGEN_ZONA_M / METROS_POR_GRADO_MIN}
 
-    return []
+def contexto_punto_sql(lon, lat):
+    p = Point(lon, lat, srid=4326)
+    # como zonas_lote: la manzana que contiene el punto y, si no trae chacra, la chacra
+    zona = BlockGrid.objects.filter(manzana__isnull=False, geom__contains=p).order_by("id").first()
+    chacra = getattr(zona, "chacra", None)
+    if chacra is None:
+        chacra = (BlockGrid.objects.filter(manzana__isnull=True, geom__contains=p)
+                  .order_by("id").values_list("chacra", flat=True).first())
+    with connection.cursor() as cur:
+        cur.execute(SQL_ZONA_MONOBLOCK, params_zona_monoblock(lon, lat))
+        hay_mono = cur.fetchone()[0]
+    return {
+        "chacra": chacra,
+        "manzana": getattr(zona, "manzana", None),
+        "zona_monoblock": hay_mono,
+    }
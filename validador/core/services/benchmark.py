@@ -0,0 +1,204 @@
+# validador/core/services/benchmark.py
+"""
+Benchmark del camino de validación (comando bench_validation).
+
+Arma un corpus etiquetado a partir de las capas cargadas y mide cada etapa
+por separado: normalizar/parsear, buscar_via, buscar_zona_interna, la vista
+ValidateAddress completa y la persistencia de QueryLog. Por etapa informa
+percentiles de latencia, throughput y consultas SQL por request.
+"""
+import platform
+import random
+import string
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from validacion.parser import normalizar, normalizar_via, parsear
+from validacion.services import buscar_via, validar
+from validacion.views import ValidateAddress, _querylog
+from validador.core.models import BlockGrid, Building, Street, StreetAxis, StreetIntersection
+from validador.core.services import dataset_version
+from validador.core.services.address_hierarchy import buscar_zona_interna
+
+CATEGORIAS = ("calle_altura", "esquina", "chacra_manzana", "edificio", "errata", "basura")
+ETAPAS = ("parsear", "buscar_via", "buscar_zona_interna", "validate_address", "querylog")
+
+
+# --- corpus ---
+
+def _muestra(qs, n, rnd):
+    """n filas al azar (reproducible con la semilla) sin ORDER BY random()."""
+    ids = list(qs.order_by("id").values_list("id", flat=True))
+    ids = rnd.sample(ids, min(n, len(ids)))
+    por_id = qs.in_bulk(ids)
+    return [por_id[i] for i in ids]
+
+
+def _errata(texto, rnd):
+    """Un error de tipeo: borra, duplica o intercambia una letra."""
+    letras = [i for i, c in enumerate(texto) if c.isalpha()]
+    if len(letras) < 4:
+        return texto
+    i = rnd.choice(letras[1:-1])
+    op = rnd.choice(("borrar", "duplicar", "intercambiar"))
+    if op == "borrar":
+        return texto[:i] + texto[i + 1:]
+    if op == "duplicar":
+        return texto[:i] + texto[i] + texto[i:]
+    return texto[:i] + texto[i + 1] + texto[i] + texto[i + 2:]
+
+
+def generar_corpus(n: int = 50, seed: int = 0) -> list:
+    """
+    Hasta `n` casos por categoría: [{"texto", "categoria"}]. Con la misma
+    semilla y los mismos datos cargados el corpus es siempre el mismo.
+    """
+    rnd = random.Random(seed)
+    hastas = dict(StreetAxis.objects.values_list("name", "hasta"))
+    corpus = []
+
+    def agregar(categoria, texto):
+        corpus.append({"texto": texto, "categoria": categoria})
+
+    calles = _muestra(Street.objects.only("id", "name"), n, rnd)
+    for s in calles:
+        hasta = hastas.get(normalizar_via(s.name), 0) or 4000
+        agregar("calle_altura", f"{s.name} {rnd.randint(1, max(1, hasta))}")
+
+    for e in _muestra(StreetIntersection.objects.only("id", "name_a", "name_b"), n, rnd):
+        agregar("esquina", f"{e.name_a} y {e.name_b}")
+
+    zonas = BlockGrid.objects.exclude(chacra=None).only("id", "chacra", "manzana")
+    for z in _muestra(zonas, n, rnd):
+        agregar("chacra_manzana", f"chacra {z.chacra} manzana {z.manzana}")
+
+    edificios = Building.objects.exclude(numero=None).only("id", "numero")
+    for b in _muestra(edificios, n, rnd):
+        agregar("edificio", f"{rnd.choice(('monoblock', 'edificio', 'torre'))} {b.numero}")
+
+    for s in rnd.sample(calles, min(n, len(calles))):
+        agregar("errata", f"{_errata(s.name, rnd)} {rnd.randint(1, 4000)}")
+
+    alfabeto = string.ascii_lowercase + string.digits + "  .,#-"
+    for _ in range(n):
+        agregar("basura", "".join(rnd.choice(alfabeto) for _ in range(rnd.randint(3, 30))))
+    return corpus
+
+
+# --- medición ---
+
+def resumen(tiempos, consultas) -> dict:
+    """Percentiles en ms, throughput (req/s) y consultas SQL por request."""
+    if not tiempos:
+        return {"n": 0}
+    orden = sorted(tiempos)
+
+    def p(q):
+        return orden[min(len(orden) - 1, int(round(q * (len(orden) - 1))))] * 1000
+
+    total = sum(tiempos)
+    return {
+        "n": len(tiempos),
+        "p50_ms": round(p(0.50), 3),
+        "p95_ms": round(p(0.95), 3),
+        "p99_ms": round(p(0.99), 3),
+        "max_ms": round(orden[-1] * 1000, 3),
+        "throughput_rps": round(len(tiempos) / total, 1) if total else None,
+        "queries_por_request": round(sum(consultas) / len(consultas), 3),
+    }
+
+
+def medir(fn, items, repeticiones: int = 1) -> dict:
+    tiempos, consultas = [], []
+    for _ in range(repeticiones):
+        for item in items:
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                fn(item)
+                tiempos.append(time.perf_counter() - t0)
+            consultas.append(len(ctx.captured_queries))
+    return resumen(tiempos, consultas)
+
+
+def correr(corpus, repeticiones: int = 1, con_cache: bool = False) -> dict:
+    """
+    Mide todas las etapas sobre el corpus. Sin `con_cache` la caché de
+    resultados se apaga, para medir el motor y no los aciertos.
+    """
+    textos = [c["texto"] for c in corpus]
+    parseados = [parsear(t) for t in textos]
+
+    factory = APIRequestFactory()
+    usuario = get_user_model()(username="bench")   # sin guardar: solo para IsAuthenticated
+    vista = ValidateAddress.as_view(registrar_log=False)
+
+    def post(texto):
+        req = factory.post("/validacion/validate_address", {"input": texto}, format="json")
+        force_authenticate(req, user=usuario)
+        return vista(req)
+
+    with override_settings(VALIDATION_CACHE={"ENABLED": con_cache}):
+        # calentamiento: índices en memoria, ejes y conexiones
+        for t in textos[:20]:
+            validar(t)
+
+        etapas = {
+            "parsear": medir(lambda t: parsear(normalizar(t)), textos, repeticiones),
+            "buscar_via": medir(lambda p: buscar_via(p.get("via", ""), p.get("tipo")),
+                                parseados, repeticiones),
+            "buscar_zona_interna": medir(lambda p: list(buscar_zona_interna(p)),
+                                         parseados, repeticiones),
+            "validate_address": medir(post, textos, repeticiones),
+        }
+
+        # por categoría, sobre la vista completa, con la distribución de estados
+        categorias = {}
+        for cat in CATEGORIAS:
+            casos = [c["texto"] for c in corpus if c["categoria"] == cat]
+            estados = {}
+            for t in casos:
+                s = validar(t)["status"]
+                estados[s] = estados.get(s, 0) + 1
+            categorias[cat] = {**medir(post, casos, repeticiones), "estados": estados}
+
+        # persistencia de QueryLog: save() síncrono, se deshace al final
+        logs = [_querylog(None, validar(t)) for t in textos]
+        with transaction.atomic():
+            etapas["querylog"] = medir(lambda q: q.save(), logs)
+            transaction.set_rollback(True)
+
+    return {
+        "entorno": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "capas": dataset_version.versiones(),
+            "con_cache": con_cache,
+            "repeticiones": repeticiones,
+        },
+        "corpus": {cat: sum(1 for c in corpus if c["categoria"] == cat) for cat in CATEGORIAS},
+        "etapas": etapas,
+        "categorias": categorias,
+    }
+
+
+def comparar(actual: dict, base: dict, tolerancia: float = 0.20) -> list:
+    """
+    Regresiones de `actual` contra una corrida anterior: p95 más de
+    `tolerancia` por encima, o más consultas SQL por request.
+    """
+    problemas = []
+    for etapa, b in base.get("etapas", {}).items():
+        a = actual["etapas"].get(etapa)
+        if not a or not b.get("n"):
+            continue
+        if a["p95_ms"] > b["p95_ms"] * (1 + tolerancia):
+            problemas.append(f"{etapa}: p95 {a['p95_ms']}ms > {b['p95_ms']}ms (+{tolerancia:.0%})")
+        if a["queries_por_request"] > b["queries_por_request"] + 1e-9:
+            problemas.append(f"{etapa}: {a['queries_por_request']} consultas/req > "
+                             f"{b['queries_por_request']}")
+    return problemas
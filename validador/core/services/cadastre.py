@@ -0,0 +1,73 @@
+# validador/core/services/cadastre.py
+"""
+Búsqueda de parcelas por nomenclatura catastral (validacion.parser.parsear_catastro).
+
+Los valores se guardan canónicos (codigo_catastral) al cargar la capa, así
+la búsqueda es una igualdad sobre el índice compuesto core_parcel_code_idx
+(chacra, block, parcel, lot). Un código parcial usa el prefijo del índice;
+un IDGIS va por el índice único de gid.
+"""
+import json
+
+from django.contrib.gis.db.models.functions import AsGeoJSON, PointOnSurface
+from django.db.models import IntegerField, Value
+
+from validador.core.models import Parcel
+
+MAX_OPCIONES = 8
+CODIGOS_POR_CONSULTA = 100
+
+
+def clave(codigo: dict) -> tuple:
+    """Clave hasheable de un código parseado (para agrupar en lotes)."""
+    return tuple(sorted(codigo.items()))
+
+
+def _qs():
+    return (Parcel.objects
+            .annotate(centro=PointOnSurface("geom"), geojson=AsGeoJSON("geom", precision=7))
+            .defer("geom")
+            .order_by("id"))
+
+
+def buscar_parcelas(codigo: dict, top: int = MAX_OPCIONES + 1) -> list:
+    """Parcelas que coinciden con el código (hasta `top`)."""
+    return list(_qs().filter(**codigo)[:top])
+
+
+def buscar_parcelas_lote(codigos, top: int = MAX_OPCIONES + 1) -> dict:
+    """
+    Versión por lotes: un UNION ALL de la búsqueda de cada código (cada una
+    con su LIMIT `top`, como buscar_parcelas), de a CODIGOS_POR_CONSULTA
+    códigos por consulta. Un código muy general ("ch 12") no trae la chacra
+    entera. Devuelve clave(codigo) -> [parcelas].
+    """
+    unicos = list({clave(c): c for c in codigos}.items())
+    out = {k: [] for k, _c in unicos}
+    for ini in range(0, len(unicos), CODIGOS_POR_CONSULTA):
+        tramo = unicos[ini:ini + CODIGOS_POR_CONSULTA]
+        partes = [_qs().filter(**c).annotate(n_codigo=Value(ini + i, output_field=IntegerField()))[:top]
+                  for i, (_k, c) in enumerate(tramo)]
+        qs = partes[0].union(*partes[1:], all=True) if len(partes) > 1 else partes[0]
+        for p in qs:
+            out[unicos[p.n_codigo][0]].append(p)
+    for parcelas in out.values():
+        parcelas.sort(key=lambda p: p.pk)
+    return out
+
+
+def describir(p) -> dict:
+    """Datos planos (cacheables) de una parcela: códigos, centro y geometría GeoJSON."""
+    return {
+        "id": p.pk,
+        "gid": p.gid,
+        "distrito": p.district,
+        "seccion": p.section,
+        "chacra": p.chacra,
+        "manzana": p.block,
+        "lote": p.lot,
+        "parcela": p.parcel,
+        "unidad": p.unit,
+        "centro": {"lon": p.centro.x, "lat": p.centro.y},
+        "geometria": json.loads(p.geojson),
+    }
@@ -0,0 +1,98 @@
+# validador/core/services/dataset_version.py
+import threading
+import time
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from validador.core.models import LayerVersion
+
+# Capas que tienen versión propia (nombre -> modelo que la alimenta). Las
+# derivadas (esquinas, ejes) también: entran en firma() y en la caché.
+CAPAS = ("street", "blockgrid", "building", "parcel", "streetaxis", "streetintersection")
+
+
+def version(capa: str) -> int:
+    """Versión actual de una capa (0 si nunca se cargó)."""
+    v = LayerVersion.objects.filter(layer=capa).values_list("version", flat=True).first()
+    return v or 0
+
+
+def versiones() -> dict:
+    """Todas las versiones en una sola consulta: {'street': 3, ...}."""
+    data = dict.fromkeys(CAPAS, 0)
+    data.update(LayerVersion.objects.values_list("layer", "version"))
+    return data
+
+
+def bump(*capas: str) -> None:
+    """
+    Marca las capas como modificadas. Lo llaman los comandos de carga al
+    terminar y las señales de los modelos (ediciones desde el admin).
+    """
+    for capa in capas:
+        n = (LayerVersion.objects
+             .filter(layer=capa)
+             .update(version=F("version") + 1, updated_at=timezone.now()))
+        if not n:
+            LayerVersion.objects.get_or_create(layer=capa, defaults={"version": 1})
+
+
+class PorVersion:
+    """
+    Objeto en memoria (índice, árbol, ...) que se reconstruye cuando cambia la
+    versión de alguna de sus capas. La versión se consulta a la base como mucho
+    cada `ttl` segundos, así el costo por request es un time.monotonic().
+    """
+
+    def __init__(self, capas, construir, ttl=None):
+        self.capas = tuple(capas)
+        self.construir = construir        # callable sin argumentos
+        self.ttl = ttl
+        self._obj = None
+        self._version = None
+        self._chequeado = 0.0
+        self._lock = threading.Lock()
+
+    def _ttl(self):
+        if self.ttl is not None:
+            return self.ttl
+        return getattr(settings, "LAYER_VERSION_TTL", 30)
+
+    def get(self):
+        ahora = time.monotonic()
+        if self._obj is not None and ahora - self._chequeado < self._ttl():
+            return self._obj
+        with self._lock:
+            if self._obj is None or ahora - self._chequeado >= self._ttl():
+                actual = versiones()
+                v = tuple(actual.get(c, 0) for c in self.capas)
+                if self._obj is None or v != self._version:
+                    self._obj = self.construir()
+                    self._version = v
+                self._chequeado = ahora
+        return self._obj
+
+    def invalidar(self):
+        """Fuerza la reconstrucción en el próximo get() de este proceso."""
+        with self._lock:
+            self._obj = None
+
+
+_firma = {"valor": None, "chequeado": 0.0}
+_firma_lock = threading.Lock()
+
+
+def firma() -> str:
+    """
+    Versión conjunta de todas las capas ("3.1.0.2.1"), para usar en claves de
+    caché. Igual que PorVersion, se revalida cada LAYER_VERSION_TTL segundos.
+    """
+    ahora = time.monotonic()
+    ttl = getattr(settings, "LAYER_VERSION_TTL", 30)
+    if _firma["valor"] is None or ahora - _firma["chequeado"] >= ttl:
+        with _firma_lock:
+            if _firma["valor"] is None or ahora - _firma["chequeado"] >= ttl:
+                v = versiones()
+                _firma["valor"] = ".".join(str(v[c]) for c in sorted(v))
+                _firma["chequeado"] = ahora
+    return _firma["valor"]
@@ -0,0 +1,185 @@
+# validador/core/services/geojson_stream.py
+"""
+Lectura incremental de un FeatureCollection GeoJSON.
+
+iter_features() recorre el archivo por bloques y devuelve cada feature como
+dict a medida que lo decodifica, así la memoria queda acotada al feature más
+grande (no al archivo). Las claves de primer nivel que no son 'features'
+(crs, totalFeatures, ...) se leen y se descartan.
+"""
+import json
+
+BLOQUE = 1 << 16   # caracteres por lectura
+
+
+class _Lector:
+    def __init__(self, fh, bloque=BLOQUE):
+        self.fh = fh
+        self.bloque = bloque
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.dec = json.JSONDecoder()
+
+    def _leer(self) -> bool:
+        if self.eof:
+            return False
+        # Compactamos lo ya consumido para no acumular el archivo en memoria
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        data = self.fh.read(self.bloque)
+        if not data:
+            self.eof = True
+            return False
+        self.buf += data
+        return True
+
+    def ver(self) -> str:
+        """Próximo carácter no blanco (sin consumirlo); '' al final del archivo."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._leer():
+                return ""
+
+    def esperar(self, c: str) -> None:
+        got = self.ver()
+        if got != c:
+            raise ValueError(f"GeoJSON inválido: se esperaba {c!r} y vino {got!r}")
+        self.pos += 1
+
+    def valor(self):
+        """Decodifica el próximo valor JSON completo."""
+        self.ver()
+        while True:
+            try:
+                obj, fin = self.dec.raw_decode(self.buf, self.pos)
+                # Un número al borde del bloque puede estar cortado: pedimos más
+                if fin < len(self.buf) or self.eof:
+                    self.pos = fin
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._leer()
+
+
+def iter_coleccion(path, bloque: int = BLOQUE):
+    """
+    Recorre un FeatureCollection en orden y sin cargarlo entero. Eventos:
+    ("miembro", clave, valor) por cada clave de primer nivel que no es
+    'features'; ("abrir",), ("feature", feature)... y ("cerrar",) para la
+    lista de features.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        lector = _Lector(fh, bloque)
+        lector.esperar("{")
+        encontrado = False
+        while True:
+            c = lector.ver()
+            if c == "}" or c == "":
+                break
+            if c == ",":
+                lector.pos += 1
+                continue
+            clave = lector.valor()
+            lector.esperar(":")
+            if clave != "features":
+                yield "miembro", clave, lector.valor()
+                continue
+
+            encontrado = True
+            lector.esperar("[")
+            yield ("abrir",)
+            while True:
+                c = lector.ver()
+                if c == "]":
+                    lector.pos += 1
+                    break
+                if c == ",":
+                    lector.pos += 1
+                    continue
+                if c == "":
+                    raise ValueError("GeoJSON inválido: 'features' sin cerrar")
+                yield "feature", lector.valor()
+            yield ("cerrar",)
+
+        if not encontrado:
+            raise ValueError("El JSON no contiene 'features'")
+
+
+def iter_features(path, bloque: int = BLOQUE):
+    """Itera los features de un FeatureCollection sin cargar el archivo entero."""
+    for evento in iter_coleccion(path, bloque):
+        if evento[0] == "feature":
+            yield evento[1]
+
+
+def _redondear(coords, digitos):
+    if isinstance(coords, float):
+        return round(coords, digitos)
+    if isinstance(coords, list):
+        return [_redondear(c, digitos) for c in coords]
+    return coords
+
+
+def limpiar_feature(feat, drop_null_props: bool = False, digitos: int | None = None):
+    """Quita propiedades nulas y/o redondea las coordenadas de un feature (en el lugar)."""
+    props = feat.get("properties")
+    if drop_null_props and isinstance(props, dict):
+        feat["properties"] = {k: v for k, v in props.items() if v is not None}
+    geom = feat.get("geometry")
+    if digitos is not None and isinstance(geom, dict):
+        if "coordinates" in geom:
+            geom["coordinates"] = _redondear(geom["coordinates"], digitos)
+        for g in geom.get("geometries") or ():
+            if isinstance(g, dict) and "coordinates" in g:
+                g["coordinates"] = _redondear(g["coordinates"], digitos)
+    return feat
+
+
+def reescribir(entrada, salida, indent: int | None = 2, sort_keys: bool = False,
+               drop_null_props: bool = False, digitos: int | None = None, bloque: int = BLOQUE) -> int:
+    """
+    Copia un FeatureCollection feature por feature aplicando limpiar_feature.
+    La memoria queda acotada al feature más grande; la salida es la misma que
+    daría json.dump(..., indent, sort_keys) salvo que las claves de primer
+    nivel quedan en el orden del archivo. Devuelve cuántos features escribió.
+    """
+    if indent is None:
+        salto = lambda nivel: ""
+        coma = ", "
+    else:
+        salto = lambda nivel: "\n" + " " * (indent * nivel)
+        coma = ","
+
+    def dump(obj, nivel):
+        texto = json.dumps(obj, ensure_ascii=False, indent=indent, sort_keys=sort_keys)
+        return texto if indent is None else texto.replace("\n", salto(nivel))
+
+    n = en_lista = 0
+    miembros = 0
+    with open(salida, "w", encoding="utf-8") as out:
+        out.write("{")
+        for evento in iter_coleccion(entrada, bloque):
+            tipo = evento[0]
+            if tipo == "feature":
+                feat = limpiar_feature(evento[1], drop_null_props, digitos)
+                out.write((coma if en_lista else "") + salto(2) + dump(feat, 2))
+                en_lista += 1
+                n += 1
+            elif tipo == "cerrar":
+                out.write((salto(1) if en_lista else "") + "]")
+            else:
+                out.write((coma if miembros else "") + salto(1))
+                miembros += 1
+                if tipo == "abrir":
+                    out.write('"features": [')
+                    en_lista = 0
+                else:
+                    out.write(json.dumps(evento[1], ensure_ascii=False) + ": " + dump(evento[2], 1))
+        out.write((salto(0) if miembros else "") + "}")
+    return n
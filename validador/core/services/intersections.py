@@ -0,0 +1,90 @@
+# validador/core/services/intersections.py
+from django.contrib.gis.geos import Point
+from django.db import connection, transaction
+from django.db.models import Q
+
+from validacion.parser import normalizar_via
+from validador.core.models import Street, StreetIntersection
+from validador.core.services import dataset_version
+
+# Cruces entre pares de calles: el && usa el índice GiST de core_street y
+# ST_Dump separa los puntos cuando dos calles se cruzan más de una vez.
+# Los tramos superpuestos (intersección lineal) no son esquinas y se descartan.
+SQL_CRUCES = """
+    SELECT a.id, b.id, ST_X(d.geom), ST_Y(d.geom)
+    FROM core_street a
+    JOIN core_street b
+      ON a.id < b.id
+     AND a.geom && b.geom
+     AND ST_Intersects(a.geom, b.geom)
+    CROSS JOIN LATERAL ST_Dump(ST_CollectionExtract(ST_Intersection(a.geom, b.geom), 1)) d
+"""
+
+
+def construir(batch_size: int = 5000) -> int:
+    """
+    Recalcula toda la tabla de esquinas. Se corre después de cargar calles
+    y avenidas; devuelve la cantidad de esquinas guardadas.
+    """
+    nombres = {pk: normalizar_via(name) for pk, name in Street.objects.values_list("id", "name")}
+
+    with connection.cursor() as cur:
+        cur.execute(SQL_CRUCES)
+        filas = cur.fetchall()
+
+    vistos = set()
+    objs = []
+    for ida, idb, x, y in filas:
+        na, nb = nombres.get(ida), nombres.get(idb)
+        if not na or not nb or na == nb:
+            continue  # tramos de la misma calle que se tocan
+        if nb < na:
+            na, nb, ida, idb = nb, na, idb, ida
+        clave = (na, nb, round(x, 6), round(y, 6))
+        if clave in vistos:
+            continue
+        vistos.add(clave)
+        objs.append(StreetIntersection(
+            name_a=na, name_b=nb, street_a_id=ida, street_b_id=idb,
+            geom=Point(x, y, srid=4326),
+        ))
+
+    with transaction.atomic():
+        StreetIntersection.objects.all().delete()
+        StreetIntersection.objects.bulk_create(objs, batch_size=batch_size)
+        dataset_version.bump("streetintersection")
+    return len(objs)
+
+
+def buscar_esquina(cand1, cand2, max_nombres: int = 2):
+    """
+    Esquina entre los mejores candidatos de cada calle (listas de Street, como
+    las devuelve buscar_via). Una sola consulta sobre el índice (name_a, name_b);
+    gana el par mejor rankeado. Devuelve la StreetIntersection o None.
+    """
+    def nombres(cands):
+        out = []
+        for s in cands:
+            n = normalizar_via(s.name)
+            if n and n not in out:
+                out.append(n)
+        return out[:max_nombres]
+
+    pares = []
+    for a in nombres(cand1):
+        for b in nombres(cand2):
+            if a != b:
+                pares.append((a, b) if a <= b else (b, a))
+    if not pares:
+        return None
+
+    filtro = Q()
+    for a, b in pares:
+        filtro |= Q(name_a=a, name_b=b)
+    encontrados = {}
+    for e in StreetIntersection.objects.filter(filtro).order_by("id"):
+        encontrados.setdefault((e.name_a, e.name_b), e)
+    for par in pares:
+        if par in encontrados:
+            return encontrados[par]
+    return None
@@ -0,0 +1,163 @@
+# validador/core/services/linear_ref.py
+"""
+Referencia lineal de alturas sobre los ejes de calle (StreetAxis).
+
+build_street_axes une los tramos de cada calle, mide cada parte y guarda el
+rango de numeración. Sin rangos oficiales, la numeración es métrica desde
+ALTURA_ORIGEN: cada parte se orienta para que empiece en su extremo más
+cercano al origen y las partes se ordenan por esa distancia, así el sentido
+es estable entre cargas. Igual es una aproximación ("aproximada"). En cada
+worker los ejes se cargan una vez con sus metros acumulados por vértice, así
+"Jujuy 1234" se resuelve con un bisect y una interpolación lineal, sin
+geometría en la base por request.
+"""
+from bisect import bisect_right
+import math
+
+from django.conf import settings
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection, transaction
+
+from validacion.parser import normalizar_via
+from validador.core.models import Street, StreetAxis
+from validador.core.services import dataset_version
+
+M_POR_GRADO_LAT = 110_540.0
+M_POR_GRADO_LON = 111_320.0
+
+# Une los tramos de cada grupo (misma calle), orienta y ordena las partes
+# desde el origen de la numeración y mide cada parte en metros
+SQL_EJES = """
+    WITH g AS (
+        SELECT unnest(%(ids)s::bigint[]) AS id, unnest(%(grupos)s::int[]) AS grupo
+    ), o AS (
+        SELECT ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326) AS p
+    ), m AS (
+        SELECT g.grupo, min(s.id) AS street_id, ST_LineMerge(ST_Union(s.geom)) AS geom
+        FROM core_street s
+        JOIN g ON g.id = s.id
+        GROUP BY g.grupo
+    ), d AS (
+        SELECT m.grupo, m.street_id,
+               CASE WHEN ST_Distance(ST_EndPoint(x.geom), o.p) < ST_Distance(ST_StartPoint(x.geom), o.p)
+                    THEN ST_Reverse(x.geom) ELSE x.geom END AS geom
+        FROM m CROSS JOIN o CROSS JOIN LATERAL ST_Dump(m.geom) x
+    )
+    SELECT d.grupo, min(d.street_id),
+           ST_AsEWKB(ST_Multi(ST_Collect(d.geom ORDER BY ST_Distance(ST_StartPoint(d.geom), o.p),
+                                                         ST_AsEWKB(d.geom)))),
+           array_agg(ST_Length(d.geom::geography) ORDER BY ST_Distance(ST_StartPoint(d.geom), o.p),
+                                                             ST_AsEWKB(d.geom))
+    FROM d CROSS JOIN o
+    GROUP BY d.grupo
+"""
+
+
+def _metros(a, b) -> float:
+    """Distancia aproximada (equirectangular) entre dos (lon, lat); sobra a escala de ciudad."""
+    lat = math.radians((a[1] + b[1]) / 2)
+    dx = (b[0] - a[0]) * M_POR_GRADO_LON * math.cos(lat)
+    dy = (b[1] - a[1]) * M_POR_GRADO_LAT
+    return math.hypot(dx, dy)
+
+
+def construir(batch_size: int = 1000) -> int:
+    """Recalcula core_streetaxis a partir de core_street. Devuelve cuántos ejes guardó."""
+    grupos = {}
+    ids, nro_grupo = [], []
+    for pk, kind, name in Street.objects.values_list("id", "kind", "name"):
+        clave = (kind, normalizar_via(name))
+        if not clave[1]:
+            continue
+        ids.append(pk)
+        nro_grupo.append(grupos.setdefault(clave, len(grupos)))
+    claves = {n: clave for clave, n in grupos.items()}
+
+    lon, lat = getattr(settings, "ALTURA_ORIGEN", (-55.8961, -27.3671))
+    with connection.cursor() as cur:
+        cur.execute(SQL_EJES, {"ids": ids, "grupos": nro_grupo, "lon": lon, "lat": lat})
+        filas = cur.fetchall()
+
+    por_metro = getattr(settings, "ALTURA_POR_METRO", 1.0)
+    objs = []
+    for grupo, street_id, wkb, largos in filas:
+        kind, name = claves[grupo]
+        parts, acum = [], 0.0
+        for largo in largos:
+            parts.append([round(acum, 2), round(acum + largo, 2)])
+            acum += largo
+        objs.append(StreetAxis(
+            name=name[:100], kind=kind, street_id=street_id,
+            geom=GEOSGeometry(bytes(wkb)),
+            length_m=acum, desde=0, hasta=int(round(acum * por_metro)),
+            parts=parts,
+        ))
+
+    with transaction.atomic():
+        StreetAxis.objects.all().delete()
+        StreetAxis.objects.bulk_create(objs, batch_size=batch_size)
+        dataset_version.bump("streetaxis")
+    return len(objs)
+
+
+class Eje:
+    """Eje de una calle en memoria: vértices y metros acumulados por parte."""
+
+    def __init__(self, axis):
+        self.desde, self.hasta = axis.desde, axis.hasta
+        self.length_m = axis.length_m
+        self.inicios = []
+        self.partes = []          # [(coords, acumulados)] alineado con inicios
+        for (m_ini, m_fin), linea in zip(axis.parts, axis.geom):
+            coords = linea.coords
+            acum = [0.0]
+            for a, b in zip(coords, coords[1:]):
+                acum.append(acum[-1] + _metros(a, b))
+            # Escalamos al largo geodésico medido en la base
+            escala = (m_fin - m_ini) / acum[-1] if acum[-1] else 0.0
+            self.inicios.append(m_ini)
+            self.partes.append((coords, [m_ini + x * escala for x in acum]))
+
+    def punto(self, numero: int):
+        """(lon, lat) de la altura, o None si está fuera del rango del eje."""
+        if not self.partes or self.hasta <= self.desde or not self.desde <= numero <= self.hasta:
+            return None
+        m = (numero - self.desde) / (self.hasta - self.desde) * self.length_m
+        coords, acum = self.partes[max(0, bisect_right(self.inicios, m) - 1)]
+        if len(coords) == 1:
+            return tuple(coords[0])
+        j = min(max(0, bisect_right(acum, m) - 1), len(coords) - 2)
+        tramo = acum[j + 1] - acum[j]
+        t = min(max((m - acum[j]) / tramo, 0.0), 1.0) if tramo else 0.0
+        (x0, y0), (x1, y1) = coords[j][:2], coords[j + 1][:2]
+        return (x0 + (x1 - x0) * t, y0 + (y1 - y0) * t)
+
+
+def altura_en(desde, hasta, length_m, parts, parte, fraccion):
+    """
+    Inversa de Eje.punto: altura para la posición `fraccion` (0..1) sobre la
+    parte `parte` (0-based) del eje. La usa la geocodificación inversa.
+    """
+    if not parts or hasta <= desde or not length_m or not 0 <= parte < len(parts):
+        return None
+    m_ini, m_fin = parts[parte]
+    m = m_ini + (m_fin - m_ini) * fraccion
+    return int(round(desde + m / length_m * (hasta - desde)))
+
+
+def _cargar():
+    return {(a.kind, a.name): Eje(a) for a in StreetAxis.objects.all()}
+
+
+_ejes = dataset_version.PorVersion(["streetaxis"], _cargar)
+
+
+def eje_de(street):
+    """Eje de la calle a la que pertenece un tramo (Street), o None."""
+    return _ejes.get().get((street.kind, normalizar_via(street.name)))
+
+
+def interpolar(street, numero: int):
+    """(lon, lat) para `numero` sobre la calle de `street`, o None."""
+    eje = eje_de(street)
+    return eje.punto(numero) if eje else None
@@ -1,32 +1,53 @@
 # services/llm_service.py
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import logging
 import os
 import random
 
+logger = logging.getLogger(__name__)
+
 client = None
 try:
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 except Exception:
     client = None  # si no hay clave, seguimos en modo offline
 
+aclient = None
+try:
+    aclient = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+except Exception:
+    aclient = None  # idem para la versión async (chat en streaming)
+
 SYSTEM_PROMPT = (
     "Sos VADI, un asistente que valida direcciones en Posadas, Misiones. "
     "Respondé corto y claro."
 )
 
+def _mensajes(user_text: str, val_json: dict) -> list:
+    content = f"Entrada: {user_text}\nResultado: {val_json}"
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": content},
+    ]
+
+def _respuesta_simulada(user_text: str, val_json: dict) -> str:
+    respuestas = [
+        f"Dirección procesada: {val_json.get('normalized','(sin normalizar)') or user_text}",
+        "Parece válida. ¿Querés que la confirme en el mapa?",
+        "No encontré coincidencias exactas, pero podría ser una variante conocida.",
+        "Te entiendo, pero necesito el número o manzana para precisar la ubicación.",
+    ]
+    return random.choice(respuestas)
+
 def craft_reply(user_text: str, val_json: dict) -> str:
     """
     Genera respuesta con LLM o simula si no hay crédito/Internet.
     """
     try:
         if client:
-            content = f"Entrada: {user_text}\nResultado: {val_json}"
             completion = client.chat.completions.create(
                 model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": content},
-                ],
+                messages=_mensajes(user_text, val_json),
                 temperature=0.3,
                 max_tokens=150,
             )
@@ -37,10 +58,31 @@ def craft_reply(user_text: str, val_json: dict) -> str:
     except Exception as e:
         print(f"⚠️ Error en craft_reply: {e}")
         # --- Simulación local ---
-        respuestas = [
-            f"Dirección procesada: {val_json.get('normalized','(sin normalizar)') or user_text}",
-            "Parece válida. ¿Querés que la confirme en el mapa?",
-            "No encontré coincidencias exactas, pero podría ser una variante conocida.",
-            "Te entiendo, pero necesito el número o manzana para precisar la ubicación.",
-        ]
-        return random.choice(respuestas)
+        return _respuesta_simulada(user_text, val_json)
+
+async def craft_reply_stream(user_text: str, val_json: dict):
+    """
+    Igual que craft_reply pero async y en streaming: va devolviendo los
+    fragmentos de texto a medida que llegan. Sin cliente (o si falla antes
+    de emitir algo) devuelve la respuesta simulada en un solo fragmento.
+    """
+    emitido = False
+    try:
+        if not aclient:
+            raise Exception("offline")
+        stream = await aclient.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=_mensajes(user_text, val_json),
+            temperature=0.3,
+            max_tokens=150,
+            stream=True,
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                emitido = True
+                yield delta
+    except Exception as e:
+        logger.warning("Error en craft_reply_stream: %s", e)
+        if not emitido:
+            yield _respuesta_simulada(user_text, val_json)
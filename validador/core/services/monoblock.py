@@ -0,0 +1,54 @@
+# validador/core/services/monoblock.py
+"""
+Zonas de monoblocks precalculadas (comando build_monoblock_zones).
+
+Marca zona_monoblock en cada tramo de calle y en cada manzana que tenga
+algún edificio a menos de RADIO_MONOBLOCK_M metros. Así, al validar una
+dirección, saber si hay que pedir torre/escalera/depto es leer una marca
+(spatial_index o las columnas) y no una búsqueda por radio en cada request.
+Se recalcula solo cuando cambian calles, manzanas o edificios (load_all).
+"""
+from django.db import connection, transaction
+
+from validador.core.services import dataset_version
+from validador.core.services.address_hierarchy import RADIO_MONOBLOCK_M
+
+# Prefiltro en grados para el && con el índice GiST (el ST_DWithin exacto va
+# en metros sobre geography): 1° de longitud mide más de 90 km hasta los 35°S.
+METROS_POR_GRADO_MIN = 90000.0
+
+SQL_MARCAR = """
+    UPDATE {tabla} t
+    SET zona_monoblock = f.marca
+    FROM (
+        SELECT g.id, EXISTS (
+            SELECT 1 FROM core_building b
+            WHERE b.geom && ST_Expand(g.geom, %(grados)s)
+              AND ST_DWithin(b.geom::geography, g.geom::geography, %(radio)s)
+        ) AS marca
+        FROM {tabla} g
+        {filtro}
+    ) f
+    WHERE t.id = f.id AND t.zona_monoblock IS DISTINCT FROM f.marca
+"""
+
+# tabla -> (capa versionada, filtro de filas)
+TABLAS = {
+    "core_street": ("street", ""),
+    "core_blockgrid": ("blockgrid", "WHERE g.manzana IS NOT NULL"),   # las chacras no se marcan
+}
+
+
+def recalcular(radio_m: float = RADIO_MONOBLOCK_M) -> dict:
+    """Actualiza las marcas; devuelve cuántas filas cambiaron por tabla."""
+    params = {"radio": radio_m, "grados": radio_m / METROS_POR_GRADO_MIN}
+    out, capas = {}, []
+    with transaction.atomic(), connection.cursor() as cur:
+        for tabla, (capa, filtro) in TABLAS.items():
+            cur.execute(SQL_MARCAR.format(tabla=tabla, filtro=filtro), params)
+            out[tabla] = cur.rowcount
+            if cur.rowcount:
+                capas.append(capa)
+        if capas:
+            dataset_version.bump(*capas)
+    return out
@@ -0,0 +1,191 @@
+# validador/core/services/querylog_buffer.py
+"""
+Escritura diferida (write-behind) de QueryLog.
+
+Los requests encolan instancias sin guardar con registrar() y un hilo por
+proceso las inserta con bulk_create cuando se junta BATCH_SIZE o pasa
+FLUSH_INTERVAL. La cola está acotada (MAX_SIZE); si se llena se aplica POLICY:
+  - "drop_oldest": se descarta el registro más viejo (default)
+  - "drop_new":    se descarta el que llega
+  - "block":       el request espera hasta BLOCK_TIMEOUT y, si sigue llena, descarta
+  - "sync":        el request escribe su registro en el momento (backpressure)
+Al terminar el proceso se vacía la cola (atexit).
+"""
+from collections import deque
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from validador.core.models import QueryLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MAX_SIZE": 10000,
+    "BATCH_SIZE": 500,
+    "FLUSH_INTERVAL": 2.0,
+    "POLICY": "drop_oldest",
+    "BLOCK_TIMEOUT": 0.5,
+}
+
+
+def _conf(clave):
+    return getattr(settings, "QUERYLOG_BUFFER", {}).get(clave, DEFAULTS[clave])
+
+
+class QueryLogBuffer:
+    def __init__(self, max_size, batch_size, flush_interval, policy, block_timeout):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.cola = deque()
+        self.cond = threading.Condition()
+        self.stats = {"encolados": 0, "escritos": 0, "descartados": 0, "errores": 0}
+        self._hilo = None
+        self._pid = None
+        self._parar = False
+
+    # --- lado request ---
+
+    def put(self, obj) -> bool:
+        """Encola un QueryLog sin guardar. Devuelve False si se descartó."""
+        self._arrancar()
+        sincronico = False
+        with self.cond:
+            lleno = len(self.cola) >= self.max_size
+            if lleno:
+                self.cond.notify_all()   # que el hilo vacíe cuanto antes
+            if lleno and self.policy == "drop_oldest":
+                self.cola.popleft()
+                self.stats["descartados"] += 1
+                lleno = False
+            elif lleno and self.policy == "block":
+                lleno = not self.cond.wait_for(lambda: len(self.cola) < self.max_size,
+                                               self.block_timeout)
+
+            if lleno and self.policy == "sync":
+                sincronico = True
+            elif lleno:
+                self.stats["descartados"] += 1
+                return False
+            else:
+                self.cola.append(obj)
+                self.stats["encolados"] += 1
+                if len(self.cola) >= self.batch_size:
+                    self.cond.notify_all()
+        if sincronico:
+            self._escribir([obj])
+        return True
+
+    # --- lado hilo ---
+
+    def _arrancar(self):
+        # Un hilo por proceso: si el worker se forkeó, el hilo del padre no existe acá
+        if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        with self.cond:
+            if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+                return
+            if self._pid != os.getpid():
+                self.cola.clear()
+            self._pid = os.getpid()
+            self._parar = False
+            self._hilo = threading.Thread(target=self._run, name="querylog-buffer", daemon=True)
+            self._hilo.start()
+
+    def _tomar(self):
+        with self.cond:
+            n = min(len(self.cola), self.batch_size)
+            lote = [self.cola.popleft() for _ in range(n)]
+            self.cond.notify_all()   # libera a los que esperan con policy "block"
+        return lote
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self._parar or len(self.cola) >= self.batch_size,
+                                   self.flush_interval)
+                parar = self._parar
+            self._vaciar()
+            if parar:
+                break
+        connection.close()
+
+    def _vaciar(self):
+        while True:
+            lote = self._tomar()
+            if not lote:
+                return
+            self._escribir(lote)
+
+    def _escribir(self, lote):
+        try:
+            QueryLog.objects.bulk_create(lote, batch_size=self.batch_size)
+            with self.cond:
+                self.stats["escritos"] += len(lote)
+        except Exception as e:
+            # no reintentamos: el log nunca debe trabar el servicio
+            with self.cond:
+                self.stats["errores"] += len(lote)
+            logger.warning("No se pudieron guardar %s QueryLog: %s", len(lote), e)
+            connection.close()
+
+    def flush(self):
+        """Escribe todo lo pendiente desde el hilo que llama."""
+        self._vaciar()
+
+    def stop(self, timeout=5.0):
+        """Detiene el hilo vaciando la cola (lo usa atexit)."""
+        hilo = self._hilo
+        with self.cond:
+            self._parar = True
+            self.cond.notify_all()
+        if hilo is not None and hilo.is_alive() and self._pid == os.getpid():
+            hilo.join(timeout)
+        self._vaciar()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def buffer() -> QueryLogBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = QueryLogBuffer(
+                    max_size=_conf("MAX_SIZE"),
+                    batch_size=_conf("BATCH_SIZE"),
+                    flush_interval=_conf("FLUSH_INTERVAL"),
+                    policy=_conf("POLICY"),
+                    block_timeout=_conf("BLOCK_TIMEOUT"),
+                )
+                atexit.register(_buffer.stop)
+    return _buffer
+
+
+def registrar(obj) -> bool:
+    """
+    Registra un QueryLog sin guardar. Con QUERYLOG_BUFFER["ENABLED"] = False
+    (tests, comandos) lo guarda en el momento.
+    """
+    if not _conf("ENABLED"):
+        obj.save()
+        return True
+    return buffer().put(obj)
+
+
+def estadisticas() -> dict:
+    b = _buffer
+    if b is None:
+        return {"pendientes": 0, "encolados": 0, "escritos": 0, "descartados": 0, "errores": 0}
+    with b.cond:
+        return {"pendientes": len(b.cola), **b.stats}
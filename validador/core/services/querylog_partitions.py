@@ -0,0 +1,177 @@
+# validador/core/services/querylog_partitions.py
+"""
+Particiones mensuales de core_querylog (tabla particionada por rango de
+created_at, ver migración 0016) y archivo de los meses viejos.
+
+Cada mes local (TIME_ZONE) es una partición core_querylog_pAAAAMM; lo que
+caiga fuera de las particiones creadas va a core_querylog_default, que no
+debería tener filas si el comando querylog_partitions corre seguido. Los
+filtros por rango de created_at (dashboard, rollups, heatmap) leen solo las
+particiones de esos meses.
+
+Archivar un mes: exporta sus filas a <ARCHIVE_DIR>/querylog-AAAA-MM.ndjson.gz,
+y recién entonces desengancha y borra la partición. El resumen diario
+(QueryLogDaily) se consolida antes, así el dashboard conserva esos días.
+"""
+from datetime import date
+from pathlib import Path
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from validador.core.services import rollups
+
+TABLA = "core_querylog"
+DEFAULT = "core_querylog_default"
+PATRON = re.compile(r"^core_querylog_p(\d{4})(\d{2})$")
+FILAS_POR_FETCH = 5000
+
+
+def _conf(clave, defecto):
+    return getattr(settings, "QUERYLOG_PARTITIONS", {}).get(clave, defecto)
+
+
+def inicio_mes(d: date) -> date:
+    return d.replace(day=1)
+
+
+def sumar_meses(mes: date, n: int) -> date:
+    k = mes.year * 12 + mes.month - 1 + n
+    return date(k // 12, k % 12 + 1, 1)
+
+
+def nombre(mes: date) -> str:
+    return f"{TABLA}_p{mes:%Y%m}"
+
+
+def particionada() -> bool:
+    with connection.cursor() as cur:
+        cur.execute("SELECT relkind FROM pg_class WHERE relname = %s", [TABLA])
+        fila = cur.fetchone()
+    return bool(fila) and fila[0] == "p"
+
+
+def particiones() -> dict:
+    """Meses con partición propia: {date(AAAA, MM, 1): nombre}."""
+    with connection.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = %s
+        """, [TABLA])
+        nombres = [r[0] for r in cur.fetchall()]
+    out = {}
+    for n in nombres:
+        m = PATRON.match(n)
+        if m:
+            out[date(int(m.group(1)), int(m.group(2)), 1)] = n
+    return dict(sorted(out.items()))
+
+
+def primer_dia() -> date | None:
+    """
+    Primer día que todavía está en la base (inicio de la partición más vieja),
+    o None si la tabla no está particionada. Lo anterior ya se archivó: su
+    resumen diario no se puede rehacer.
+    """
+    if not particionada():
+        return None
+    meses = particiones()
+    return min(meses) if meses else None
+
+
+def crear(mes: date) -> bool:
+    """
+    Crea la partición del mes si no existe. Si core_querylog_default ya tiene
+    filas de ese mes, las mueve a la partición nueva (Postgres no deja crear
+    una partición que se superponga con filas del default).
+    """
+    mes = inicio_mes(mes)
+    if mes in particiones():
+        return False
+    desde, hasta = rollups.inicio_dia(mes), rollups.inicio_dia(sumar_meses(mes, 1))
+    tabla = nombre(mes)
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(f"SELECT 1 FROM {DEFAULT} WHERE created_at >= %s AND created_at < %s LIMIT 1",
+                    [desde, hasta])
+        if cur.fetchone() is None:
+            cur.execute(f"CREATE TABLE {tabla} PARTITION OF {TABLA} FOR VALUES FROM (%s) TO (%s)",
+                        [desde, hasta])
+            return True
+        cur.execute(f"ALTER TABLE {TABLA} DETACH PARTITION {DEFAULT}")
+        cur.execute(f"CREATE TABLE {tabla} PARTITION OF {TABLA} FOR VALUES FROM (%s) TO (%s)",
+                    [desde, hasta])
+        cur.execute(f"INSERT INTO {tabla} SELECT * FROM {DEFAULT} WHERE created_at >= %s AND created_at < %s",
+                    [desde, hasta])
+        cur.execute(f"DELETE FROM {DEFAULT} WHERE created_at >= %s AND created_at < %s", [desde, hasta])
+        cur.execute(f"ALTER TABLE {TABLA} ATTACH PARTITION {DEFAULT} DEFAULT")
+    return True
+
+
+def asegurar(hoy: date | None = None, adelante: int | None = None) -> list:
+    """Crea las particiones del mes actual y de los `adelante` siguientes. Devuelve las creadas."""
+    hoy = hoy or timezone.localdate()
+    adelante = _conf("AHEAD", 3) if adelante is None else adelante
+    mes = inicio_mes(hoy)
+    return [nombre(m) for m in (sumar_meses(mes, k) for k in range(adelante + 1)) if crear(m)]
+
+
+def vencidas(hoy: date | None = None, meses: int | None = None) -> list:
+    """Meses con partición anteriores a la ventana de retención (0 = no vence nada)."""
+    meses = _conf("RETENTION_MONTHS", 12) if meses is None else meses
+    if not meses:
+        return []
+    corte = sumar_meses(inicio_mes(hoy or timezone.localdate()), -meses)
+    return [m for m in particiones() if m < corte]
+
+
+def directorio() -> Path:
+    return Path(_conf("ARCHIVE_DIR", Path(settings.ROOT_DIR) / "data" / "archive" / "querylog"))
+
+
+def exportar(mes: date, destino: Path | None = None) -> tuple:
+    """
+    Vuelca la partición del mes a NDJSON comprimido (una fila por línea, en
+    orden de created_at, id) leyendo con un cursor del lado del servidor.
+    Devuelve (ruta, filas).
+    """
+    destino = Path(destino or directorio())
+    destino.mkdir(parents=True, exist_ok=True)
+    ruta = destino / f"querylog-{mes:%Y-%m}.ndjson.gz"
+    tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+    n = 0
+    try:
+        with transaction.atomic(), connection.cursor() as cur, \
+                gzip.open(tmp, "wt", encoding="utf-8") as out:
+            cur.execute(f"DECLARE archivo NO SCROLL CURSOR FOR "
+                        f"SELECT row_to_json(t)::text FROM {nombre(mes)} t ORDER BY created_at, id")
+            while True:
+                cur.execute(f"FETCH {FILAS_POR_FETCH} FROM archivo")
+                filas = cur.fetchall()
+                if not filas:
+                    break
+                out.writelines(f"{linea}\n" for (linea,) in filas)
+                n += len(filas)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, ruta)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return ruta, n
+
+
+def archivar(mes: date, destino: Path | None = None) -> tuple:
+    """Consolida el resumen, exporta el mes y borra su partición. Devuelve (ruta, filas)."""
+    rollups.consolidar()
+    ruta, n = exportar(mes, destino)
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(f"ALTER TABLE {TABLA} DETACH PARTITION {nombre(mes)}")
+        cur.execute(f"DROP TABLE {nombre(mes)}")
+    return ruta, n
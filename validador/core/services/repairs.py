@@ -0,0 +1,57 @@
+# validador/core/services/repairs.py
+"""
+Reparación de atributos por overlay espacial (versión de sql/reparación_datos.sql
+sobre las tablas del modelo). Completa lo que las capas no traen:
+  - manzanas (BlockGrid del manzanero) sin chacra -> chacra que las contiene
+  - edificios sin chacra -> chacra que los contiene
+  - edificios sin manzana -> manzana que los contiene
+Las chacras son los BlockGrid cargados con --type chacra (manzana nula). Solo
+toca filas con el campo vacío, así es idempotente. La corre load_all después
+de cargar las capas.
+"""
+from django.db import connection, transaction
+
+from validador.core.services import dataset_version
+
+CHACRAS = "SELECT chacra, geom FROM core_blockgrid WHERE manzana IS NULL AND chacra IS NOT NULL"
+
+PASOS = (
+    ("manzanas_sin_chacra", "blockgrid", f"""
+        UPDATE core_blockgrid bg
+        SET chacra = c.chacra
+        FROM ({CHACRAS}) c
+        WHERE bg.chacra IS NULL AND bg.manzana IS NOT NULL
+          AND c.geom && bg.geom
+          AND ST_Contains(c.geom, ST_PointOnSurface(bg.geom))
+    """),
+    ("edificios_sin_chacra", "building", f"""
+        UPDATE core_building b
+        SET chacra = c.chacra
+        FROM ({CHACRAS}) c
+        WHERE b.chacra IS NULL
+          AND c.geom && b.geom
+          AND ST_Contains(c.geom, b.geom)
+    """),
+    ("edificios_sin_manzana", "building", """
+        UPDATE core_building b
+        SET manzana = m.manzana
+        FROM core_blockgrid m
+        WHERE b.manzana IS NULL AND m.manzana IS NOT NULL
+          AND m.geom && b.geom
+          AND ST_Contains(m.geom, b.geom)
+    """),
+)
+
+
+def reparar() -> dict:
+    """Corre los pasos en orden; devuelve filas actualizadas por paso."""
+    out, capas = {}, set()
+    with transaction.atomic(), connection.cursor() as cur:
+        for nombre, capa, sql in PASOS:
+            cur.execute(sql)
+            out[nombre] = cur.rowcount
+            if cur.rowcount:
+                capas.add(capa)
+        if capas:
+            dataset_version.bump(*sorted(capas))
+    return out
@@ -0,0 +1,175 @@
+# validador/core/services/result_cache.py
+"""
+Caché de resultados de validación en dos niveles:
+  1) LRU en memoria del proceso (acotado por cantidad y TTL)
+  2) backend de caché de Django compartido entre workers (VALIDATION_CACHE["ALIAS"])
+
+La clave sale de normalizar()/parsear() del texto más la firma de versiones de
+las capas: cuando load_geojson/load_all recargan una capa cambia la firma, el
+LRU local se vacía y las entradas viejas del backend compartido quedan huérfanas
+hasta que expiran.
+"""
+from collections import OrderedDict
+import copy
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from validacion.parser import normalizar, parsear
+from validador.core.services import dataset_version
+
+DEFAULTS = {
+    "ENABLED": True,
+    "ALIAS": "default",     # None = solo LRU local
+    "TTL": 3600,            # segundos en el backend compartido
+    "LRU_SIZE": 5000,       # entradas por proceso
+    "LRU_TTL": 600,         # segundos en el LRU local
+    "PREFIX": "vadi:val",
+}
+
+_FALTA = object()
+
+
+def _conf(clave):
+    return getattr(settings, "VALIDATION_CACHE", {}).get(clave, DEFAULTS[clave])
+
+
+class LRU:
+    def __init__(self, maximo, ttl):
+        self.maximo, self.ttl = maximo, ttl
+        self.datos = OrderedDict()       # clave -> (vence, valor)
+        self.lock = threading.Lock()
+
+    def get(self, clave):
+        with self.lock:
+            item = self.datos.get(clave)
+            if item is None:
+                return _FALTA
+            if item[0] < time.monotonic():
+                del self.datos[clave]
+                return _FALTA
+            self.datos.move_to_end(clave)
+            return item[1]
+
+    def set(self, clave, valor):
+        with self.lock:
+            self.datos[clave] = (time.monotonic() + self.ttl, valor)
+            self.datos.move_to_end(clave)
+            while len(self.datos) > self.maximo:
+                self.datos.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.datos.clear()
+
+
+_lru = None
+_lru_firma = None
+_stats = {"hits_lru": 0, "hits_shared": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _contar(campo, n=1):
+    with _stats_lock:
+        _stats[campo] += n
+
+
+def _local(firma):
+    """LRU del proceso; se vacía cuando cambia la firma de las capas."""
+    global _lru, _lru_firma
+    if _lru is None:
+        _lru = LRU(_conf("LRU_SIZE"), _conf("LRU_TTL"))
+    if firma != _lru_firma:
+        _lru.clear()
+        _lru_firma = firma
+    return _lru
+
+
+def _compartida():
+    alias = _conf("ALIAS")
+    return caches[alias] if alias else None
+
+
+def clave(espacio: str, texto: str, firma: str) -> str:
+    normalizado = normalizar(texto or "")
+    parsed = json.dumps(parsear(texto or ""), sort_keys=True, ensure_ascii=False)
+    h = hashlib.sha1(f"{espacio}|{normalizado}|{parsed}".encode("utf-8")).hexdigest()
+    return f"{_conf('PREFIX')}:{firma}:{h}"
+
+
+def obtener(espacio: str, texto: str, calcular):
+    """
+    Resultado cacheado de `calcular()` para `texto`. `espacio` separa
+    resultados de funciones distintas ('resolver', ...).
+    """
+    return obtener_muchos(espacio, [texto], lambda pendientes: [calcular()])[0]
+
+
+def obtener_muchos(espacio: str, textos, calcular_lote):
+    """
+    Versión por lotes: busca todos los textos en caché y llama una sola vez a
+    `calcular_lote(indices_pendientes)`, que devuelve los resultados faltantes
+    en ese orden. Devuelve la lista completa alineada con `textos`.
+    """
+    if not _conf("ENABLED"):
+        return list(calcular_lote(list(range(len(textos)))))
+
+    firma = dataset_version.firma()
+    lru, compartida = _local(firma), _compartida()
+    claves = [clave(espacio, t, firma) for t in textos]
+    out = [_FALTA] * len(textos)
+
+    for i, k in enumerate(claves):
+        v = lru.get(k)
+        if v is not _FALTA:
+            out[i] = copy.deepcopy(v)
+            _contar("hits_lru")
+
+    faltan = [i for i, v in enumerate(out) if v is _FALTA]
+    if faltan and compartida is not None:
+        encontrados = compartida.get_many([claves[i] for i in faltan])
+        for i in faltan:
+            v = encontrados.get(claves[i], _FALTA)
+            if v is not _FALTA:
+                lru.set(claves[i], v)
+                out[i] = copy.deepcopy(v)
+                _contar("hits_shared")
+        faltan = [i for i in faltan if out[i] is _FALTA]
+
+    if faltan:
+        # Textos repetidos dentro del lote se calculan una sola vez
+        primero = {}
+        for i in faltan:
+            primero.setdefault(claves[i], i)
+        unicos = list(primero.values())
+        _contar("misses", len(unicos))
+        para_compartida = {}
+        for i, v in zip(unicos, calcular_lote(unicos)):
+            lru.set(claves[i], copy.deepcopy(v))
+            para_compartida[claves[i]] = v
+        for i in faltan:
+            v = para_compartida[claves[i]]
+            out[i] = v if primero[claves[i]] == i else copy.deepcopy(v)
+        if compartida is not None:
+            compartida.set_many(para_compartida, timeout=_conf("TTL"))
+    return out
+
+
+def estadisticas() -> dict:
+    """Contadores de este proceso: aciertos por nivel, fallos y tamaño del LRU."""
+    with _stats_lock:
+        data = dict(_stats)
+    total = data["hits_lru"] + data["hits_shared"] + data["misses"]
+    data["hit_ratio"] = round((total - data["misses"]) / total, 4) if total else 0.0
+    data["lru_size"] = len(_lru.datos) if _lru is not None else 0
+    return data
+
+
+def limpiar() -> None:
+    """Vacía el LRU local (el compartido se invalida solo por la firma de versiones)."""
+    if _lru is not None:
+        _lru.clear()
@@ -0,0 +1,129 @@
+# validador/core/services/reverse_geocode.py
+"""
+Geocodificación inversa: (lon, lat) -> calle y altura, chacra/manzana,
+parcela y edificio cercano, en una sola consulta.
+
+Cada parte es un LATERAL independiente que usa el índice GiST de su capa:
+  - eje de calle más cercano con KNN (ORDER BY geom <-> p LIMIT 1) y la
+    posición sobre la parte más cercana (ST_LineLocatePoint) para la altura
+  - BlockGrid y Parcel que contienen el punto (ST_Contains); en BlockGrid
+    la manzana antes que la chacra que la contiene, como contexto_punto_sql
+  - edificio más cercano con KNN; el radio se aplica después, así el índice
+    nunca recorre la tabla entera buscando uno que cumpla
+"""
+import json
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from validacion.parser import ABREVIATURAS
+from validador.core.services.linear_ref import altura_en
+
+SQL_INVERSA = """
+    WITH p AS (SELECT ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326) AS g)
+    SELECT
+        a.street_id, s.name, a.kind, a.desde, a.hasta, a.length_m, a.parts, a.parte, a.frac,
+        ST_Distance(a.geom::geography, p.g::geography),
+        bg.barrio, bg.chacra, bg.manzana,
+        pa.id, pa.gid, pa.chacra, pa.block, pa.lot, pa.parcel,
+        b.id, b.numero, b.letra, b.escalera, b.barrio,
+        ST_Distance(b.geom::geography, p.g::geography)
+    FROM p
+    LEFT JOIN LATERAL (
+        SELECT x.*, d.path[1] - 1 AS parte, ST_LineLocatePoint(d.geom, p.g) AS frac
+        FROM (
+            SELECT street_id, kind, desde, hasta, length_m, parts, geom
+            FROM core_streetaxis
+            ORDER BY geom <-> p.g
+            LIMIT 1
+        ) x
+        CROSS JOIN LATERAL (
+            SELECT dd.path, dd.geom FROM ST_Dump(x.geom) dd ORDER BY dd.geom <-> p.g LIMIT 1
+        ) d
+    ) a ON true
+    LEFT JOIN core_street s ON s.id = a.street_id
+    LEFT JOIN LATERAL (
+        SELECT barrio, chacra, manzana FROM core_blockgrid
+        WHERE ST_Contains(geom, p.g) ORDER BY manzana IS NULL, id LIMIT 1
+    ) bg ON true
+    LEFT JOIN LATERAL (
+        SELECT id, gid, chacra, block, lot, parcel FROM core_parcel
+        WHERE ST_Contains(geom, p.g) ORDER BY id LIMIT 1
+    ) pa ON true
+    LEFT JOIN LATERAL (
+        SELECT id, numero, letra, escalera, barrio, geom FROM core_building
+        ORDER BY geom <-> p.g LIMIT 1
+    ) b ON true
+"""
+
+
+def nombre_calle(nombre: str) -> str:
+    """
+    Nombre para mostrar a partir del de la capa, sin el tipo ni el código:
+    "CALLE JUJUY(49)" -> "Jujuy", "AV. ROQUE PÉREZ" -> "Roque Pérez".
+    """
+    t = re.sub(r"\(\s*\d+\s*\)\s*$", "", nombre or "").split()
+    if len(t) > 1 and ABREVIATURAS.get(t[0].lower(), t[0].lower()) in ("calle", "avenida"):
+        t = t[1:]
+    t = " ".join(t)
+    return t.title() if t.isupper() else t
+
+
+def _conf(clave, default):
+    return getattr(settings, "REVERSE_GEOCODE", {}).get(clave, default)
+
+
+def geocodificar(lon: float, lat: float, radio_edificio_m: float | None = None) -> dict:
+    radio_calle = _conf("RADIO_CALLE_M", 150)
+    radio_edificio = radio_edificio_m if radio_edificio_m is not None else _conf("RADIO_EDIFICIO_M", 60)
+
+    with connection.cursor() as cur:
+        cur.execute(SQL_INVERSA, {"lon": lon, "lat": lat})
+        (street_id, nombre, kind, desde, hasta, length_m, parts, parte, frac, dist_calle,
+         barrio, chacra, manzana,
+         parcel_id, gid, p_chacra, p_block, p_lot, p_parcel,
+         b_id, b_numero, b_letra, b_escalera, b_barrio, dist_edif) = cur.fetchone()
+
+    calle = None
+    if street_id is not None and dist_calle is not None and dist_calle <= radio_calle:
+        if isinstance(parts, str):     # Django lee jsonb como texto en cursores crudos
+            parts = json.loads(parts)
+        calle = {
+            "id": street_id,
+            "nombre": nombre_calle(nombre),
+            "tipo": kind,
+            "altura": altura_en(desde, hasta, length_m, parts, parte, frac),
+            "distancia_m": round(dist_calle, 1),
+        }
+
+    edificio = None
+    if b_id is not None and dist_edif is not None and dist_edif <= radio_edificio:
+        edificio = {
+            "id": b_id, "numero": b_numero, "letra": b_letra, "escalera": b_escalera,
+            "barrio": b_barrio, "distancia_m": round(dist_edif, 1),
+        }
+
+    parcela = None
+    if parcel_id is not None:
+        parcela = {"id": parcel_id, "gid": gid, "chacra": p_chacra,
+                   "manzana": p_block, "lote": p_lot, "parcela": p_parcel}
+
+    partes = []
+    if calle:
+        partes.append(f"{(calle['tipo'] or '').title()} {calle['nombre']}"
+                      + (f" {calle['altura']}" if calle["altura"] is not None else ""))
+    if chacra:
+        partes.append(f"chacra {chacra}" + (f" manzana {manzana}" if manzana else ""))
+
+    return {
+        "lon": lon,
+        "lat": lat,
+        "texto": ", ".join(partes),
+        "calle": calle,
+        "chacra": chacra,
+        "manzana": manzana,
+        "barrio": barrio or (edificio or {}).get("barrio"),
+        "parcela": parcela,
+        "edificio": edificio,
+    }
@@ -0,0 +1,124 @@
+# validador/core/services/rollups.py
+"""
+Resumen diario de QueryLog (core_querylogdaily) para el dashboard.
+
+Los días cerrados se leen del resumen; el día en curso (y cualquier día que
+todavía no se haya consolidado) se agrega en vivo. Consolidar es tarea de
+`manage.py rollup_querylog` (cron diario), no de las vistas. Todos los filtros sobre
+core_querylog son rangos sobre created_at, así usan el índice.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from validador.core.models import QueryLog, QueryLogDaily
+
+
+def inicio_dia(dia):
+    """Medianoche local de `dia` como datetime aware."""
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def _agrupar(desde, hasta):
+    """Filas (day, status, quality, count, score_sum, score_n) de QueryLog en [desde, hasta)."""
+    qs = QueryLog.objects.all()
+    if desde is not None:
+        qs = qs.filter(created_at__gte=inicio_dia(desde))
+    if hasta is not None:
+        qs = qs.filter(created_at__lt=inicio_dia(hasta))
+    return (qs.annotate(day=TruncDate("created_at"))
+              .values("day", "status", "quality")
+              .annotate(count=Count("id"), score_sum=Sum("score"),
+                        score_n=Count("id", filter=Q(score__isnull=False)))
+              .order_by())
+
+
+def recalcular(desde, hasta) -> int:
+    """
+    Rehace el resumen de los días [desde, hasta). Devuelve cuántas filas
+    escribió. Los días anteriores a la partición más vieja de QueryLog ya
+    están archivados: `desde` se recorta ahí para no borrar su resumen.
+    """
+    from validador.core.services import querylog_partitions
+
+    primero = querylog_partitions.primer_dia()
+    if primero is not None and desde < primero:
+        desde = primero
+    if desde >= hasta:
+        return 0
+    filas = [
+        QueryLogDaily(day=r["day"], status=r["status"], quality=r["quality"] or "",
+                      count=r["count"], score_sum=r["score_sum"] or 0, score_n=r["score_n"])
+        for r in _agrupar(desde, hasta)
+    ]
+    with transaction.atomic():
+        with connection.cursor() as cur:
+            # cron y querylog_partitions pueden coincidir: uno espera al otro
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext('core_querylogdaily'))")
+        QueryLogDaily.objects.filter(day__gte=desde, day__lt=hasta).delete()
+        QueryLogDaily.objects.bulk_create(filas)
+    return len(filas)
+
+
+def consolidado_hasta():
+    """Último día presente en el resumen, o None."""
+    return QueryLogDaily.objects.aggregate(m=Max("day"))["m"]
+
+
+def consolidar(hoy=None) -> int:
+    """
+    Consolida los días cerrados que falten, hasta ayer inclusive. El último
+    día consolidado se rehace: el buffer de escritura puede haber insertado
+    filas de ese día después de la medianoche.
+    """
+    hoy = hoy or timezone.localdate()
+    desde = consolidado_hasta()
+    if desde is None:
+        primero = QueryLog.objects.aggregate(m=Min("created_at"))["m"]
+        if primero is None:
+            return 0
+        desde = timezone.localdate(primero)
+    if desde >= hoy:
+        return 0
+    return recalcular(desde, hoy)
+
+
+def resumen(start, end) -> dict:
+    """
+    Totales del dashboard para los días [start, end] (start None = desde el
+    principio): total, promedio de score, por status y por día.
+    """
+    filas = []
+    corte = consolidado_hasta()
+    if corte is not None and start is not None and corte < start:
+        corte = None
+    # días <= corte salen del resumen; el resto (normalmente solo hoy), en vivo
+    if corte is not None:
+        corte = min(corte, end)
+        qs = QueryLogDaily.objects.filter(day__lte=corte)
+        if start is not None:
+            qs = qs.filter(day__gte=start)
+        filas.extend(qs.values("day", "status", "count", "score_sum", "score_n"))
+        desde_vivo = corte + timedelta(days=1)
+    else:
+        desde_vivo = start
+    if desde_vivo is None or desde_vivo <= end:
+        filas.extend(_agrupar(desde_vivo, end + timedelta(days=1)))
+
+    total = sum(f["count"] for f in filas)
+    score_n = sum(f["score_n"] for f in filas)
+    score_sum = sum(f["score_sum"] or 0 for f in filas)
+    por_status, por_dia = {}, {}
+    for f in filas:
+        por_status[f["status"]] = por_status.get(f["status"], 0) + f["count"]
+        por_dia[f["day"]] = por_dia.get(f["day"], 0) + f["count"]
+
+    return {
+        "total": total,
+        "avg_score": score_sum / score_n if score_n else 0,
+        "by_status": [{"status": s, "c": c} for s, c in sorted(por_status.items())],
+        "logs_by_day": [{"day": d, "count": c} for d, c in sorted(por_dia.items())],
+    }
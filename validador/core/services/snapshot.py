@@ -0,0 +1,435 @@
+# validador/core/services/snapshot.py
+"""
+Snapshot binario del nomenclador (comando build_snapshot).
+
+Compila calles, chacras, manzanas, parcelas y edificios en un solo archivo
+que los workers abren con mmap: las páginas se comparten entre procesos
+por la page cache del sistema y abrirlo no cuesta una consulta a PostGIS.
+
+Formato (little endian):
+    b"VADISNAP" | u32 formato | u32 largo del header | header JSON | secciones
+El header tiene las versiones de las capas con que se armó y, por sección,
+(offset, bytes, typecode, cantidad). Cada sección es un array plano
+alineado a 8 bytes que se lee sin copiar con memoryview.cast():
+    strings.data / strings.off      tabla de strings (id 0 = vacío/None)
+    <capa>.id                       id en la base (q)
+    <capa>.bbox                     xmin, ymin, xmax, ymax por feature (d)
+    <capa>.partes / <capa>.puntos   feature -> anillos/tramos -> puntos (I)
+    <capa>.xy                       coordenadas x, y (d)
+    <capa>.<campo>                  id de string de cada atributo (I)
+    <capa>.<marca>                  0/1 por feature (B), p. ej. zona_monoblock
+    <capa>.str.*                    árbol STR empaquetado sobre los bbox
+    street.alias_ini / street.alias nombres alternativos
+    street.nombre / street.por_nombre   nombre normalizado y orden para bisección
+Los polígonos guardan todos los anillos (exteriores y huecos) de todas sus
+partes: el test punto-en-polígono par/impar sobre ese conjunto es correcto
+para multipolígonos con huecos.
+"""
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+import json
+import mmap
+import os
+import struct
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from validacion.parser import normalizar_via
+from validador.core.models import BlockGrid, Building, Parcel, Street
+from validador.core.services import dataset_version
+
+MAGIC = b"VADISNAP"
+FORMATO = 2
+NODO = 16          # hijos por nodo del árbol STR
+
+# capa del snapshot -> (capa versionada, geometría, campos de texto)
+CAPAS = {
+    "street": ("street", "linea", ("name", "kind")),
+    "chacra": ("blockgrid", "poligono", ("chacra", "barrio")),
+    "manzana": ("blockgrid", "poligono", ("chacra", "manzana", "barrio")),
+    "parcel": ("parcel", "poligono", ("chacra", "block", "parcel", "lot", "section", "gid")),
+    "building": ("building", "punto", ("chacra", "manzana", "numero", "letra", "escalera", "barrio")),
+}
+
+# capa del snapshot -> campos booleanos
+MARCAS = {
+    "street": ("zona_monoblock",),
+    "manzana": ("zona_monoblock",),
+}
+
+
+VERSIONADAS = tuple(sorted({v for v, _t, _c in CAPAS.values()}))
+
+
+def ruta() -> Path:
+    return Path(getattr(settings, "SNAPSHOT_PATH", Path(settings.ROOT_DIR) / "data" / "snapshot" / "gazetteer.bin"))
+
+
+def _querysets():
+    campos = lambda capa: ("id", "geom") + CAPAS[capa][2] + MARCAS.get(capa, ())
+    return {
+        "street": Street.objects.only(*campos("street"), "aliases"),
+        "chacra": BlockGrid.objects.filter(manzana__isnull=True).only(*campos("chacra")),
+        "manzana": BlockGrid.objects.filter(manzana__isnull=False).only(*campos("manzana")),
+        "parcel": Parcel.objects.only(*campos("parcel")),
+        "building": Building.objects.only(*campos("building")),
+    }
+
+
+# --- construcción ---
+
+class _Strings:
+    def __init__(self):
+        self.ids = {"": 0}
+        self.data = bytearray()
+        self.off = array("I", [0, 0])
+
+    def id(self, valor) -> int:
+        texto = "" if valor is None else str(valor)
+        i = self.ids.get(texto)
+        if i is None:
+            i = self.ids[texto] = len(self.ids)
+            self.data += texto.encode("utf-8")
+            self.off.append(len(self.data))
+        return i
+
+    def texto(self, i: int) -> str:
+        return bytes(self.data[self.off[i]:self.off[i + 1]]).decode("utf-8")
+
+
+def empaquetar_str(bboxes, nodo: int = NODO):
+    """
+    Árbol STR (Sort-Tile-Recursive) sobre los bbox de una capa. Devuelve
+    (nodos_bbox, nodos_ini, hijos, niveles): los hijos del nodo i son
+    hijos[nodos_ini[i]:nodos_ini[i+1]]; en los nodos del nivel 0 son índices
+    de feature y en los demás, índices de nodo. Los nodos se guardan por
+    nivel desde las hojas (niveles[k] = primer nodo del nivel k); la raíz es
+    el último.
+    """
+    def teselar(items):
+        # items: [(caja, ref)] -> grupos de a `nodo`, por franjas en x y dentro de cada una por y
+        hojas = -(-len(items) // nodo)
+        franjas = max(1, round(hojas ** 0.5 + 0.4999))
+        por_franja = -(-len(items) // franjas)
+        items = sorted(items, key=lambda it: it[0][0] + it[0][2])
+        grupos = []
+        for f in range(0, len(items), por_franja):
+            franja = sorted(items[f:f + por_franja], key=lambda it: it[0][1] + it[0][3])
+            grupos.extend(franja[g:g + nodo] for g in range(0, len(franja), nodo))
+        return grupos
+
+    nodos_bbox, nodos_ini, hijos, niveles = array("d"), array("I", [0]), array("I"), array("I")
+    nivel = [(tuple(bboxes[4 * i:4 * i + 4]), i) for i in range(len(bboxes) // 4)]
+    while nivel:
+        niveles.append(len(nodos_ini) - 1)
+        siguiente = []
+        for grupo in teselar(nivel):
+            caja = (min(c[0] for c, _ in grupo), min(c[1] for c, _ in grupo),
+                    max(c[2] for c, _ in grupo), max(c[3] for c, _ in grupo))
+            siguiente.append((caja, len(nodos_ini) - 1))
+            nodos_bbox.extend(caja)
+            hijos.extend(ref for _, ref in grupo)
+            nodos_ini.append(len(hijos))
+        if len(siguiente) == 1:
+            break
+        nivel = siguiente
+    return nodos_bbox, nodos_ini, hijos, niveles
+
+
+def _coords(geom, tipo):
+    """Listas de coordenadas de una geometría: anillos, tramos o el punto."""
+    if tipo == "punto":
+        return [[(geom.x, geom.y)]]
+    if tipo == "linea":
+        return [list(linea.coords) for linea in geom]
+    return [list(anillo.coords) for poligono in geom for anillo in poligono]
+
+
+def _filas_db() -> dict:
+    return {capa: qs.order_by("id").iterator(chunk_size=2000) for capa, qs in _querysets().items()}
+
+
+def compilar(filas: dict | None = None, versiones: dict | None = None):
+    """
+    Lee las capas de la base: (secciones {nombre: array}, header sin la tabla
+    de secciones). `filas` ({capa: objetos en orden de id}) y `versiones`
+    reemplazan a la base (las pruebas arman capas chicas a mano).
+    """
+    versiones = dataset_version.versiones() if versiones is None else versiones
+    filas = _filas_db() if filas is None else filas
+    strings = _Strings()
+    secciones = {}   # nombre -> array
+    capas = {}
+
+    for capa in CAPAS:
+        _version, tipo, campos = CAPAS[capa]
+        ids, bbox = array("q"), array("d")
+        partes, puntos, xy = array("I", [0]), array("I", [0]), array("d")
+        columnas = {c: array("I") for c in campos}
+        marcas = {c: array("B") for c in MARCAS.get(capa, ())}
+        alias_ini, alias = array("I", [0]), array("I")
+        for obj in filas.get(capa, ()):
+            if obj.geom is None or obj.geom.empty:
+                continue
+            ids.append(obj.pk)
+            bbox.extend(obj.geom.extent)
+            for linea in _coords(obj.geom, tipo):
+                for x, y in linea:
+                    xy.append(x)
+                    xy.append(y)
+                puntos.append(len(xy) // 2)
+            partes.append(len(puntos) - 1)
+            for c in campos:
+                columnas[c].append(strings.id(getattr(obj, c)))
+            for c in marcas:
+                marcas[c].append(1 if getattr(obj, c) else 0)
+            if capa == "street":
+                alias.extend(strings.id(a) for a in (getattr(obj, "aliases", None) or []))
+                alias_ini.append(len(alias))
+
+        secciones[f"{capa}.id"] = ids
+        secciones[f"{capa}.bbox"] = bbox
+        secciones[f"{capa}.xy"] = xy
+        if tipo != "punto":
+            secciones[f"{capa}.partes"] = partes
+            secciones[f"{capa}.puntos"] = puntos
+        nodos_bbox, nodos_ini, hijos, niveles = empaquetar_str(bbox)
+        secciones.update({f"{capa}.str.bbox": nodos_bbox, f"{capa}.str.ini": nodos_ini,
+                          f"{capa}.str.hijos": hijos, f"{capa}.str.niveles": niveles})
+        for c, col in {**columnas, **marcas}.items():
+            secciones[f"{capa}.{c}"] = col
+        if capa == "street":
+            nombres = array("I", (strings.id(normalizar_via(strings.texto(i)))
+                                  for i in columnas["name"]))
+            secciones["street.alias_ini"] = alias_ini
+            secciones["street.alias"] = alias
+            secciones["street.nombre"] = nombres
+            clave = {i: strings.texto(i) for i in set(nombres)}
+            secciones["street.por_nombre"] = array(
+                "I", sorted(range(len(nombres)), key=lambda k: (clave[nombres[k]], k)))
+        capas[capa] = {"n": len(ids), "version": versiones.get(CAPAS[capa][0], 0)}
+
+    secciones["strings.data"] = bytes(strings.data)
+    secciones["strings.off"] = strings.off
+    header = {
+        "formato": FORMATO,
+        "creado": timezone.now().isoformat(),
+        "versiones": {c: versiones.get(c, 0) for c in VERSIONADAS},
+        "capas": capas,
+    }
+    return secciones, header
+
+
+def construir(destino: Path | None = None) -> dict:
+    """
+    Arma el snapshot desde la base y lo reemplaza atómicamente (los workers
+    que tengan abierto el anterior lo siguen leyendo hasta reabrir).
+    Devuelve el header escrito.
+    """
+    return escribir(Path(destino or ruta()), *compilar())
+
+
+def escribir(destino: Path, secciones: dict, header: dict) -> dict:
+    """Escribe las secciones compiladas en `destino` (tmp + rename). Devuelve el header."""
+    # offsets relativos al inicio de los datos, cada sección alineada a 8 bytes
+    tabla, offset = {}, 0
+    for nombre, datos in secciones.items():
+        tc = datos.typecode if isinstance(datos, array) else "B"
+        largo = len(datos) * (datos.itemsize if isinstance(datos, array) else 1)
+        tabla[nombre] = [offset, largo, tc, len(datos)]
+        offset += largo + (-largo % 8)
+    header["secciones"] = tabla
+    crudo = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<II", FORMATO, len(crudo)) + crudo)
+            f.write(b"\0" * (-f.tell() % 8))
+            for nombre, datos in secciones.items():
+                f.write(datos.tobytes() if isinstance(datos, array) else datos)
+                f.write(b"\0" * (-tabla[nombre][1] % 8))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, destino)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return header
+
+
+# --- lectura ---
+
+class _Vistas:
+    """Lectura común a Snapshot y EnMemoria: las subclases definen seccion() y tiene()."""
+
+    def texto(self, i: int) -> str | None:
+        """String de la tabla; None para el id 0."""
+        if not i:
+            return None
+        s = self._strings.get(i)
+        if s is None:
+            off = self.seccion("strings.off")
+            s = self._strings[i] = bytes(self.seccion("strings.data")[off[i]:off[i + 1]]).decode("utf-8")
+        return s
+
+    def n(self, capa: str) -> int:
+        return self.header["capas"][capa]["n"]
+
+    def atributos(self, capa: str, k: int) -> dict:
+        """Id y campos de texto del k-ésimo feature de la capa."""
+        out = {"id": self.seccion(f"{capa}.id")[k]}
+        for c in CAPAS[capa][2]:
+            out[c] = self.texto(self.seccion(f"{capa}.{c}")[k])
+        return out
+
+    def marca(self, capa: str, campo: str, k: int) -> bool:
+        return bool(self.seccion(f"{capa}.{campo}")[k])
+
+    def anillos(self, capa: str, k: int):
+        """Listas [(x, y), ...] de los anillos/tramos del k-ésimo feature."""
+        partes, puntos, xy = (self.seccion(f"{capa}.{s}") for s in ("partes", "puntos", "xy"))
+        for p in range(partes[k], partes[k + 1]):
+            a, b = puntos[p], puntos[p + 1]
+            yield [(xy[2 * i], xy[2 * i + 1]) for i in range(a, b)]
+
+    def candidatos(self, capa: str, x0: float, y0: float, x1: float | None = None, y1: float | None = None):
+        """Features cuyo bbox toca el rectángulo (o contiene el punto), por el árbol STR."""
+        x1 = x0 if x1 is None else x1
+        y1 = y0 if y1 is None else y1
+        nb, ini, hijos, niveles = (self.seccion(f"{capa}.str.{s}") for s in ("bbox", "ini", "hijos", "niveles"))
+        if not len(ini) > 1:
+            return
+        hojas = niveles[1] if len(niveles) > 1 else len(ini) - 1
+        bbox = self.seccion(f"{capa}.bbox")
+        pila = [len(ini) - 2]
+        while pila:
+            i = pila.pop()
+            if nb[4 * i] > x1 or nb[4 * i + 2] < x0 or nb[4 * i + 1] > y1 or nb[4 * i + 3] < y0:
+                continue
+            if i >= hojas:
+                pila.extend(hijos[ini[i]:ini[i + 1]])
+                continue
+            for k in hijos[ini[i]:ini[i + 1]]:
+                if not (bbox[4 * k] > x1 or bbox[4 * k + 2] < x0
+                        or bbox[4 * k + 1] > y1 or bbox[4 * k + 3] < y0):
+                    yield k
+
+    def calles_por_nombre(self, nombre: str) -> list:
+        """Features de calle con ese nombre normalizado (bisección sobre street.por_nombre)."""
+        clave = normalizar_via(nombre)
+        orden, nombres = self.seccion("street.por_nombre"), self.seccion("street.nombre")
+        pos = bisect_left(range(len(orden)), clave, key=lambda j: self.texto(nombres[orden[j]]) or "")
+        out = []
+        while pos < len(orden) and (self.texto(nombres[orden[pos]]) or "") == clave:
+            out.append(orden[pos])
+            pos += 1
+        return out
+
+    def alias(self, k: int) -> list:
+        ini, alias = self.seccion("street.alias_ini"), self.seccion("street.alias")
+        return [self.texto(i) for i in alias[ini[k]:ini[k + 1]]]
+
+    def vigente(self, versiones: dict | None = None) -> bool:
+        """True si las capas de la base siguen en las versiones del snapshot."""
+        versiones = versiones or dataset_version.versiones()
+        return all(versiones.get(c, 0) == v for c, v in self.versiones.items())
+
+
+class Snapshot(_Vistas):
+    """
+    Snapshot abierto con mmap (solo lectura). Las secciones se exponen como
+    memoryview tipadas sobre el mapa, sin copiar: len(), índices y slices.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path or ruta())
+        with open(self.path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:8] != MAGIC:
+            raise ValueError(f"{self.path} no es un snapshot")
+        formato, largo = struct.unpack_from("<II", self.mm, 8)
+        if formato != FORMATO:
+            raise ValueError(f"{self.path}: formato {formato}, se esperaba {FORMATO}")
+        self.header = json.loads(self.mm[16:16 + largo])
+        self.base = 16 + largo + (-(16 + largo) % 8)
+        self.versiones = self.header["versiones"]
+        self._vistas = {}
+        self._strings = {}
+
+    def seccion(self, nombre: str) -> memoryview:
+        v = self._vistas.get(nombre)
+        if v is None:
+            off, largo, tc, _n = self.header["secciones"][nombre]
+            v = memoryview(self.mm)[self.base + off:self.base + off + largo]
+            if tc != "B":
+                v = v.cast(tc)
+            self._vistas[nombre] = v
+        return v
+
+    def tiene(self, nombre: str) -> bool:
+        return nombre in self.header["secciones"]
+
+    def cerrar(self):
+        self._vistas.clear()
+        self.mm.close()
+
+
+class EnMemoria(_Vistas):
+    """Las mismas secciones compiladas desde la base en este proceso, sin archivo."""
+
+    def __init__(self, secciones: dict, header: dict):
+        self.secciones = secciones
+        self.header = header
+        self.versiones = header["versiones"]
+        self._strings = {}
+
+    @classmethod
+    def desde_db(cls):
+        return cls(*compilar())
+
+    def seccion(self, nombre: str) -> memoryview:
+        return memoryview(self.secciones[nombre])
+
+    def tiene(self, nombre: str) -> bool:
+        return nombre in self.secciones
+
+
+def _abrir():
+    """Snapshot vigente, o False si no hay archivo o quedó viejo (ver actual())."""
+    try:
+        snap = Snapshot()
+    except (FileNotFoundError, ValueError):
+        return False
+    return snap if snap.vigente() else False
+
+
+_snapshot = dataset_version.PorVersion(VERSIONADAS, _abrir)
+_ausente = {"desde": None}
+
+
+def actual() -> "Snapshot | None":
+    """
+    Snapshot del proceso si existe y coincide con las versiones de la base;
+    None si no (quien lo use cae a la base). Se revalida como los demás
+    índices en memoria, cada LAYER_VERSION_TTL segundos; si no había, se
+    vuelve a buscar el archivo con la misma frecuencia (puede aparecer con
+    build_snapshot sin que cambien las versiones).
+    """
+    if not getattr(settings, "SNAPSHOT_ENABLED", True):
+        return None
+    snap = _snapshot.get()
+    if snap:
+        _ausente["desde"] = None
+        return snap
+    ahora = time.monotonic()
+    if _ausente["desde"] is None:
+        _ausente["desde"] = ahora
+    elif ahora - _ausente["desde"] >= getattr(settings, "LAYER_VERSION_TTL", 30):
+        _ausente["desde"] = None
+        _snapshot.invalidar()
+    return None
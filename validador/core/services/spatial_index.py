@@ -0,0 +1,202 @@
+# validador/core/services/spatial_index.py
+"""
+Consultas espaciales en memoria, sin ida y vuelta a PostGIS:
+  - qué chacra / manzana / parcela contiene un punto
+  - qué edificios hay a menos de R metros
+  - si un punto está en zona de monoblocks (manzana o calle marcada cerca)
+Trabaja sobre las secciones del snapshot (mmap, compartidas entre workers).
+Si no hay uno vigente (falta build_snapshot, o una edición desde el admin
+cambió la versión de una capa) indice() devuelve None y quien llama consulta
+PostGIS: compilar las capas en cada worker sería una copia privada por
+proceso y segundos de espera en su primer request. Los candidatos salen del
+árbol STR de los bbox; el test punto-en-polígono es par/impar sobre todos
+los anillos del feature, vectorizado con numpy: todas las aristas a la vez
+y, en lote, todos los puntos que caen en el bbox de un mismo polígono.
+"""
+from collections import defaultdict
+import math
+
+import numpy as np
+
+from validador.core.services import snapshot
+
+METROS_POR_GRADO = 111320.0
+
+
+class IndiceEspacial:
+    def __init__(self, vistas):
+        self.vistas = vistas            # Snapshot o EnMemoria
+        self._xy = {}
+
+    def coords(self, capa: str) -> np.ndarray:
+        """Coordenadas de la capa como array (n, 2) sobre el buffer, sin copiar."""
+        xy = self._xy.get(capa)
+        if xy is None:
+            buf = self.vistas.seccion(f"{capa}.xy")
+            xy = self._xy[capa] = np.frombuffer(buf, dtype=np.float64).reshape(-1, 2)
+        return xy
+
+    def atributos(self, capa: str, k: int) -> dict:
+        return self.vistas.atributos(capa, k)
+
+    # --- punto en polígono ---
+
+    def _dentro(self, capa: str, k: int, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+        """Máscara de los puntos (px, py) que caen dentro del feature k."""
+        partes = self.vistas.seccion(f"{capa}.partes")
+        puntos = self.vistas.seccion(f"{capa}.puntos")
+        xy = self.coords(capa)
+        dentro = np.zeros(len(px), dtype=bool)
+        x, y = px[:, None], py[:, None]
+        for p in range(partes[k], partes[k + 1]):
+            anillo = xy[puntos[p]:puntos[p + 1]]          # cerrado: el último repite el primero
+            x0, y0 = anillo[:-1, 0], anillo[:-1, 1]
+            x1, y1 = anillo[1:, 0], anillo[1:, 1]
+            cruza = (y0 > y) != (y1 > y)                   # puntos × aristas
+            with np.errstate(divide="ignore", invalid="ignore"):
+                xc = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+            dentro ^= np.count_nonzero(cruza & (x < xc), axis=1) % 2 == 1
+        return dentro
+
+    def contiene_lote(self, capa: str, lons, lats) -> np.ndarray:
+        """
+        Para cada punto, el índice del feature de `capa` que lo contiene (-1 si
+        ninguno). Si hay solapes gana el de menor id, que es el orden de la capa.
+        """
+        px = np.asarray(lons, dtype=np.float64)
+        py = np.asarray(lats, dtype=np.float64)
+        out = np.full(len(px), -1, dtype=np.int64)
+        por_feature = defaultdict(list)
+        for i, (x, y) in enumerate(zip(px.tolist(), py.tolist())):
+            for k in self.vistas.candidatos(capa, x, y):
+                por_feature[k].append(i)
+        for k in sorted(por_feature):
+            idx = np.asarray(por_feature[k], dtype=np.int64)
+            idx = idx[out[idx] < 0]
+            if len(idx):
+                out[idx[self._dentro(capa, k, px[idx], py[idx])]] = k
+        return out
+
+    def contiene(self, capa: str, lon: float, lat: float) -> int | None:
+        k = int(self.contiene_lote(capa, [lon], [lat])[0])
+        return k if k >= 0 else None
+
+    # --- cercanía ---
+
+    def cercanos_lote(self, capa: str, lons, lats, radio_m: float) -> list:
+        """
+        Para cada punto, los índices de los features puntuales de `capa` a
+        menos de `radio_m` metros (equirectangular: a escala de ciudad la
+        diferencia con ST_DWithin sobre geography es de centímetros).
+        """
+        xy = self.coords(capa)
+        out = []
+        for lon, lat in zip(lons, lats):
+            cos = math.cos(math.radians(lat))
+            dlat = radio_m / METROS_POR_GRADO
+            dlon = dlat / max(cos, 1e-6)
+            cand = np.fromiter(self.vistas.candidatos(capa, lon - dlon, lat - dlat, lon + dlon, lat + dlat),
+                               dtype=np.int64)
+            if not len(cand):
+                out.append(cand)
+                continue
+            dx = (xy[cand, 0] - lon) * cos * METROS_POR_GRADO
+            dy = (xy[cand, 1] - lat) * METROS_POR_GRADO
+            out.append(cand[dx * dx + dy * dy <= radio_m * radio_m])
+        return out
+
+    def hay_cercano_lote(self, capa: str, lons, lats, radio_m: float) -> np.ndarray:
+        return np.array([len(c) > 0 for c in self.cercanos_lote(capa, lons, lats, radio_m)], dtype=bool)
+
+    def distancia_m(self, capa: str, k: int, lon: float, lat: float) -> float:
+        """
+        Metros del punto a los tramos (o bordes de los anillos) del feature k:
+        distancia a cada segmento en el plano equirectangular del punto, como
+        cercanos_lote.
+        """
+        partes = self.vistas.seccion(f"{capa}.partes")
+        puntos = self.vistas.seccion(f"{capa}.puntos")
+        xy = self.coords(capa)
+        cos = math.cos(math.radians(lat))
+        mejor = math.inf
+        for p in range(partes[k], partes[k + 1]):
+            tramo = xy[puntos[p]:puntos[p + 1]]
+            x = (tramo[:, 0] - lon) * cos * METROS_POR_GRADO
+            y = (tramo[:, 1] - lat) * METROS_POR_GRADO
+            d2 = x * x + y * y                               # vértices (y tramos de un punto)
+            if len(tramo) > 1:
+                x0, y0 = x[:-1], y[:-1]
+                dx, dy = x[1:] - x0, y[1:] - y0
+                largo2 = dx * dx + dy * dy
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    t = np.clip(np.where(largo2 > 0, -(x0 * dx + y0 * dy) / largo2, 0.0), 0.0, 1.0)
+                cx, cy = x0 + t * dx, y0 + t * dy
+                d2 = np.concatenate((d2, cx * cx + cy * cy))
+            mejor = min(mejor, float(d2.min()))
+        return math.sqrt(mejor)
+
+    # --- contexto de direcciones ---
+
+    def _cerca(self, capa: str, k: int, lon: float, lat: float, margen_m: float) -> bool:
+        if capa != "street" and self._dentro(capa, k, np.array([lon]), np.array([lat]))[0]:
+            return True
+        return self.distancia_m(capa, k, lon, lat) <= margen_m
+
+    def zona_monoblock_lote(self, lons, lats, margen_m: float) -> np.ndarray:
+        """
+        Marca zona_monoblock precalculada (build_monoblock_zones) de cada punto:
+        alguna manzana marcada a menos de `margen_m` metros; si no hay manzanas
+        a esa distancia (afuera de la cuadrícula), algún tramo de calle marcado.
+        El árbol STR da los candidatos por bbox y distancia_m descarta los que
+        solo están cerca por su caja (una avenida diagonal o curva).
+        """
+        out = np.zeros(len(lons), dtype=bool)
+        for i, (lon, lat) in enumerate(zip(lons, lats)):
+            dlat = margen_m / METROS_POR_GRADO
+            dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+            caja = (lon - dlon, lat - dlat, lon + dlon, lat + dlat)
+            for capa in ("manzana", "street"):
+                cerca = [k for k in self.vistas.candidatos(capa, *caja)
+                         if self._cerca(capa, k, lon, lat, margen_m)]
+                if cerca:
+                    out[i] = any(self.vistas.marca(capa, "zona_monoblock", k) for k in cerca)
+                    break
+        return out
+
+    def zonas_lote(self, lons, lats) -> list:
+        """[{"chacra", "manzana"}] de cada punto: la manzana que lo contiene y, si no trae chacra, la chacra."""
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        manzanas = self.contiene_lote("manzana", lons, lats)
+        out = []
+        for k in manzanas.tolist():
+            a = self.atributos("manzana", k) if k >= 0 else {}
+            out.append({"chacra": a.get("chacra"), "manzana": a.get("manzana")})
+        sin_chacra = np.array([z["chacra"] is None for z in out], dtype=bool)
+        if sin_chacra.any():
+            idx = np.flatnonzero(sin_chacra)
+            for i, k in zip(idx.tolist(), self.contiene_lote("chacra", lons[idx], lats[idx]).tolist()):
+                if k >= 0:
+                    out[i]["chacra"] = self.atributos("chacra", k)["chacra"]
+        return out
+
+    def parcelas_lote(self, lons, lats) -> list:
+        """Atributos de la parcela que contiene cada punto, o None."""
+        return [self.atributos("parcel", k) if k >= 0 else None
+                for k in self.contiene_lote("parcel", lons, lats).tolist()]
+
+
+_indice = {"snap": None, "idx": None}
+
+
+def indice() -> IndiceEspacial | None:
+    """
+    Índice del proceso sobre el snapshot vigente (snapshot.actual() se
+    revalida cada LAYER_VERSION_TTL segundos), o None si no hay uno.
+    """
+    snap = snapshot.actual()
+    if snap is None:
+        return None
+    if _indice["snap"] is not snap:
+        _indice.update(snap=snap, idx=IndiceEspacial(snap))
+    return _indice["idx"]
@@ -0,0 +1,134 @@
+# validador/core/services/street_index.py
+"""
+Nomenclador de calles en memoria.
+
+Reemplaza las dos consultas de buscar_via (trigramas sobre core_street y el
+fallback icontains) por un índice que se arma una vez por worker:
+  - nombre normalizado -> calles (búsqueda exacta por hash)
+  - trigrama -> calles (postings), con la misma similitud que pg_trgm
+El índice se reconstruye solo cuando cambia la versión de la capa 'street'.
+Si hay un snapshot vigente (build_snapshot) las calles salen de ahí.
+"""
+import re
+from collections import defaultdict
+
+from validacion.parser import normalizar, normalizar_via
+from validador.core.models import Street
+from validador.core.services import dataset_version, snapshot
+
+UMBRAL = 0.30       # mismo corte que el .filter(sim__gt=0.30) original
+PESO_ALIAS = 0.9
+
+
+def trigramas(texto: str) -> frozenset:
+    """Trigramas al estilo pg_trgm: por palabra, con dos espacios delante y uno detrás."""
+    out = set()
+    for palabra in re.findall(r"[a-z0-9]+", texto):
+        p = f"  {palabra} "
+        out.update(p[i:i + 3] for i in range(len(p) - 2))
+    return frozenset(out)
+
+
+class StreetIndex:
+    def __init__(self, calles):
+        self.calles = list(calles)                  # instancias Street (sin geom)
+        self.exactos = defaultdict(list)            # nombre normalizado -> [i]
+        self.post_nombre = defaultdict(list)        # trigrama -> [i]
+        self.post_alias = defaultdict(list)
+        self.tri_nombre = []
+        self.tri_alias = []
+        self.texto = []                             # nombre sin tildes, para el fallback
+        for i, s in enumerate(self.calles):
+            nombre = normalizar(s.name or "")
+            alias = normalizar(", ".join(str(a) for a in (s.aliases or [])))
+            tn, ta = trigramas(nombre), trigramas(alias)
+            self.tri_nombre.append(tn)
+            self.tri_alias.append(ta)
+            self.texto.append(nombre)
+            self.exactos[normalizar_via(s.name)].append(i)
+            for t in tn:
+                self.post_nombre[t].append(i)
+            for t in ta:
+                self.post_alias[t].append(i)
+
+    @classmethod
+    def desde_db(cls):
+        calles = Street.objects.only("id", "name", "kind", "aliases").order_by("id")
+        return cls(calles)
+
+    @classmethod
+    def desde_snapshot(cls, snap):
+        """Mismo índice, con las calles del snapshot binario (sin consultar la base)."""
+        calles = []
+        for k in range(snap.n("street")):
+            a = snap.atributos("street", k)
+            calles.append(Street(id=a["id"], name=a["name"] or "", kind=a["kind"] or "",
+                                 aliases=snap.alias(k)))
+        return cls(calles)
+
+    def _puntajes(self, q: frozenset, tipo):
+        """sim = sim(nombre) + 0.9 * sim(alias), solo para calles que comparten algún trigrama."""
+        comunes_n, comunes_a = defaultdict(int), defaultdict(int)
+        for t in q:
+            for i in self.post_nombre.get(t, ()):
+                comunes_n[i] += 1
+            for i in self.post_alias.get(t, ()):
+                comunes_a[i] += 1
+        out = {}
+        for i in comunes_n.keys() | comunes_a.keys():
+            if tipo and self.calles[i].kind != tipo:
+                continue
+            cn, ca = comunes_n.get(i, 0), comunes_a.get(i, 0)
+            sn = cn / (len(q) + len(self.tri_nombre[i]) - cn) if cn else 0.0
+            sa = ca / (len(q) + len(self.tri_alias[i]) - ca) if ca else 0.0
+            out[i] = sn + sa * PESO_ALIAS
+        return out
+
+    def buscar(self, nombre: str, tipo: str | None = None, top: int = 5):
+        tipo = tipo if tipo in ("calle", "avenida") else None
+        nombre = normalizar(nombre or "")
+
+        # 1) Coincidencia exacta del nombre normalizado: va primero.
+        exactos = [i for i in self.exactos.get(normalizar_via(nombre), ())
+                   if not tipo or self.calles[i].kind == tipo]
+        if len(exactos) >= top:
+            return [self.calles[i] for i in exactos[:top]]
+
+        # 2) Ranking por trigramas (equivalente a TrigramSimilarity + unaccent)
+        q = trigramas(nombre)
+        sims = self._puntajes(q, tipo) if q else {}
+        rank = sorted((i for i, s in sims.items() if s > UMBRAL and i not in exactos),
+                      key=lambda i: (-sims[i], i))
+        res = exactos + rank[:top - len(exactos)]
+        if res:
+            return [self.calles[i] for i in res]
+
+        # 3) Fallback: name__icontains
+        res = []
+        for i, texto in enumerate(self.texto):
+            if nombre in texto and (not tipo or self.calles[i].kind == tipo):
+                res.append(self.calles[i])
+                if len(res) >= top:
+                    break
+        return res
+
+
+def _construir() -> StreetIndex:
+    snap = snapshot.actual()
+    return StreetIndex.desde_snapshot(snap) if snap else StreetIndex.desde_db()
+
+
+_indice = dataset_version.PorVersion(["street"], _construir)
+
+
+def indice() -> StreetIndex:
+    """
+    Índice del proceso actual. Se construye en el primer uso y se revalida
+    contra LayerVersion cada LAYER_VERSION_TTL segundos.
+    """
+    return _indice.get()
+
+
+def invalidar() -> None:
+    """Fuerza la reconstrucción en la próxima búsqueda de este proceso."""
+    _indice.invalidar()
@@ -0,0 +1,200 @@
+# validador/core/services/tiles.py
+"""
+Vector tiles (MVT) de las capas cargadas, generadas en PostGIS con
+ST_AsMVT/ST_AsMVTGeom.
+
+Cada tile filtra con geom && envelope (índice GiST de la capa), simplifica
+según el zoom y se guarda en disco en TILE_CACHE_DIR/<capa>/v<versión>/z/x/y.mvt.
+Al recargar una capa cambia su versión: el primer worker que la ve borra los
+directorios de las versiones viejas (también seed_tiles --prune).
+
+Solo se generan tiles hasta TILE_MAX_ZOOM y dentro de la extensión de la
+capa; las de afuera y las vacías no se guardan, así recorrer z/x/y no llena
+el disco.
+"""
+from functools import partial
+from pathlib import Path
+import math
+import os
+import shutil
+
+from django.conf import settings
+from django.db import connection
+
+from validador.core.services import dataset_version
+
+EXTENT = 4096
+BUFFER = 64
+METROS_MUNDO = 40075016.68557849        # ancho de EPSG:3857 en metros
+
+# capa de la URL -> tabla, columnas de atributos, zoom mínimo, capa versionada
+CAPAS = {
+    "street": {
+        "tabla": "core_street", "columnas": "id, name, kind", "minzoom": 11, "version": "street",
+    },
+    "blockgrid": {
+        "tabla": "core_blockgrid", "columnas": "id, barrio, chacra, manzana", "minzoom": 13,
+        "version": "blockgrid",
+    },
+    "building": {
+        "tabla": "core_building", "columnas": "id, barrio, chacra, manzana, numero, letra, escalera",
+        "minzoom": 14, "version": "building", "puntos": True,
+    },
+    "parcel": {
+        "tabla": "core_parcel", "columnas": "id, gid, chacra, block, lot, parcel", "minzoom": 15,
+        "version": "parcel",
+    },
+}
+
+SQL_TILE = """
+    WITH b AS (
+        SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS env,
+               ST_Transform(ST_TileEnvelope(%(z)s, %(x)s, %(y)s, margin => %(margen)s), 4326) AS env4326
+    )
+    SELECT ST_AsMVT(t, %(capa)s, {extent}, 'geom')
+    FROM (
+        SELECT {columnas},
+               ST_AsMVTGeom({geom}, b.env, {extent}, {buffer}, true) AS geom
+        FROM {tabla} g, b
+        WHERE g.geom && b.env4326
+    ) t
+    WHERE t.geom IS NOT NULL
+"""
+
+
+def tolerancia(z: int) -> float:
+    """Tolerancia de simplificación en metros: medio píxel de pantalla a ese zoom."""
+    return METROS_MUNDO / (256 * 2 ** z) / 2
+
+
+def _sql(capa: str) -> str:
+    conf = CAPAS[capa]
+    geom = ("ST_Transform(g.geom, 3857)" if conf.get("puntos")
+            else "ST_Simplify(ST_Transform(g.geom, 3857), %(tol)s, true)")
+    return SQL_TILE.format(columnas=conf["columnas"], geom=geom, tabla=conf["tabla"],
+                           extent=EXTENT, buffer=BUFFER)
+
+
+def generar(capa: str, z: int, x: int, y: int) -> bytes:
+    """Tile MVT sin caché (vacía por debajo del zoom mínimo de la capa)."""
+    if z < CAPAS[capa]["minzoom"]:
+        return b""
+    params = {"z": z, "x": x, "y": y, "capa": capa,
+              "margen": BUFFER / EXTENT, "tol": tolerancia(z)}
+    with connection.cursor() as cur:
+        cur.execute(_sql(capa), params)
+        fila = cur.fetchone()
+    return bytes(fila[0]) if fila and fila[0] else b""
+
+
+def directorio() -> Path:
+    return Path(getattr(settings, "TILE_CACHE_DIR", Path(settings.ROOT_DIR) / "data" / "tiles"))
+
+
+def ruta(capa: str, version: int, z: int, x: int, y: int) -> Path:
+    return directorio() / capa / f"v{version}" / str(z) / str(x) / f"{y}.mvt"
+
+
+def _extension(capa: str):
+    """bbox (lon0, lat0, lon1, lat1) de la capa, o None si está vacía."""
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT ST_XMin(e), ST_YMin(e), ST_XMax(e), ST_YMax(e) "
+                    f"FROM (SELECT ST_Extent(geom) AS e FROM {CAPAS[capa]['tabla']}) s")
+        fila = cur.fetchone()
+    return fila if fila and fila[0] is not None else None
+
+
+def _podar(capa: str, version: int) -> int:
+    actual = f"v{version}"
+    base = directorio() / capa
+    borrados = 0
+    for d in base.glob("v*") if base.exists() else ():
+        if d.name != actual:
+            shutil.rmtree(d, ignore_errors=True)
+            borrados += 1
+    return borrados
+
+
+def _estado(capa: str) -> dict:
+    """Versión y extensión de la capa; al cambiar de versión borra las tiles de las anteriores."""
+    version = dataset_version.version(CAPAS[capa]["version"])
+    _podar(capa, version)
+    return {"version": version, "extension": _extension(capa)}
+
+
+# estado de cada capa, revalidado cada LAYER_VERSION_TTL (sin consulta por tile)
+_estados = {
+    capa: dataset_version.PorVersion([conf["version"]], partial(_estado, capa))
+    for capa, conf in CAPAS.items()
+}
+
+
+def max_zoom() -> int:
+    return getattr(settings, "TILE_MAX_ZOOM", 20)
+
+
+def valida(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= max_zoom() and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def limites(z: int, x: int, y: int) -> tuple:
+    """bbox (lon0, lat0, lon1, lat1) de la tile."""
+    n = 2 ** z
+
+    def lat(fila):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * fila / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def en_extension(capa: str, z: int, x: int, y: int) -> bool:
+    """Si la tile (con su buffer) toca la extensión de la capa."""
+    ext = _estados[capa].get()["extension"]
+    if ext is None:
+        return False
+    lon0, lat0, lon1, lat1 = limites(z, x, y)
+    mx, my = (lon1 - lon0) * BUFFER / EXTENT, (lat1 - lat0) * BUFFER / EXTENT
+    return lon0 - mx <= ext[2] and ext[0] <= lon1 + mx and lat0 - my <= ext[3] and ext[1] <= lat1 + my
+
+
+def obtener(capa: str, z: int, x: int, y: int) -> bytes:
+    """
+    Tile desde la caché en disco; si falta (o cambió la versión) la genera y
+    la guarda. Fuera de la extensión de la capa o por debajo de su zoom mínimo
+    devuelve b"" sin consultar la base; las vacías no se guardan.
+    """
+    if z < CAPAS[capa]["minzoom"] or not en_extension(capa, z, x, y):
+        return b""
+    p = ruta(capa, _estados[capa].get()["version"], z, x, y)
+    try:
+        return p.read_bytes()
+    except FileNotFoundError:
+        pass
+    data = generar(capa, z, x, y)
+    if data:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, p)
+    return data
+
+
+def tiles_bbox(bbox, z: int):
+    """(x, y) de las tiles de zoom z que cubren bbox (lon0, lat0, lon1, lat1)."""
+    def xy(lon, lat):
+        n = 2 ** z
+        lat = max(min(lat, 85.0511), -85.0511)
+        x = int((lon + 180.0) / 360.0 * n)
+        y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+        return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+    x0, y1 = xy(bbox[0], bbox[1])
+    x1, y0 = xy(bbox[2], bbox[3])
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            yield x, y
+
+
+def podar(capa: str) -> int:
+    """Borra las tiles de versiones viejas de la capa. Devuelve cuántos directorios borró."""
+    return _podar(capa, dataset_version.version(CAPAS[capa]["version"]))
@@ -1,6 +1,5 @@
 # validador/core/services/validator_bridge.py
-from rest_framework.test import APIRequestFactory
-from validacion.views import ValidateAddress
+from validacion.services import validar
 from .llm_service import craft_reply
 
 def ask_vadi(message, val_json):
@@ -8,12 +7,9 @@ def ask_vadi(message, val_json):
 
 def run_validator(texto, user=None):
     """
-    Ejecuta la misma lógica de ValidateAddress (DRF) y devuelve su JSON.
-    No exponemos clave ni hacemos HTTP; llama a la vista internamente.
+    Resultado completo de validar(), llamando directo al motor de validación:
+    sin request interno ni QueryLog. El chat responde con res["payload"] (lo
+    mismo que ValidateAddress) y registra una sola fila con el resto
+    (tokens, punto, calle/edificio) más la respuesta del LLM.
     """
-    factory = APIRequestFactory()
-    req = factory.post("/validar/", {"texto": texto}, format="json")
-    if user:
-        req.user = user
-    resp = ValidateAddress.as_view()(req)
-    return getattr(resp, "data", {})  # {'status': ..., 'opciones': ...} + lo que ya retornás
+    return validar(texto)  # {'input', 'parsed', 'status', 'payload', 'punto', ...}
@@ -0,0 +1,54 @@
+# validador/core/signals.py
+from contextlib import contextmanager
+import threading
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from validador.core.models import BlockGrid, Building, Parcel, Street
+from validador.core.services.dataset_version import bump
+
+# Ediciones sueltas (admin, shell). Las cargas masivas llaman a bump() una
+# sola vez al final: bulk_create/update no disparan estas señales y lo que
+# guardan o borran fila por fila lo hacen dentro de carga_masiva().
+
+_carga = threading.local()
+
+
+@contextmanager
+def carga_masiva():
+    """Dentro del bloque las señales no incrementan versiones (las incrementa quien carga)."""
+    previo = getattr(_carga, "activa", False)
+    _carga.activa = True
+    try:
+        yield
+    finally:
+        _carga.activa = previo
+
+
+def _cambio(capa):
+    if not getattr(_carga, "activa", False):
+        bump(capa)
+
+
+@receiver(post_save, sender=Street)
+@receiver(post_delete, sender=Street)
+def street_changed(sender, **kwargs):
+    _cambio("street")
+
+
+@receiver(post_save, sender=BlockGrid)
+@receiver(post_delete, sender=BlockGrid)
+def blockgrid_changed(sender, **kwargs):
+    _cambio("blockgrid")
+
+
+@receiver(post_save, sender=Building)
+@receiver(post_delete, sender=Building)
+def building_changed(sender, **kwargs):
+    _cambio("building")
+
+
+@receiver(post_save, sender=Parcel)
+@receiver(post_delete, sender=Parcel)
+def parcel_changed(sender, **kwargs):
+    _cambio("parcel")
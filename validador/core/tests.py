@@ -1,3 +1,677 @@
-from django.test import TestCase
+from array import array
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+import json
+import math
+import random
+import tempfile
 
-# Create your tests here.
+from django.contrib.gis.geos import LineString, MultiLineString, MultiPolygon, Point, Polygon
+from django.contrib.gis.measure import D
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from validador.core.models import (
+    BlockGrid, Building, Parcel, QueryLog, QueryLogDaily, Street, StreetIntersection,
+)
+from validador.core.services import (
+    address_hierarchy, querylog_partitions, reverse_geocode, rollups, snapshot, spatial_index, tiles,
+)
+from validador.core.management.commands.load_geojson import heredar_aliases, read_features
+from validador.core.services import geojson_stream
+from validador.core.services.linear_ref import Eje, altura_en
+from validador.core.services.querylog_buffer import QueryLogBuffer
+from validador.core.services.spatial_index import IndiceEspacial
+from validador.core.services.street_index import StreetIndex, trigramas
+from validacion.parser import normalizar, parsear_catastro
+from validacion.services import buscar_via_sql
+
+
+class PlanesDeConsultaTests(TestCase):
+    """
+    EXPLAIN de las consultas calientes. Con enable_seqscan = off el planner
+    solo elige Seq Scan si no hay ningún índice que sirva: si aparece, falta
+    (o se rompió) un índice. Las tablas pueden estar vacías.
+    """
+
+    def setUp(self):
+        with connection.cursor() as cur:
+            cur.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cur:
+            cur.execute("RESET enable_seqscan")
+
+    def assertSinSeqScan(self, plan, tabla):
+        lineas = [l for l in plan.splitlines() if "Seq Scan" in l and tabla in l]
+        self.assertFalse(lineas, f"Seq Scan sobre {tabla}:\n{plan}")
+
+    def explain_sql(self, sql, params):
+        with connection.cursor() as cur:
+            cur.execute("EXPLAIN " + sql, params)
+            return "\n".join(r[0] for r in cur.fetchall())
+
+    # --- jerarquía chacra/manzana/edificio (address_hierarchy) ---
+
+    def test_blockgrid_por_chacra(self):
+        self.assertSinSeqScan(BlockGrid.objects.filter(chacra="12").order_by("id").explain(), "core_blockgrid")
+
+    def test_blockgrid_por_chacra_y_manzana(self):
+        self.assertSinSeqScan(BlockGrid.objects.filter(chacra="12", manzana="3").explain(), "core_blockgrid")
+
+    def test_building_por_numero(self):
+        self.assertSinSeqScan(Building.objects.filter(numero="45").order_by("id").explain(), "core_building")
+
+    def test_building_por_chacra_manzana_numero(self):
+        qs = Building.objects.filter(chacra="12", manzana="3", numero="45")
+        self.assertSinSeqScan(qs.explain(), "core_building")
+
+    def test_parcela_por_codigo(self):
+        qs = Parcel.objects.filter(chacra="12", block="34", parcel="5")
+        self.assertSinSeqScan(qs.explain(), "core_parcel")
+
+    def test_parcela_por_prefijo_de_codigo(self):
+        self.assertSinSeqScan(Parcel.objects.filter(chacra="12").explain(), "core_parcel")
+
+    # --- contexto de un punto ---
+
+    def test_blockgrid_contiene_punto(self):
+        p = Point(-55.9, -27.37, srid=4326)
+        self.assertSinSeqScan(BlockGrid.objects.filter(geom__contains=p).explain(), "core_blockgrid")
+
+    def test_building_cerca_de_punto(self):
+        p = Point(-55.9, -27.37, srid=4326)
+        qs = Building.objects.filter(geom__distance_lte=(p, D(m=120)))
+        self.assertSinSeqScan(qs.explain(), "core_building")
+
+    def test_zona_monoblock_cerca_de_punto(self):
+        plan = self.explain_sql(address_hierarchy.SQL_ZONA_MONOBLOCK,
+                                address_hierarchy.params_zona_monoblock(-55.9, -27.37))
+        for tabla in ("core_blockgrid", "core_street"):
+            self.assertSinSeqScan(plan, tabla)
+
+    # --- calles y esquinas ---
+
+    def test_street_por_nombre(self):
+        self.assertSinSeqScan(Street.objects.filter(name="JUJUY").explain(), "core_street")
+
+    def test_esquina_por_nombres(self):
+        qs = StreetIntersection.objects.filter(name_a="jujuy", name_b="mitre")
+        self.assertSinSeqScan(qs.explain(), "core_streetintersection")
+
+    def test_tile_de_calles(self):
+        sql = tiles._sql("street")
+        params = {"z": 15, "x": 11356, "y": 18800, "capa": "street", "margen": 0.0, "tol": 1.0}
+        self.assertSinSeqScan(self.explain_sql(sql, params), "core_street")
+
+    def test_geocodificacion_inversa(self):
+        plan = self.explain_sql(reverse_geocode.SQL_INVERSA, {"lon": -55.9, "lat": -27.37})
+        for tabla in ("core_streetaxis", "core_blockgrid", "core_parcel", "core_building"):
+            self.assertSinSeqScan(plan, tabla)
+
+    # --- QueryLog (dashboard, heatmap, listados) ---
+
+    def test_querylog_por_rango(self):
+        ahora = timezone.now()
+        qs = QueryLog.objects.filter(created_at__gte=ahora - timedelta(days=1), created_at__lt=ahora)
+        self.assertSinSeqScan(qs.explain(), "core_querylog")
+
+    def test_querylog_por_status_y_rango(self):
+        ahora = timezone.now()
+        qs = QueryLog.objects.filter(status="OK", created_at__gte=ahora - timedelta(days=7))
+        self.assertSinSeqScan(qs.explain(), "core_querylog")
+
+    def test_querylog_ultimos(self):
+        self.assertSinSeqScan(QueryLog.objects.order_by("-created_at")[:50].explain(), "core_querylog")
+
+    def test_querylogdaily_por_dias(self):
+        hoy = timezone.localdate()
+        qs = QueryLogDaily.objects.filter(day__gte=hoy - timedelta(days=30), day__lte=hoy)
+        self.assertSinSeqScan(qs.explain(), "core_querylogdaily")
+
+    def test_querylog_poda_particiones(self):
+        # un rango dentro del mes actual lee solo la partición de ese mes
+        querylog_partitions.asegurar(adelante=0)
+        mes = querylog_partitions.inicio_mes(timezone.localdate())
+        desde = rollups.inicio_dia(mes)
+        qs = QueryLog.objects.filter(created_at__gte=desde, created_at__lt=desde + timedelta(days=1))
+        plan = qs.explain()
+        self.assertIn(querylog_partitions.nombre(mes), plan)
+        self.assertNotIn(querylog_partitions.DEFAULT, plan)
+
+
+# --- capas chicas armadas a mano (sin PostGIS) para snapshot / spatial_index ---
+
+def _cuadrado(x0, y0, x1, y1):
+    return ((x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0))
+
+
+def _linea(*puntos):
+    return MultiLineString(LineString(*puntos), srid=4326)
+
+
+def _feature(capa, pk, geom, **attrs):
+    """Fila para snapshot.compilar(): los campos de la capa en None salvo los indicados."""
+    campos = snapshot.CAPAS[capa][2] + snapshot.MARCAS.get(capa, ())
+    return SimpleNamespace(pk=pk, geom=geom, **{**dict.fromkeys(campos), **attrs})
+
+
+def capas_de_prueba():
+    """
+    Calles fuera de la chacra 1 (Mitre en zona de monoblocks); en la chacra,
+    la manzana A con un hueco (4..6) y marcada, y la B en dos partes.
+    """
+    return {
+        "street": [
+            _feature("street", 1, _linea((40, 0), (40, 10)), name="CALLE JUJUY(49)", kind="calle"),
+            _feature("street", 2, _linea((50, 0), (50, 10)), name="AVENIDA ROQUE PÉREZ", kind="avenida"),
+            _feature("street", 3, _linea((40, 10), (40, 20)), name="CALLE JUJUY(49)", kind="calle"),
+            _feature("street", 4, _linea((60, 0), (60, 10)), name="AVENIDA MITRE", kind="avenida",
+                     aliases=["bartolome mitre"], zona_monoblock=True),
+        ],
+        "chacra": [
+            _feature("chacra", 10, MultiPolygon(Polygon(_cuadrado(-1, -1, 31, 11)), srid=4326), chacra="1"),
+        ],
+        "manzana": [
+            _feature("manzana", 20, MultiPolygon(Polygon(_cuadrado(0, 0, 10, 10), _cuadrado(4, 4, 6, 6)), srid=4326),
+                     chacra="1", manzana="A", zona_monoblock=True),
+            _feature("manzana", 21, MultiPolygon(Polygon(_cuadrado(20, 0, 25, 5)),
+                                                 Polygon(_cuadrado(26, 6, 30, 10)), srid=4326),
+                     chacra="1", manzana="B"),
+        ],
+        "parcel": [
+            _feature("parcel", 30, MultiPolygon(Polygon(_cuadrado(0, 0, 5, 5)), srid=4326),
+                     chacra="1", block="a", parcel="1", lot="1", gid="g30"),
+        ],
+        "building": [
+            _feature("building", 40, Point(2, 2, srid=4326), chacra="1", manzana="A", numero="45"),
+        ],
+    }
+
+
+VERSIONES_DE_PRUEBA = {"street": 3, "blockgrid": 2, "building": 1, "parcel": 5}
+
+
+class SnapshotArchivoTests(SimpleTestCase):
+    """Escritura y lectura del formato binario (services/snapshot.py)."""
+
+    def setUp(self):
+        self.secciones, self.header = snapshot.compilar(capas_de_prueba(), VERSIONES_DE_PRUEBA)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "gazetteer.bin"
+        snapshot.escribir(self.path, self.secciones, self.header)
+
+    def abrir(self):
+        snap = snapshot.Snapshot(self.path)
+        self.addCleanup(snap.cerrar)
+        return snap
+
+    def test_ida_y_vuelta(self):
+        snap = self.abrir()
+        self.assertEqual(set(snap.header["secciones"]), set(self.secciones))
+        for nombre, datos in self.secciones.items():
+            self.assertEqual(list(snap.seccion(nombre)), list(memoryview(datos)), nombre)
+
+    def test_secciones_alineadas(self):
+        snap = self.abrir()
+        for nombre, (off, _largo, _tc, _n) in snap.header["secciones"].items():
+            self.assertEqual((snap.base + off) % 8, 0, nombre)
+
+    def test_tabla_de_strings_y_atributos(self):
+        snap = self.abrir()
+        self.assertIsNone(snap.texto(0))
+        self.assertEqual(snap.n("street"), 4)
+        self.assertEqual(snap.atributos("street", 1),
+                         {"id": 2, "name": "AVENIDA ROQUE PÉREZ", "kind": "avenida"})
+        self.assertEqual(snap.atributos("manzana", 0)["manzana"], "A")
+        self.assertIsNone(snap.atributos("chacra", 0)["barrio"])
+        self.assertEqual(snap.alias(3), ["bartolome mitre"])
+        self.assertEqual(snap.alias(0), [])
+        self.assertTrue(snap.marca("manzana", "zona_monoblock", 0))
+        self.assertFalse(snap.marca("manzana", "zona_monoblock", 1))
+        self.assertEqual([len(a) for a in snap.anillos("manzana", 0)], [5, 5])
+
+    def test_calles_por_nombre(self):
+        snap = self.abrir()
+        self.assertEqual(snap.calles_por_nombre("Jujuy"), [0, 2])
+        self.assertEqual(snap.calles_por_nombre("Av. Roque Pérez"), [1])
+        self.assertEqual(snap.calles_por_nombre("mitre"), [3])
+        self.assertEqual(snap.calles_por_nombre("belgrano"), [])
+        self.assertEqual(snap.calles_por_nombre("a"), [])
+
+    def test_vigente(self):
+        snap = self.abrir()
+        self.assertTrue(snap.vigente(VERSIONES_DE_PRUEBA))
+        self.assertFalse(snap.vigente({**VERSIONES_DE_PRUEBA, "street": 4}))
+
+    def test_formato_o_archivo_ajeno(self):
+        crudo = bytearray(self.path.read_bytes())
+        crudo[8:12] = (snapshot.FORMATO + 1).to_bytes(4, "little")
+        self.path.write_bytes(crudo)
+        with self.assertRaises(ValueError):
+            snapshot.Snapshot(self.path)
+        self.path.write_bytes(b"NOSNAP00" + bytes(crudo[8:]))
+        with self.assertRaises(ValueError):
+            snapshot.Snapshot(self.path)
+
+
+class IndiceEspacialTests(SimpleTestCase):
+    """Árbol STR y punto-en-polígono en memoria (services/spatial_index.py), sobre EnMemoria."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.idx = IndiceEspacial(snapshot.EnMemoria(*snapshot.compilar(capas_de_prueba(), VERSIONES_DE_PRUEBA)))
+
+    def test_candidatos_igual_que_fuerza_bruta(self):
+        rnd = random.Random(7)
+        for n in (0, 1, 5, snapshot.NODO, snapshot.NODO + 1, 300, 2000):
+            cajas = []
+            for _ in range(n):
+                x, y = rnd.uniform(0, 100), rnd.uniform(0, 100)
+                cajas.append((x, y, x + rnd.uniform(0, 5), y + rnd.uniform(0, 5)))
+            plano = array("d", (v for c in cajas for v in c))
+            nb, ini, hijos, niveles = snapshot.empaquetar_str(plano)
+            vistas = snapshot.EnMemoria({"x.bbox": plano, "x.str.bbox": nb, "x.str.ini": ini,
+                                         "x.str.hijos": hijos, "x.str.niveles": niveles}, {"versiones": {}})
+            for _ in range(40):
+                x0, y0 = rnd.uniform(-5, 100), rnd.uniform(-5, 100)
+                x1, y1 = x0 + rnd.choice((0, 1, 10, 50)), y0 + rnd.choice((0, 1, 10, 50))
+                esperado = [k for k, c in enumerate(cajas)
+                            if not (c[0] > x1 or c[2] < x0 or c[1] > y1 or c[3] < y0)]
+                self.assertEqual(sorted(vistas.candidatos("x", x0, y0, x1, y1)), esperado, (n, x0, y0, x1, y1))
+
+    def test_contiene_con_huecos_y_multipoligonos(self):
+        puntos = [(2, 2), (5, 5), (22, 2), (25.5, 5.5), (28, 8), (100, 100)]
+        lons, lats = [p[0] for p in puntos], [p[1] for p in puntos]
+        self.assertEqual(self.idx.contiene_lote("manzana", lons, lats).tolist(), [0, -1, 1, -1, 1, -1])
+        self.assertEqual(self.idx.contiene("chacra", 5, 5), 0)
+        self.assertIsNone(self.idx.contiene("chacra", 100, 100))
+
+    def test_zonas_lote(self):
+        self.assertEqual(self.idx.zonas_lote([2, 5, 100], [2, 5, 100]), [
+            {"chacra": "1", "manzana": "A"},
+            {"chacra": "1", "manzana": None},     # en el hueco: solo la chacra
+            {"chacra": None, "manzana": None},
+        ])
+
+    def test_parcelas_lote(self):
+        parcelas = self.idx.parcelas_lote([2, 7], [2, 7])
+        self.assertEqual(parcelas[0]["gid"], "g30")
+        self.assertIsNone(parcelas[1])
+
+    def test_cercanos_lote(self):
+        # ~111 m por centésima de grado: el edificio en (2, 2) está a ~0 m y a ~1100 m
+        self.assertEqual(self.idx.hay_cercano_lote("building", [2, 2.01], [2, 2], 120).tolist(), [True, False])
+
+    def test_zona_monoblock_lote(self):
+        puntos = [
+            (2, 2),          # manzana A, marcada
+            (22, 2),         # manzana B, sin marcar
+            (60.0001, 5),    # fuera de la cuadrícula, junto a Mitre (marcada)
+            (40.0001, 5),    # junto a Jujuy, sin marcar
+            (200, 0),        # nada cerca
+        ]
+        lons, lats = [p[0] for p in puntos], [p[1] for p in puntos]
+        self.assertEqual(self.idx.zona_monoblock_lote(lons, lats, 20).tolist(),
+                         [True, False, True, False, False])
+
+    def test_zona_monoblock_mide_distancia(self):
+        # una avenida diagonal marcada: su bbox cubre (109, 101) pero pasa a cientos de km
+        capas = capas_de_prueba()
+        capas["street"].append(_feature("street", 5, _linea((100, 100), (110, 110)), name="AVENIDA DIAGONAL",
+                                        kind="avenida", zona_monoblock=True))
+        idx = IndiceEspacial(snapshot.EnMemoria(*snapshot.compilar(capas, VERSIONES_DE_PRUEBA)))
+        self.assertEqual(idx.zona_monoblock_lote([109, 105.0001], [101, 105], 20).tolist(), [False, True])
+        self.assertAlmostEqual(idx.distancia_m("street", 4, 105, 105), 0, places=6)
+        # en el hueco de la manzana A el borde más cercano es el del hueco, a 1° de longitud
+        self.assertAlmostEqual(idx.distancia_m("manzana", 0, 5, 5),
+                               math.cos(math.radians(5)) * spatial_index.METROS_POR_GRADO, places=3)
+
+
+class StreetIndexTests(TestCase):
+    """El nomenclador en memoria (services/street_index.py) rankea como buscar_via_sql."""
+
+    @classmethod
+    def setUpTestData(cls):
+        with connection.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cur.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        geom = _linea((0, 0), (1, 1))
+        for name, kind, aliases in (
+            ("CALLE JUJUY(49)", "calle", []),
+            ("AVENIDA ROQUE PÉREZ", "avenida", []),
+            ("CALLE JUNIN", "calle", []),
+            ("CALLE SAN MARTIN", "calle", []),
+            ("SAN MARTINI", "calle", []),
+            ("CALLE SAN LORENZO", "calle", []),
+            ("AVENIDA MITRE", "avenida", ["bartolome mitre"]),
+        ):
+            Street.objects.create(name=name, kind=kind, aliases=aliases, geom=geom)
+
+    def setUp(self):
+        self.idx = StreetIndex(Street.objects.only("id", "name", "kind", "aliases").order_by("id"))
+
+    def assertMismoRanking(self, nombre, tipo=None):
+        sql = buscar_via_sql(nombre, tipo, top=10)
+        mem = self.idx.buscar(nombre, tipo, top=10)
+        # mismo umbral y mismo orden (los empates, por id)
+        esperado = [s.pk for s in sorted(sql, key=lambda s: (-round(getattr(s, "sim", 0), 5), s.pk))]
+        self.assertEqual([s.pk for s in mem], esperado, nombre)
+        puntajes = self.idx._puntajes(trigramas(normalizar(nombre)), tipo)
+        pos = {s.pk: i for i, s in enumerate(self.idx.calles)}
+        for s in sql:
+            if hasattr(s, "sim"):
+                self.assertAlmostEqual(puntajes[pos[s.pk]], s.sim, places=5)
+
+    def test_ranking_y_umbral_como_sql(self):
+        for nombre in ("san lorenso", "mitre", "bartolome", "roque peres", "jujui", "49", "zzz"):
+            self.assertMismoRanking(nombre)
+
+    def test_filtro_por_tipo(self):
+        self.assertMismoRanking("mitre", "avenida")
+        self.assertMismoRanking("mitre", "calle")
+        self.assertEqual(self.idx.buscar("mitre", "calle"), [])
+
+    def test_nombre_exacto_primero(self):
+        # por trigramas "SAN MARTINI" puntúa más que "CALLE SAN MARTIN", pero
+        # el nombre normalizado exacto va primero
+        self.assertEqual(buscar_via_sql("san martin")[0].name, "SAN MARTINI")
+        self.assertEqual([s.name for s in self.idx.buscar("san martin")][:2], ["CALLE SAN MARTIN", "SAN MARTINI"])
+        self.assertEqual(self.idx.buscar("Calle Junín")[0].name, "CALLE JUNIN")
+
+
+class GeocodificacionInversaTests(TestCase):
+    """services/reverse_geocode.py contra PostGIS: la manzana gana a la chacra que la contiene."""
+
+    @classmethod
+    def setUpTestData(cls):
+        def celda(x0, y0, x1, y1):
+            return MultiPolygon(Polygon(_cuadrado(x0, y0, x1, y1)), srid=4326)
+        # como load_all: primero las chacras, así tienen los ids más bajos
+        BlockGrid.objects.create(chacra="12", geom=celda(-55.91, -27.38, -55.89, -27.36))
+        BlockGrid.objects.create(chacra="12", manzana="3", geom=celda(-55.902, -27.372, -55.898, -27.368))
+
+    def test_manzana_dentro_de_chacra(self):
+        r = reverse_geocode.geocodificar(-55.9, -27.37)
+        self.assertEqual((r["chacra"], r["manzana"]), ("12", "3"))
+        self.assertEqual(r["texto"], "chacra 12 manzana 3")
+
+    def test_solo_chacra(self):
+        r = reverse_geocode.geocodificar(-55.905, -27.375)
+        self.assertEqual((r["chacra"], r["manzana"]), ("12", None))
+        self.assertEqual(r["texto"], "chacra 12")
+
+    def test_nombre_calle(self):
+        self.assertEqual(reverse_geocode.nombre_calle("CALLE JUJUY(49)"), "Jujuy")
+        self.assertEqual(reverse_geocode.nombre_calle("AV. ROQUE PÉREZ"), "Roque Pérez")
+        self.assertEqual(reverse_geocode.nombre_calle("Ruta 12"), "Ruta 12")
+
+
+class HeredarAliasesTests(TestCase):
+    """load_geojson: los aliases del admin en calles sin identidad pasan a sus reemplazos."""
+
+    def test_por_geometria_y_por_nombre(self):
+        a, b = _linea((0, 0), (1, 1)), _linea((2, 2), (3, 3))
+        Street.objects.create(name="Jujuy", kind="calle", aliases=["la jujuy"], geom=a)
+        Street.objects.create(name="Junin", kind="calle", aliases=["junín"], geom=_linea((9, 9), (8, 8)))
+        Street.objects.create(name="Mitre", kind="avenida", aliases=["bartolome mitre"], geom=b)
+        jujuy = Street.objects.create(name="CALLE OTRA(1)", kind="calle", aliases=["otra"], geom=a,
+                                      source_layer="calle", source_id="1")
+        junin = [Street.objects.create(name="CALLE JUNIN(7)", kind="calle", geom=g,
+                                       source_layer="calle", source_id=sid)
+                 for sid, g in (("2", _linea((5, 5), (6, 6))), ("3", _linea((6, 6), (7, 7))))]
+
+        self.assertEqual(heredar_aliases("calle"), 3)
+        jujuy.refresh_from_db()
+        self.assertEqual(jujuy.aliases, ["otra", "la jujuy"])       # misma geometría, aunque cambió el nombre
+        for s in junin:
+            s.refresh_from_db()
+            self.assertEqual(s.aliases, ["junín"])                  # sin geometría igual: por nombre
+        self.assertEqual(heredar_aliases("edificio"), 0)
+
+
+class GeoJSONStreamTests(SimpleTestCase):
+    """Lectura incremental de FeatureCollections (services/geojson_stream.py)."""
+
+    COLECCION = {
+        "type": "FeatureCollection",
+        "crs": {"type": "name", "properties": {"name": "EPSG:4326"}},
+        "features": [
+            {"type": "Feature", "id": 1, "properties": {"NOMBRE": "Roque Pérez", "COD": None},
+             "geometry": {"type": "LineString", "coordinates": [[-55.912345678, -27.3712345], [-55.9, -27.37]]}},
+            {"type": "Feature", "id": 2, "properties": {"NOMBRE": "Jujuy [49]", "COD": 49},
+             "geometry": {"type": "Point", "coordinates": [-55.8961, -27.3671]}},
+            {"type": "Feature", "id": 3, "properties": {}, "geometry": None},
+        ],
+        "totalFeatures": 3,
+    }
+    BLOQUES = (1, 2, 3, 7, 64, geojson_stream.BLOQUE)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def archivo(self, contenido, nombre="capa.json"):
+        path = self.dir / nombre
+        path.write_text(contenido if isinstance(contenido, str) else json.dumps(contenido, ensure_ascii=False),
+                        encoding="utf-8")
+        return path
+
+    def test_iter_features_con_bloques_chicos(self):
+        path = self.archivo(self.COLECCION)
+        for bloque in self.BLOQUES:
+            self.assertEqual(list(geojson_stream.iter_features(path, bloque)), self.COLECCION["features"], bloque)
+
+    def test_lista_vacia(self):
+        vacia = {"type": "FeatureCollection", "features": []}
+        path = self.archivo(vacia)
+        for bloque in self.BLOQUES:
+            self.assertEqual(list(geojson_stream.iter_features(path, bloque)), [])
+            salida = self.dir / "salida.json"
+            self.assertEqual(geojson_stream.reescribir(path, salida, bloque=bloque), 0)
+            self.assertEqual(salida.read_text(encoding="utf-8"), json.dumps(vacia, ensure_ascii=False, indent=2))
+
+    def test_reescribir_igual_que_json_dumps(self):
+        path = self.archivo(self.COLECCION)
+        salida = self.dir / "salida.json"
+        for indent in (2, 0, None):
+            for bloque in self.BLOQUES:
+                self.assertEqual(geojson_stream.reescribir(path, salida, indent=indent, bloque=bloque), 3)
+                self.assertEqual(salida.read_text(encoding="utf-8"),
+                                 json.dumps(self.COLECCION, ensure_ascii=False, indent=indent), (indent, bloque))
+
+    def test_reescribir_limpia_y_redondea(self):
+        path = self.archivo(self.COLECCION)
+        salida = self.dir / "salida.json"
+        geojson_stream.reescribir(path, salida, drop_null_props=True, digitos=4, bloque=5)
+        feats = json.loads(salida.read_text(encoding="utf-8"))["features"]
+        self.assertEqual(feats[0]["properties"], {"NOMBRE": "Roque Pérez"})
+        self.assertEqual(feats[0]["geometry"]["coordinates"], [[-55.9123, -27.3712], [-55.9, -27.37]])
+        self.assertEqual(feats[1]["properties"]["COD"], 49)
+
+    def test_errores(self):
+        sin_features = self.archivo({"type": "FeatureCollection"}, "sin_features.json")
+        cortado = self.archivo(json.dumps(self.COLECCION)[:-40], "cortado.json")
+        for path in (sin_features, cortado):
+            for bloque in (1, 7, geojson_stream.BLOQUE):
+                with self.assertRaises(ValueError):
+                    list(geojson_stream.iter_features(path, bloque))
+
+    def test_load_geojson_informa_command_error(self):
+        feats, modo = read_features(self.archivo({"type": "FeatureCollection"}, "sin_features.json"))
+        self.assertEqual(modo, "json")
+        with self.assertRaises(CommandError):
+            list(feats)
+
+
+class ParsearCatastroTests(SimpleTestCase):
+    """Reglas de validacion.parser.parsear_catastro: prefijo, etiquetas y código por posiciones."""
+
+    def test_gid(self):
+        self.assertEqual(parsear_catastro("IDGIS 12345"), {"gid": "12345"})
+        self.assertEqual(parsear_catastro("gid: A7"), {"gid": "a7"})
+
+    def test_por_posiciones_sin_prefijo(self):
+        self.assertEqual(parsear_catastro("12-34-5"), {"chacra": "12", "block": "34", "parcel": "5"})
+        # una fecha tiene la misma forma: se busca como código (y no hay parcela)
+        self.assertEqual(parsear_catastro("12/10/2024"), {"chacra": "12", "block": "10", "parcel": "2024"})
+        self.assertEqual(parsear_catastro("catastro 012-34-05-2"),
+                         {"chacra": "12", "block": "34", "parcel": "5", "unit": "2"})
+        self.assertEqual(parsear_catastro("1.2.12.34.5.3"),
+                         {"district": "1", "section": "2", "chacra": "12", "block": "34", "parcel": "5", "unit": "3"})
+        self.assertIsNone(parsear_catastro("12-34"))
+
+    def test_etiquetas(self):
+        self.assertEqual(parsear_catastro("ch 12 mz 34 lote 5"), {"chacra": "12", "block": "34", "lot": "5"})
+        self.assertEqual(parsear_catastro("Chacra 12, Parcela 7b"), {"chacra": "12", "parcel": "7b"})
+        self.assertEqual(parsear_catastro("mz 3 uf 2"), {"block": "3", "unit": "2"})
+
+    def test_sin_prefijo_no_alcanza_con_zona_ni_lote_suelto(self):
+        self.assertIsNone(parsear_catastro("chacra 12 manzana 3"))   # zona interna
+        self.assertIsNone(parsear_catastro("lote 5"))
+        self.assertIsNone(parsear_catastro("Mitre 1234"))
+
+    def test_con_prefijo_alcanza_una_etiqueta(self):
+        self.assertEqual(parsear_catastro("catastro lote 5"), {"lot": "5"})
+        self.assertEqual(parsear_catastro("nc: mz 3"), {"block": "3"})
+        self.assertEqual(parsear_catastro("Nomenclatura catastral chacra 12 manzana 3"),
+                         {"chacra": "12", "block": "3"})
+
+
+class ReferenciaLinealTests(SimpleTestCase):
+    """Eje.punto y su inversa altura_en (services/linear_ref.py), sobre el ecuador."""
+
+    def setUp(self):
+        # dos partes de 1000 m medidos (la primera con un vértice intermedio),
+        # con un hueco entre ellas; 1 altura por metro
+        geom = MultiLineString(LineString((0, 0), (0.002, 0), (0.01, 0)), LineString((0.02, 0), (0.03, 0)), srid=4326)
+        self.axis = SimpleNamespace(desde=0, hasta=2000, length_m=2000.0, parts=[[0, 1000], [1000, 2000]], geom=geom)
+        self.eje = Eje(self.axis)
+
+    def assertPunto(self, numero, lon):
+        x, y = self.eje.punto(numero)
+        self.assertAlmostEqual(x, lon, places=9, msg=numero)
+        self.assertAlmostEqual(y, 0, places=9)
+
+    def test_escala_cada_parte_a_su_largo_medido(self):
+        self.assertPunto(0, 0)
+        self.assertPunto(200, 0.002)      # el vértice intermedio cae a 1/5 del largo
+        self.assertPunto(500, 0.005)
+        self.assertPunto(1000, 0.02)      # el límite entre partes es el inicio de la segunda
+        self.assertPunto(1500, 0.025)
+        self.assertPunto(2000, 0.03)
+
+    def test_monotona(self):
+        xs = [self.eje.punto(n)[0] for n in range(0, 2001, 5)]
+        self.assertEqual(xs, sorted(xs))
+
+    def test_fuera_de_rango(self):
+        self.assertIsNone(self.eje.punto(-1))
+        self.assertIsNone(self.eje.punto(2001))
+        self.assertIsNone(Eje(SimpleNamespace(**{**vars(self.axis), "hasta": 0})).punto(0))
+
+    def test_altura_en_es_la_inversa(self):
+        for n in range(0, 2001, 25):
+            x = self.eje.punto(n)[0]
+            parte, frac = (0, x / 0.01) if n < 1000 else (1, (x - 0.02) / 0.01)
+            self.assertEqual(altura_en(0, 2000, 2000.0, self.axis.parts, parte, frac), n)
+        self.assertEqual(altura_en(100, 300, 2000.0, self.axis.parts, 1, 1.0), 300)
+        self.assertIsNone(altura_en(0, 2000, 2000.0, [], 0, 0.5))
+        self.assertIsNone(altura_en(0, 2000, 2000.0, self.axis.parts, 2, 0.5))
+        self.assertIsNone(altura_en(0, 0, 2000.0, self.axis.parts, 0, 0.5))
+
+
+class _BufferSinHilo(QueryLogBuffer):
+    """QueryLogBuffer sin hilo ni base: la cola solo se vacía con flush() y los lotes quedan en `escritos`."""
+
+    def __init__(self, policy, max_size=3):
+        super().__init__(max_size=max_size, batch_size=100, flush_interval=60, policy=policy, block_timeout=0.01)
+        self.escritos = []
+
+    def _arrancar(self):
+        pass
+
+    def _escribir(self, lote):
+        self.escritos.extend(lote)
+        self.stats["escritos"] += len(lote)
+
+
+class QueryLogBufferTests(SimpleTestCase):
+    """Políticas de QueryLogBuffer.put con la cola llena (services/querylog_buffer.py)."""
+
+    def llenar(self, policy):
+        b = _BufferSinHilo(policy)
+        return b, [b.put(n) for n in range(1, 6)]
+
+    def test_drop_oldest(self):
+        b, ok = self.llenar("drop_oldest")
+        self.assertEqual(ok, [True] * 5)
+        self.assertEqual(list(b.cola), [3, 4, 5])
+        self.assertEqual(b.stats, {"encolados": 5, "escritos": 0, "descartados": 2, "errores": 0})
+
+    def test_drop_new(self):
+        b, ok = self.llenar("drop_new")
+        self.assertEqual(ok, [True, True, True, False, False])
+        self.assertEqual(list(b.cola), [1, 2, 3])
+        self.assertEqual(b.stats, {"encolados": 3, "escritos": 0, "descartados": 2, "errores": 0})
+
+    def test_block_descarta_al_vencer_la_espera(self):
+        b, ok = self.llenar("block")
+        self.assertEqual(ok, [True, True, True, False, False])
+        self.assertEqual(b.stats["descartados"], 2)
+
+    def test_sync_escribe_en_el_momento(self):
+        b, ok = self.llenar("sync")
+        self.assertEqual(ok, [True] * 5)
+        self.assertEqual(list(b.cola), [1, 2, 3])
+        self.assertEqual(b.escritos, [4, 5])
+        self.assertEqual(b.stats, {"encolados": 3, "escritos": 2, "descartados": 0, "errores": 0})
+
+    def test_flush(self):
+        b, _ok = self.llenar("drop_oldest")
+        b.flush()
+        self.assertEqual(b.escritos, [3, 4, 5])
+        self.assertFalse(b.cola)
+
+
+class ResumenTests(TestCase):
+    """rollups.resumen: los días consolidados salen de QueryLogDaily y el resto de QueryLog en vivo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hoy = timezone.localdate()
+        cls.consolidado = cls.hoy - timedelta(days=2)
+        # el resumen dice 5 para ese día aunque QueryLog tenga una sola fila:
+        # así se ve de dónde salió cada número
+        QueryLogDaily.objects.create(day=cls.consolidado, status="OK", count=5, score_sum=4.0, score_n=5)
+        for dia, status in ((cls.consolidado, "OK"), (cls.hoy - timedelta(days=1), "NO_MATCH"), (cls.hoy, "OK")):
+            QueryLog.objects.create(raw_text="x", status=status, score=1.0,
+                                    created_at=rollups.inicio_dia(dia) + timedelta(hours=12))
+
+    def test_consolidado_mas_vivo(self):
+        r = rollups.resumen(self.hoy - timedelta(days=3), self.hoy)
+        self.assertEqual(r["total"], 7)
+        self.assertEqual(r["logs_by_day"], [
+            {"day": self.consolidado, "count": 5},
+            {"day": self.hoy - timedelta(days=1), "count": 1},
+            {"day": self.hoy, "count": 1},
+        ])
+        self.assertEqual(r["by_status"], [{"status": "NO_MATCH", "c": 1}, {"status": "OK", "c": 6}])
+        self.assertAlmostEqual(r["avg_score"], 6.0 / 7)
+
+    def test_sin_inicio(self):
+        self.assertEqual(rollups.resumen(None, self.hoy)["total"], 7)
+
+    def test_rango_despues_del_corte_todo_en_vivo(self):
+        r = rollups.resumen(self.hoy - timedelta(days=1), self.hoy)
+        self.assertEqual(r["total"], 2)
+
+    def test_rango_dentro_de_lo_consolidado(self):
+        r = rollups.resumen(self.consolidado, self.consolidado)
+        self.assertEqual(r["logs_by_day"], [{"day": self.consolidado, "count": 5}])
@@ -19,6 +19,7 @@ urlpatterns = [
     path("querylogs/<int:pk>/delete/", views.querylog_delete, name="querylog_delete"),
     path("dashboard/", views.dashboard, name="dashboard"),
     path("heatmap_data/", views.heatmap_data, name="heatmap_data"),
+    path("cache_stats/", views.cache_stats, name="cache_stats"),
 
 
     #path("ask/", api.ask_vadi, name="ask_vadi"),
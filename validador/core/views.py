@@ -1,12 +1,32 @@
 # validador/core/views.py
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, Http404
+from django.conf import settings
 from validador.core.models import QueryLog
 from django.shortcuts import render
 from validador.core.services.address_validator import validate_address
+from validador.core.services import result_cache, rollups, tiles
+from django.contrib.auth.decorators import login_required
 
 def api_validate(request):
     q = request.GET.get("q", "").strip()
-    return JsonResponse(validate_address(q))
+    return JsonResponse(validate_address(q))   # el motor ya cachea por texto
+
+@login_required
+def cache_stats(request):
+    """Contadores de la caché de validación de este worker."""
+    return JsonResponse(result_cache.estadisticas())
+
+def tile(request, layer, z, x, y):
+    """Vector tile /tiles/<layer>/<z>/<x>/<y>.mvt (cacheada en disco por versión de capa)."""
+    if layer not in tiles.CAPAS or not tiles.valida(z, x, y):
+        raise Http404("Tile inexistente")
+    data = tiles.obtener(layer, z, x, y)
+    if data:
+        resp = HttpResponse(data, content_type="application/vnd.mapbox-vector-tile")
+    else:
+        resp = HttpResponse(status=204)     # vacía o fuera de la capa
+    resp["Cache-Control"] = f"public, max-age={getattr(settings, 'TILE_MAX_AGE', 3600)}"
+    return resp
 
 def test_view(request):
     return render(request, "test.html")
@@ -23,13 +43,41 @@ def chat_ui(request):
 # CRUD
 
 from django.shortcuts import render, get_object_or_404, redirect
+from django.db.models import Q
 #from core.models import QueryLog
 from django.contrib.auth.decorators import login_required
 
+LOGS_POR_PAGINA = 100
+
+def _cursor_log(valor):
+    """'<created_at iso>|<id>' -> (datetime, id), o None si no es válido."""
+    try:
+        fecha, pk = (valor or "").rsplit("|", 1)
+        return datetime.fromisoformat(fecha), int(pk)
+    except ValueError:
+        return None
+
 @login_required
 def querylog_list(request):
-    logs = QueryLog.objects.all().order_by('-created_at')[:100]
-    return render(request, "validador/querylog_list.html", {"logs": logs})
+    """
+    Historial paginado por cursor sobre (created_at, id): ?antes=<cursor> trae
+    las filas anteriores a esa. Solo columnas escalares y el usuario en el
+    mismo JOIN; result_json y geom quedan para el detalle.
+    """
+    logs = (QueryLog.objects
+            .select_related("user")
+            .only("id", "created_at", "raw_text", "status", "score", "user__username")
+            .order_by("-created_at", "-id"))
+    cursor = _cursor_log(request.GET.get("antes"))
+    if cursor:
+        fecha, pk = cursor
+        logs = logs.filter(Q(created_at__lt=fecha) | Q(created_at=fecha, id__lt=pk))
+    logs = list(logs[:LOGS_POR_PAGINA + 1])
+    siguiente = None
+    if len(logs) > LOGS_POR_PAGINA:
+        logs = logs[:LOGS_POR_PAGINA]
+        siguiente = f"{logs[-1].created_at.isoformat()}|{logs[-1].id}"
+    return render(request, "validador/querylog_list.html", {"logs": logs, "siguiente": siguiente})
 
 @login_required
 def querylog_detail(request, pk):
@@ -47,8 +95,6 @@ def querylog_delete(request, pk):
 # Dashboard
 # core/views.py
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Avg
-from django.db.models.functions import TruncDate
 from django.utils import timezone
 from datetime import timedelta, datetime
 import json
@@ -91,57 +137,82 @@ def _parse_range(request):
 def dashboard(request):
     start, end, selected_range = _parse_range(request)
 
-    qs = QueryLog.objects.all()
-    if start:
-        qs = qs.filter(created_at__date__gte=start)
-    if end:
-        qs = qs.filter(created_at__date__lte=end)
-
-    total = qs.count()
-    by_status = qs.values("status").annotate(c=Count("id")).order_by("status")
-    avg_score = qs.aggregate(avg=Avg("score"))["avg"] or 0
-
-    logs_by_day = (
-        qs.annotate(day=TruncDate("created_at"))
-          .values("day")
-          .annotate(count=Count("id"))
-          .order_by("day")
-    )
+    # días consolidados desde core_querylogdaily (rollup_querylog, por cron);
+    # los que falten (normalmente solo hoy) se agregan en vivo sobre core_querylog
+    data = rollups.resumen(start, end)
 
     ctx = {
-        "total": total,
-        "avg_score": round(avg_score, 2),
-        "by_status": json.dumps(list(by_status)),
-        "logs_by_day": json.dumps(list(logs_by_day), default=str),
+        "total": data["total"],
+        "avg_score": round(data["avg_score"], 2),
+        "by_status": json.dumps(data["by_status"]),
+        "logs_by_day": json.dumps(data["logs_by_day"], default=str),
         "selected_range": selected_range,
         "from": start.isoformat() if start else "",
         "to": end.isoformat() if end else "",
     }
     return render(request, "validador/dashboard.html", ctx)
 from django.http import JsonResponse
-from django.contrib.gis.db.models.functions import Transform
+from django.db import connection
+import math
+
+# Agregado por celdas en SQL: cada punto se ajusta a la grilla (ST_SnapToGrid
+# deja el centro de la celda) y se cuentan consultas por celda. El && usa el
+# índice GiST de geom, así solo se leen los puntos del viewport.
+SQL_HEATMAP = """
+    SELECT ST_Y(c) AS lat, ST_X(c) AS lng, count(*) AS n
+    FROM (
+        SELECT ST_SnapToGrid(geom, %(celda)s) AS c
+        FROM core_querylog
+        WHERE geom IS NOT NULL
+          AND geom && ST_MakeEnvelope(%(x0)s, %(y0)s, %(x1)s, %(y1)s, 4326)
+          AND created_at >= %(desde)s AND created_at < %(hasta)s
+    ) q
+    GROUP BY c
+    ORDER BY n DESC
+    LIMIT %(max_celdas)s
+"""
+
+def _bbox(request):
+    """?bbox=minLon,minLat,maxLon,maxLat (default: HEATMAP_BBOX)."""
+    try:
+        x0, y0, x1, y1 = (float(v) for v in request.GET["bbox"].split(","))
+    except (KeyError, ValueError):
+        x0, y0, x1, y1 = getattr(settings, "HEATMAP_BBOX", (-180.0, -90.0, 180.0, 90.0))
+    x0, x1 = (max(min(v, 180.0), -180.0) for v in (x0, x1))
+    y0, y1 = (max(min(v, 90.0), -90.0) for v in (y0, y1))
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
 
 @login_required
 def heatmap_data(request):
-    # mismo parser de rango que usa el dashboard
+    """
+    Heatmap agregado por celdas para el viewport: ?bbox=...&zoom=N (+ el mismo
+    rango de fechas del dashboard). El tamaño de celda sale del zoom
+    (HEATMAP_CELL_PX píxeles de pantalla), así la respuesta depende del
+    viewport y no de cuántas consultas hay registradas. Si el bbox no entra
+    en HEATMAP_MAX_CELLS celdas a ese zoom (bbox enorme con zoom alto), la
+    celda se agranda hasta que entre; el LIMIT acota igual la respuesta.
+    """
     start, end, _ = _parse_range(request)
-
-    qs = QueryLog.objects.all()
-    if start:
-        qs = qs.filter(created_at__date__gte=start)
-    if end:
-        qs = qs.filter(created_at__date__lte=end)
-
-    # Aseguramos WGS84 y sacamos lat/lng
-    # (tu modelo ya está en 4326, pero Transform evita sorpresas)
-    qs = qs.annotate(geom_wgs84=Transform("geom", 4326)).exclude(geom_wgs84=None)
-
-    # weight: usá score si existe, si no 1.0
-    payload = []
-    for q in qs.iterator():
-        lat = q.geom_wgs84.y
-        lng = q.geom_wgs84.x
-        w   = float(q.score or 1.0)
-        payload.append([lat, lng, w])
-
-    return JsonResponse({"points": payload})
+    try:
+        zoom = min(max(int(request.GET.get("zoom", 12)), 0), 22)
+    except ValueError:
+        zoom = 12
+    x0, y0, x1, y1 = _bbox(request)
+    celda = 360.0 / (256 * 2 ** zoom) * getattr(settings, "HEATMAP_CELL_PX", 16)
+    max_celdas = getattr(settings, "HEATMAP_MAX_CELLS", 20000)
+    celda = max(celda, math.sqrt((x1 - x0) * (y1 - y0) / max_celdas))
+
+    params = {
+        "celda": celda, "max_celdas": max_celdas, "x0": x0, "y0": y0, "x1": x1, "y1": y1,
+        "desde": rollups.inicio_dia(start) if start else "-infinity",
+        "hasta": rollups.inicio_dia(end + timedelta(days=1)),
+    }
+    with connection.cursor() as cur:
+        cur.execute(SQL_HEATMAP, params)
+        cells = [[lat, lng, n] for lat, lng, n in cur.fetchall()]
+
+    return JsonResponse({
+        "cells": cells,
+        "cell_size": celda,
+        "max": max((c[2] for c in cells), default=0),
+    })
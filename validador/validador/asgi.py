@@ -5,12 +5,18 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+El chat (/api/chat/) es una vista async que transmite la respuesta del LLM
+por SSE; para que no ocupe un hilo por conversación hay que servirlo con un
+servidor ASGI, p. ej. desde la raíz del repo:
+
+    uvicorn validador.validador.asgi:application --workers 4
 """
 
 import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'validador.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'validador.validador.settings')
 
 application = get_asgi_application()
@@ -166,3 +166,79 @@ STATICFILES_DIRS = [
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+
+# Nomenclador de calles en memoria (validacion.services.buscar_via)
+STREET_INDEX_ENABLED = True
+# Segundos entre chequeos de LayerVersion de los índices en memoria por worker
+LAYER_VERSION_TTL = 30
+
+# Numeración de alturas sobre los ejes de calle (build_street_axes): sin rangos
+# oficiales, se asume numeración métrica desde el extremo del eje más cercano
+# a ALTURA_ORIGEN (lon, lat; plaza 9 de Julio). El resultado es "aproximada".
+ALTURA_POR_METRO = 1.0
+ALTURA_ORIGEN = (-55.8961, -27.3671)
+
+# Validación por lotes (validacion.views.ValidateBatch)
+VALIDATION_BATCH_MAX = 10000   # direcciones por request
+VALIDATION_BATCH_CHUNK = 500   # tamaño de bloque para consultas y bulk_create
+
+# Caché de resultados de validación (validador.core.services.result_cache):
+# LRU por proceso delante del backend de CACHES[ALIAS]. Para compartirla
+# entre workers, configurar CACHES["default"] con Redis/Memcached.
+VALIDATION_CACHE = {
+    "ENABLED": True,
+    "ALIAS": "default",
+    "TTL": 3600,
+    "LRU_SIZE": 5000,
+    "LRU_TTL": 600,
+}
+
+# Escritura diferida de QueryLog (validador.core.services.querylog_buffer).
+# POLICY: "drop_oldest" | "drop_new" | "block" | "sync" cuando la cola se llena.
+QUERYLOG_BUFFER = {
+    "ENABLED": True,
+    "MAX_SIZE": 10000,
+    "BATCH_SIZE": 500,
+    "FLUSH_INTERVAL": 2.0,
+    "POLICY": "drop_oldest",
+    "BLOCK_TIMEOUT": 0.5,
+}
+
+# Heatmap del dashboard (core.views.heatmap_data): celdas de ~HEATMAP_CELL_PX
+# píxeles de pantalla, agregadas en SQL. HEATMAP_BBOX se usa si no llega ?bbox.
+HEATMAP_CELL_PX = 16
+HEATMAP_MAX_CELLS = 20000   # tope de celdas por respuesta (agranda la celda si hace falta)
+HEATMAP_BBOX = (-56.10, -27.55, -55.80, -27.30)   # Posadas (lon/lat)
+
+# Vector tiles (/tiles/<capa>/<z>/<x>/<y>.mvt): caché en disco por versión de
+# capa, pre-generable con `manage.py seed_tiles --prune`. Por encima de
+# TILE_MAX_ZOOM el endpoint responde 404.
+TILE_CACHE_DIR = ROOT_DIR / "data" / "tiles"
+TILE_MAX_AGE = 3600
+TILE_MAX_ZOOM = 20
+
+# Geocodificación inversa (validacion/reverse_geocode): radios en metros para
+# aceptar la calle más cercana y el edificio más cercano.
+REVERSE_GEOCODE = {
+    "RADIO_CALLE_M": 150,
+    "RADIO_EDIFICIO_M": 60,
+}
+
+# Snapshot binario del nomenclador (manage.py build_snapshot): los workers lo
+# abren con mmap y lo usan mientras coincida con las versiones de las capas.
+SNAPSHOT_PATH = ROOT_DIR / "data" / "snapshot" / "gazetteer.bin"
+SNAPSHOT_ENABLED = True
+
+# Contexto de los puntos (chacra/manzana y monoblocks cercanos) en memoria
+# (validador.core.services.spatial_index), sobre el snapshot vigente; sin
+# snapshot, o con False, consultas a PostGIS.
+SPATIAL_INDEX_ENABLED = True
+
+# core_querylog particionada por mes (manage.py querylog_partitions, a diario
+# por cron): particiones creadas por delante y meses que se conservan antes de
+# exportarlos a ARCHIVE_DIR/querylog-AAAA-MM.ndjson.gz y borrarlos.
+QUERYLOG_PARTITIONS = {
+    "AHEAD": 3,
+    "RETENTION_MONTHS": 12,
+    "ARCHIVE_DIR": ROOT_DIR / "data" / "archive" / "querylog",
+}
@@ -14,6 +14,7 @@ urlpatterns = [
     path("api/", include("validador.core.urls")),   # 👈 incluye las rutas de core
     path("validador/chat/", core_views.chat_ui, name="chat_ui"),
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("tiles/<str:layer>/<int:z>/<int:x>/<int:y>.mvt", core_views.tile, name="tile"),
 
 
 # Auth